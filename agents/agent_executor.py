@@ -1,12 +1,36 @@
-from agents.prompts.prompts import get_prompt_for_role
-from agents.tools import get_tools_for_role
+import os
+import sys
+import time
+import asyncio
+import importlib
+import importlib.util
+import threading
+# Looked up on the modules at build time, so that reloading them in place takes effect
+from agents.prompts import prompts as agent_prompts
+from agents import tools as agent_tools
+from agents.streaming import stream_agent_events
 from service.llm_service import LLMService
-from langchain.agents import AgentExecutor, Tool
+from langchain.agents import AgentExecutor
 from langchain.agents import ConversationalChatAgent
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 from utils.logger import setup_logger
 
 llm_service = LLMService()
+logger = setup_logger("agent_executor", "logs/crowdguard.log")
+
+AGENT_ROLES = ("admin", "responder", "user")  # Roles with their own tools; any other role gets the default agent
+DEFAULT_ROLE_KEY = "default"
+RELOAD_CHECK_SECONDS = 2.0  # How often the pool looks for edited prompt/tool modules
+MAX_CONCURRENT_AGENT_RUNS = 32  # Agent runs in flight per worker; further requests wait for a slot
+AGENT_TIMEOUT_SECONDS = 60.0  # Per request, including the wait for a slot
+# Modules whose source defines an agent; editing one of them rebuilds the pooled executors
+AGENT_SOURCE_MODULES = (
+    "agents.prompts.prompts",
+    "agents.tools.admin_tools",
+    "agents.tools.responder_tools",
+    "agents.tools.user_tools",
+    "agents.tools",
+)
 
 class AgentExecutorBuilder:
     def __init__(self, user_type: str) -> None:
@@ -16,12 +40,12 @@ class AgentExecutorBuilder:
         Args:
             user_type (str): The user type/role to get tools and prompt for.
         """
-        self.logger = setup_logger("agent_executor", "logs/crowdguard.log")
+        self.logger = logger
         self.logger.info(f"Initializing AgentExecutorBuilder for user_type: {user_type}")
         self.llm = llm_service.model
-        self.tools = get_tools_for_role(user_type)
+        self.tools = agent_tools.get_tools_for_role(user_type)
         self.logger.info(f"Tools loaded: {[tool.name for tool in self.tools]}")
-        self.system_prompt = get_prompt_for_role(user_type)
+        self.system_prompt = agent_prompts.get_prompt_for_role(user_type)
         self.logger.info(f"System prompt set: {self.system_prompt[:100]}...")
 
     def create(self) -> AgentExecutor:
@@ -48,3 +72,145 @@ class AgentExecutorBuilder:
         )
         self.logger.info("AgentExecutor instance created successfully.")
         return agent_executor
+
+
+class AgentExecutorPool:
+    """
+    One prebuilt AgentExecutor per role, shared by all requests.
+
+    Executors are built on first use (or up front with `preload`) and handed out as-is:
+    they hold no conversation memory, since the chat history is passed in with every
+    call, so concurrent requests can run the same executor. When a prompt or tool
+    module is edited on disk it is reloaded and the executors are rebuilt; `reload()`
+    does the same on demand.
+
+    `arun` runs an agent on the event loop through the async LangChain APIs, with at
+    most `max_concurrent` runs in flight and a per-request timeout. `astream` does the
+    same but yields tool-call and final-answer token events as they happen.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, check_interval: float = RELOAD_CHECK_SECONDS, max_concurrent: int = MAX_CONCURRENT_AGENT_RUNS) -> None:
+        if self._initialized:
+            return
+        self.check_interval = check_interval
+        self._limiter = asyncio.Semaphore(max_concurrent)
+        self._executors: Dict[str, AgentExecutor] = {}
+        self._lock = threading.Lock()
+        self._source_files = [importlib.util.find_spec(name).origin for name in AGENT_SOURCE_MODULES]
+        self._source_signature = self._read_source_signature()
+        self._next_check = time.monotonic() + check_interval
+        self._initialized = True
+
+    @staticmethod
+    def role_key(user_type: Optional[str]) -> str:
+        return user_type if user_type in AGENT_ROLES else DEFAULT_ROLE_KEY
+
+    def get(self, user_type: str) -> AgentExecutor:
+        """Return the shared executor for `user_type`, building it on first use."""
+        self._reload_if_changed()
+        key = self.role_key(user_type)
+        executor = self._executors.get(key)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(key)
+                if executor is None:
+                    executor = AgentExecutorBuilder(key).create()
+                    self._executors[key] = executor
+                    logger.info(f"Pooled AgentExecutor built for role: {key}")
+        return executor
+
+    async def arun(self, user_type: str, query: str, chat_history: Optional[List] = None,
+                   timeout: float = AGENT_TIMEOUT_SECONDS) -> str:
+        """
+        Run the role's agent asynchronously and return its final answer.
+
+        Raises:
+            TimeoutError: if no slot frees up and the run completes within `timeout` seconds.
+        """
+        async def run() -> str:
+            async with self._limiter:
+                agent = self.get(user_type)
+                result = await agent.ainvoke({"input": query, "chat_history": chat_history or []})
+                return result["output"]
+
+        try:
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:  # Not yet the builtin TimeoutError before Python 3.11
+            raise TimeoutError(f"Agent run for role '{self.role_key(user_type)}' exceeded {timeout}s") from None
+
+    async def astream(self, user_type: str, query: str, chat_history: Optional[List] = None,
+                      timeout: float = AGENT_TIMEOUT_SECONDS) -> AsyncIterator[Dict]:
+        """
+        Run the role's agent and yield its events (see `stream_agent_events`).
+
+        Shares the concurrency limit with `arun`; the slot is held until the stream ends.
+
+        Raises:
+            TimeoutError: if the whole run, including the wait for a slot, exceeds `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(self._limiter.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No agent slot for role '{self.role_key(user_type)}' within {timeout}s") from None
+
+        events = None
+        try:
+            agent = self.get(user_type)
+            events = stream_agent_events(agent, {"input": query, "chat_history": chat_history or []})
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"Agent run for role '{self.role_key(user_type)}' exceeded {timeout}s") from None
+                yield event
+        finally:
+            if events is not None:
+                await events.aclose()
+            self._limiter.release()
+
+    def preload(self, user_types=AGENT_ROLES) -> None:
+        """Build the executors up front so the first requests do not pay for it."""
+        for user_type in user_types:
+            self.get(user_type)
+
+    def reload(self) -> None:
+        """
+        Re-import the prompt and tool modules in place and drop every pooled executor.
+        The pool object itself is kept, so references to it (e.g. main.agent_pool) stay valid.
+        """
+        with self._lock:
+            for name in AGENT_SOURCE_MODULES:
+                if name in sys.modules:  # Tool modules are imported lazily, on first use of their role
+                    importlib.reload(sys.modules[name])
+            self._executors.clear()
+            self._source_signature = self._read_source_signature()
+        logger.info("Agent prompts and tools reloaded; executors will be rebuilt on next use.")
+
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        if self._read_source_signature() != self._source_signature:
+            self.reload()
+
+    def _read_source_signature(self):
+        """Modification times of the prompt and tool module files."""
+        signature = []
+        for path in self._source_files:
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
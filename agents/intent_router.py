@@ -0,0 +1,159 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from service.query_engine import QueryError, get_query_engine
+from service.response_cache import normalize_query
+from service.stats_service import TRACKED_BREAKDOWNS, get_event_stats
+from utils.logger import setup_logger
+
+logger = setup_logger("intent_router", "logs/crowdguard.log")
+
+ROUTED_ROLES = ("admin",)  # Roles whose deterministic questions are answered without the agent
+INACTIVE_ALERT_STATUSES = ("resolved", "closed", "dismissed")
+
+# Words a question may use for each collection and breakdown field
+COLLECTION_WORDS = {
+    "incidents": "incidents?",
+    "alerts": "alerts?",
+    "users": "users?|attendees|people",
+    "events": "events?",
+    "documents": "documents?|docs",
+    "lost_and_found": "lost and found(?: items?)?|lost items?",
+}
+FIELD_WORDS = {
+    "zone": "zones?|areas?",
+    "role": "roles?",
+    "status": "status(?:es)?",
+    "type": "types?|categor(?:y|ies)",
+}
+COLLECTION_LABELS = {
+    "incidents": ("incident", "incidents"),
+    "alerts": ("alert", "alerts"),
+    "users": ("user", "users"),
+    "events": ("event", "events"),
+    "documents": ("document", "documents"),
+    "lost_and_found": ("lost and found item", "lost and found items"),
+}
+
+
+def _group(words: Dict[str, str], name: str) -> str:
+    return f"(?P<{name}>" + "|".join(f"(?:{pattern})" for pattern in words.values()) + ")"
+
+
+def _resolve(words: Dict[str, str], text: str) -> str:
+    return next(key for key, pattern in words.items() if re.fullmatch(pattern, text))
+
+
+def _label(collection: str, n: int) -> str:
+    singular, plural = COLLECTION_LABELS[collection]
+    return f"{n} {singular if n == 1 else plural}"
+
+
+def _there_are(collection: str, n: int) -> str:
+    return f"There {'is' if n == 1 else 'are'} {_label(collection, n)}"
+
+
+def _lines(counts: Dict[str, int]) -> str:
+    return "\n".join(f"- {value}: {count}" for value, count in counts.items())
+
+
+# Patterns run against normalize_query() output and must match the whole question, so
+# anything more specific than an intent ("how many incidents yesterday") goes to the agent.
+_COLLECTION = _group(COLLECTION_WORDS, "collection")
+_FIELD = _group(FIELD_WORDS, "field")
+_REQUEST = r"(?:(?:show|list|give|get|tell|what are|what is|whats)(?: me)?\s+)?(?:the\s+)?"
+
+COUNT_PATTERN = re.compile(
+    rf"(?:how many|number of|total number of|total|count of|count)\s+(?:the\s+)?{_COLLECTION}"
+    r"(?:\s+(?:are there|do we have|are there in total|in total|have been reported|were reported|so far|right now))?"
+)
+BREAKDOWN_PATTERN = re.compile(
+    rf"{_REQUEST}(?:(?:number|count) of\s+|how many\s+)?{_COLLECTION}\s+(?:by|per|in each|for each)\s+{_FIELD}"
+)
+ACTIVE_ALERTS_PATTERN = re.compile(
+    rf"(?:{_REQUEST}|how many\s+|which\s+)(?:all\s+)?(?:the\s+)?(?:currently\s+)?(?:active|open|current|unresolved) alerts"
+    r"(?:\s+(?:are there|do we have|right now|now))?"
+)
+ZONE_COUNT_PATTERN = re.compile(
+    r"how many (?P<collection>users?|attendees|people|alerts?) (?:are )?(?:there )?(?:in|at) (?:the )?(?P<zone>.+?)(?: zone)?"
+)
+
+
+def answer_count(match: re.Match, snapshot: Dict) -> Optional[str]:
+    collection = _resolve(COLLECTION_WORDS, match.group("collection"))
+    return f"{_there_are(collection, snapshot['totals'].get(collection, 0))} in total."
+
+
+def answer_breakdown(match: re.Match, snapshot: Dict) -> Optional[str]:
+    collection = _resolve(COLLECTION_WORDS, match.group("collection"))
+    field = _resolve(FIELD_WORDS, match.group("field"))
+    if field not in TRACKED_BREAKDOWNS.get(collection, ()):
+        return None
+    counts = snapshot[collection][field]
+    total = snapshot["totals"].get(collection, 0)
+    return f"{COLLECTION_LABELS[collection][1].capitalize()} by {field} ({total} in total):\n{_lines(counts)}"
+
+
+def answer_active_alerts(match: re.Match, snapshot: Dict) -> Optional[str]:
+    statuses = [status for status in snapshot["alerts"]["status"] if status not in INACTIVE_ALERT_STATUSES]
+    if not statuses:
+        return "There are no active alerts."
+    try:
+        result = get_query_engine().execute({
+            "collection": "alerts",
+            "filters": [{"field": "status", "op": "in", "value": statuses}],
+            "group_by": "zone",
+        })
+    except QueryError:
+        return None
+    by_status = ", ".join(f"{snapshot['alerts']['status'][status]} {status}" for status in statuses)
+    by_zone = _lines({group["value"]: group["count"] for group in result["groups"]})
+    n = result["count"]
+    return f"There {'is' if n == 1 else 'are'} {n} active alert{'' if n == 1 else 's'} ({by_status}).\nBy zone:\n{by_zone}"
+
+
+def answer_zone_count(match: re.Match, snapshot: Dict) -> Optional[str]:
+    collection = _resolve(COLLECTION_WORDS, match.group("collection"))
+    zones = {str(zone).lower(): zone for zone in snapshot[collection]["zone"]}
+    zone = zones.get(match.group("zone"))
+    if zone is None:
+        return None  # Not a known zone name; let the agent interpret it
+    return f"{_there_are(collection, snapshot[collection]['zone'][zone])} in {zone}."
+
+
+INTENTS: List[Tuple[str, re.Pattern, Callable[[re.Match, Dict], Optional[str]]]] = [
+    ("count", COUNT_PATTERN, answer_count),
+    ("breakdown", BREAKDOWN_PATTERN, answer_breakdown),
+    ("active_alerts", ACTIVE_ALERTS_PATTERN, answer_active_alerts),
+    ("zone_count", ZONE_COUNT_PATTERN, answer_zone_count),
+]
+
+
+class IntentRouter:
+    """
+    Fast path in front of the agents for questions with an exact answer in the data.
+
+    Known intents ("how many incidents", "users by zone", "active alerts", "how many
+    users in Food Court") are recognized with whole-question rules and answered with
+    templated text from the event statistics, with no LLM round trip. Anything else,
+    including a question that matches a rule but names an unknown zone or breakdown,
+    returns None and is left to the agent.
+    """
+
+    def __init__(self, roles=ROUTED_ROLES) -> None:
+        self.roles = roles
+
+    def route(self, user_type: str, query: str) -> Optional[Dict[str, str]]:
+        """{"intent": ..., "output": ...} for a known intent, else None."""
+        if user_type not in self.roles:
+            return None
+        normalized = normalize_query(query)
+        for intent, pattern, answer in INTENTS:
+            match = pattern.fullmatch(normalized)
+            if match is None:
+                continue
+            output = answer(match, get_event_stats().snapshot())
+            if output is not None:
+                logger.info(f"Answered '{query}' with the '{intent}' intent")
+                return {"intent": intent, "output": output}
+        return None
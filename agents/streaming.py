@@ -0,0 +1,114 @@
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional
+
+# ConversationalChatAgent replies with a JSON blob; the answer is the action_input of "Final Answer"
+_FINAL_ANSWER_START = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+MAX_TOOL_OUTPUT_CHARS = 500  # Tool outputs are truncated in stream events; the full answer comes at the end
+
+
+class FinalAnswerExtractor:
+    """
+    Pulls the final answer out of a ConversationalChatAgent LLM reply as it streams in.
+
+    Chunks are fed in as they arrive; once the reply is recognizably a "Final Answer"
+    action, `feed` returns the newly decoded characters of its action_input string.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos: Optional[int] = None  # Index of the next undecoded answer character
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = _FINAL_ANSWER_START.search(self.text)
+            if match is None:
+                return ""
+            self._pos = match.end()
+
+        decoded = []
+        text, pos = self.text, self._pos
+        while pos < len(text):
+            char = text[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != '\\':
+                decoded.append(char)
+                pos += 1
+                continue
+            # Escape sequence: wait for the rest of it if it was split across chunks
+            if pos + 1 >= len(text):
+                break
+            code = text[pos + 1]
+            if code == 'u':
+                if pos + 6 > len(text):
+                    break
+                try:
+                    decoded.append(chr(int(text[pos + 2:pos + 6], 16)))
+                except ValueError:
+                    decoded.append(text[pos:pos + 6])
+                pos += 6
+            else:
+                decoded.append(_ESCAPES.get(code, code))
+                pos += 2
+        self._pos = pos
+        return "".join(decoded)
+
+
+def _text(value) -> str:
+    """Message or plain value -> string."""
+    return str(getattr(value, "content", value))
+
+
+async def stream_agent_events(agent, inputs: Dict) -> AsyncIterator[Dict]:
+    """
+    Run an AgentExecutor and yield its progress as plain dict events:
+
+        {"event": "tool_start", "tool": ..., "input": ...}
+        {"event": "tool_end", "tool": ..., "output": ...}
+        {"event": "token", "text": ...}      pieces of the final answer as the LLM writes it
+        {"event": "final", "output": ...}    the complete answer
+
+    LLM calls made inside tools (e.g. DBSearchTool's own prompt) are not streamed.
+    """
+    active_tools = set()
+    extractors: Dict[str, FinalAnswerExtractor] = {}
+    final_output = None
+
+    async for event in agent.astream_events(inputs, version="v2"):
+        kind = event["event"]
+        run_id = event.get("run_id")
+        parent_ids: List[str] = event.get("parent_ids", [])
+
+        if kind == "on_tool_start":
+            active_tools.add(run_id)
+            yield {"event": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+        elif kind == "on_tool_end":
+            active_tools.discard(run_id)
+            output = _text(event["data"].get("output"))
+            yield {"event": "tool_end", "tool": event["name"], "output": output[:MAX_TOOL_OUTPUT_CHARS]}
+        elif kind == "on_chat_model_stream" and not active_tools.intersection(parent_ids):
+            extractor = extractors.setdefault(run_id, FinalAnswerExtractor())
+            text = extractor.feed(_text(event["data"]["chunk"]))
+            if text:
+                yield {"event": "token", "text": text}
+        elif kind == "on_chat_model_end":
+            extractors.pop(run_id, None)
+        elif kind == "on_chain_end" and not parent_ids:
+            output = event["data"].get("output")
+            final_output = output.get("output") if isinstance(output, dict) else output
+
+    yield {"event": "final", "output": _text(final_output) if final_output is not None else None}
+
+
+def format_sse(event: Dict) -> str:
+    """One Server-Sent Events message: the event name on its own line, the rest as JSON data."""
+    payload = {k: v for k, v in event.items() if k != "event"}
+    return f"event: {event['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
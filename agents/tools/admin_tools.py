@@ -1,94 +1,121 @@
+import json
 from langchain.agents import Tool
 from service.llm_service import LLMService
-from service.mock_data_service import MockDataService
+from service.query_engine import QueryEngine, QueryError, get_query_engine, parse_queries
+from service.stats_service import get_event_stats
 
-def admin_db_search_tool(query: str) -> str:
-    """
-    Handles admin queries on the event data. It provides a structured LLM-powered response based on mock DB.
-    """
+MAX_QUERIES_PER_QUESTION = 3
+
+def _text(reply) -> str:
+    return getattr(reply, "content", reply)
+
+def _query_planning_prompt(query: str, engine: QueryEngine) -> str:
+    """Step 1 prompt: turn the admin question into structured queries over the schema (not the data)."""
+    return f"""
+        You translate questions about an event safety database into JSON queries.
+
+        A user has asked: "{query}"
+
+        Collections:
+        {engine.schema_description()}
+
+        Reply with JSON only: {{"queries": [<query>, ...]}} using at most {MAX_QUERIES_PER_QUESTION} queries.
+        Each query is:
+        {{"collection": "<name>",
+          "filters": [{{"field": "<field>", "op": "eq|ne|in|contains|gt|gte|lt|lte", "value": <value>}}],
+          "group_by": "<field, optional>",
+          "aggregate": "count" or "list",
+          "fields": ["<fields to show when listing>"],
+          "limit": <max records when listing>}}
+        Timestamps are ISO strings such as "2025-01-31T14:00:00".
+        """
 
-    # Step 1: Get mock data and convert into context string
-    mock_data_service = MockDataService()
-    mock_data = mock_data_service.get_all_data()
-    
-    formatted_data = ""
-    for section, items in mock_data.items():
-        formatted_data += f"\n### {section.upper()} ###\n"
-        if isinstance(items, list):
-            for item in items:
-                formatted_data += f"{item}\n"
-        else:
-            formatted_data += f"{items}\n"
-
-    # Step 2: Prepare the prompt
-    prompt = f"""
+def _answer_prompt(query: str, results) -> str:
+    """Step 2 prompt: summarize the compact query results."""
+    return f"""
         You are an event assistant AI for a safety platform.
 
         A user has asked: "{query}"
 
-        You have access to the following data from the event database:
-        {formatted_data}
+        These are the results of querying the event database for it:
+        {json.dumps(results, default=str)}
 
         Please analyze the data and return a helpful, clear, human-readable answer to the query. Avoid technical language. Be brief but informative.
         """
 
-    # Step 3: Pass to LLM
-    return LLMService().model.invoke(prompt)
+def _run_queries(reply_text: str, engine: QueryEngine):
+    """Execute the planned queries locally; errors are reported to the answering step instead of raised."""
+    try:
+        queries = parse_queries(reply_text)[:MAX_QUERIES_PER_QUESTION]
+    except QueryError as e:
+        return [{"error": f"The question could not be turned into a database query: {e}"}]
+    results = []
+    for query in queries:
+        try:
+            results.append(engine.execute(query))
+        except QueryError as e:
+            results.append({"query": query, "error": str(e)})
+    return results
+
+def admin_db_search_tool(query: str) -> str:
+    """
+    Handles admin queries on the event data. The LLM plans small structured queries against
+    the schema, they run locally on indexed tables, and only their results are summarized,
+    so neither prompt grows with the size of the data.
+    """
+    engine = get_query_engine()
+    llm = LLMService().model
+    plan = llm.invoke(_query_planning_prompt(query, engine))
+    results = _run_queries(_text(plan), engine)
+    return llm.invoke(_answer_prompt(query, results))
+
+async def admin_db_search_tool_async(query: str) -> str:
+    """Async variant of `admin_db_search_tool`; awaits the LLM instead of blocking the event loop."""
+    engine = get_query_engine()
+    llm = LLMService().model
+    plan = await llm.ainvoke(_query_planning_prompt(query, engine))
+    results = _run_queries(_text(plan), engine)
+    return await llm.ainvoke(_answer_prompt(query, results))
 
 def get_admin_tools():
     # Define admin specific tools here, e.g., db_search, report generation
     db_search_tool = Tool(
         name="DBSearchTool",
         func=admin_db_search_tool,
+        coroutine=admin_db_search_tool_async,
         description="Search the database for admin queries."
     )
     report_tool = Tool(
         name="ReportTool",
         func=admin_report_tool,
+        coroutine=admin_report_tool_async,
         description="Generate summary reports based on mock data."
     )
     return [db_search_tool, report_tool]
 
-def admin_report_tool(query: str = "Generate a summary report") -> str:
-    """
-    Generates a smart summary report from the mock database.
-    """
-
-    mock_data_service = MockDataService()
-    mock_data = mock_data_service.get_all_data()
-    
-    users = mock_data.get("users", [])
-    events = mock_data.get("events", [])
-    alerts = mock_data.get("alerts", [])
-    incidents = mock_data.get("incidents", [])
-    lost_and_found = mock_data.get("lost_and_found", [])
-    documents = mock_data.get("documents", [])
-
-    # Basic counts
-    user_count_by_role = {}
-    zone_count = {}
-
-    for user in users:
-        role = user.get("user_role", "unknown")
-        zone = user.get("user_zone", "unknown")
-        user_count_by_role[role] = user_count_by_role.get(role, 0) + 1
-        zone_count[zone] = zone_count.get(zone, 0) + 1
+def _report_prompt() -> str:
+    """Build the ReportTool prompt from the incrementally maintained event statistics."""
+    snapshot = get_event_stats().snapshot()
+    totals = snapshot["totals"]
 
     stats = {
-        "Total Events": len(events),
-        "Total Users": len(users),
-        "Users by Role": user_count_by_role,
-        "Users by Zone": zone_count,
-        "Total Alerts": len(alerts),
-        "Total Incidents": len(incidents),
-        "Total Lost & Found Items": len(lost_and_found),
-        "Total Documents": len(documents)
+        "Total Events": totals.get("events", 0),
+        "Total Users": totals.get("users", 0),
+        "Users by Role": snapshot["users"]["role"],
+        "Users by Zone": snapshot["users"]["zone"],
+        "Total Alerts": totals.get("alerts", 0),
+        "Alerts by Status": snapshot["alerts"]["status"],
+        "Alerts by Zone": snapshot["alerts"]["zone"],
+        "Total Incidents": totals.get("incidents", 0),
+        "Incidents by Type": snapshot["incidents"]["type"],
+        "Total Lost & Found Items": totals.get("lost_and_found", 0),
+        "Total Documents": totals.get("documents", 0)
     }
 
     # Format stats as context
     context = "\n".join([f"{k}: {v}" for k, v in stats.items()])
 
-    prompt = f"""
+    return f"""
     You are an Admin Summary Generator AI.
 
     Based on the following event platform statistics, generate a clean, readable summary for an admin:
@@ -98,4 +125,12 @@ def admin_report_tool(query: str = "Generate a summary report") -> str:
     Make it human-readable, short, and actionable.
     """
 
-    return LLMService().model.invoke(prompt)
+def admin_report_tool(query: str = "Generate a summary report") -> str:
+    """
+    Generates a smart summary report from the mock database.
+    """
+    return LLMService().model.invoke(_report_prompt())
+
+async def admin_report_tool_async(query: str = "Generate a summary report") -> str:
+    """Async variant of `admin_report_tool`."""
+    return await LLMService().model.ainvoke(_report_prompt())
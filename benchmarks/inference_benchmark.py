@@ -0,0 +1,95 @@
+# inference_benchmark.py
+#
+# Micro-benchmark of ensemble inference: the pandas path (every Booster predicting
+# from a categorical DataFrame, as the sklearn wrapper does) against EnsemblePredictor
+# on contiguous NumPy matrices.
+#
+#   python benchmarks/inference_benchmark.py [--repeats 200]
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'prediction_model'))
+from feature_pipeline import static_feature_columns, time_features
+from artifacts import load_artifacts
+from inference import EnsemblePredictor
+
+MODEL_ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), '..', 'prediction_model', 'crowd_model')
+BATCH_SIZES = [1, 20, 1000]
+
+def make_feature_frame(zone_features, zone_categories, n_rows, rng):
+    """Realistic feature rows: random zones, times and densities within each zone's observed range."""
+    zones = rng.choice(zone_features['zone_name'].to_numpy(), size=n_rows)
+    columns = static_feature_columns(zone_features, zones, zone_categories)
+    timestamps = pd.Timestamp('2025-01-01 10:00:00') + pd.to_timedelta(rng.integers(0, 4 * 3600, size=n_rows), unit='s')
+    columns.update(time_features(timestamps))
+
+    stats = zone_features.set_index('zone_name').loc[zones]
+    low, high = stats['zone_min_density'].to_numpy(), stats['zone_max_density'].to_numpy()
+    recent = low[:, None] + rng.random((n_rows, 3)) * (high - low)[:, None]
+    columns['density_lag_10s'] = recent[:, 2]
+    columns['density_lag_20s'] = recent[:, 1]
+    columns['density_roll_mean_30s'] = recent.mean(axis=1)
+    columns['density_roll_std_30s'] = recent.std(axis=1, ddof=1)
+
+    df = pd.DataFrame(columns)
+    for col in ['is_corner', 'is_edge', 'is_center']:
+        df[col] = df[col].astype(bool)
+    df['zone_name'] = pd.Categorical(zones, categories=zone_categories)
+    return df
+
+def time_call(fn, repeats):
+    """Median wall time of `fn()` in seconds."""
+    fn()  # Warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pandas-input and NumPy-matrix ensemble inference.")
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(MODEL_ARTIFACT_DIR)
+    boosters = artifacts.boosters
+    num_iterations = [member['num_iteration'] for member in artifacts.manifest['members']]
+    zone_features = artifacts.zone_features
+    zone_categories = artifacts.zone_categories
+
+    def predict_pandas(X):
+        predictions = np.array([booster.predict(X, num_iteration=n) for booster, n in zip(boosters, num_iterations)])
+        return predictions.mean(axis=0), predictions.std(axis=0)
+
+    predictors = {
+        'numpy_float64': EnsemblePredictor(boosters, num_iterations, zone_categories, dtype=np.float64),
+        'numpy_float32': EnsemblePredictor(boosters, num_iterations, zone_categories, dtype=np.float32),
+    }
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>6} {'path':<16} {'median (ms)':>12} {'rows/sec':>12} {'speedup':>8} {'max |diff|':>11}")
+    for n_rows in BATCH_SIZES:
+        df = make_feature_frame(zone_features, zone_categories, n_rows, rng)
+        X = df[artifacts.feature_names]
+        expected, _ = predict_pandas(X)
+
+        baseline = time_call(lambda: predict_pandas(X), args.repeats)
+        print(f"{n_rows:>6} {'pandas':<16} {baseline * 1e3:>12.3f} {n_rows / baseline:>12.0f} {1.0:>8.1f} {0.0:>11.2e}")
+
+        for name, predictor in predictors.items():
+            matrix = predictor.empty_matrix(n_rows)
+            for j, col in enumerate(predictor.feature_names):
+                matrix[:, j] = df[col].cat.codes if col == 'zone_name' else df[col]
+            mean_pred, _ = predictor.predict(matrix)
+            elapsed = time_call(lambda: predictor.predict(matrix), args.repeats)
+            max_diff = np.abs(mean_pred - expected).max()
+            print(f"{n_rows:>6} {name:<16} {elapsed * 1e3:>12.3f} {n_rows / elapsed:>12.0f} {baseline / elapsed:>8.1f} {max_diff:>11.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# pipeline_benchmark.py
+#
+# End-to-end benchmark of the crowd prediction pipeline at a configurable scale:
+#   simulate_snapshots -> convert_timeseries_to_csv -> create_features_and_train_model
+#   -> predict_density_at_horizon_improved
+# Every stage records wall time, peak RSS and throughput; the forecast stage also
+# records MAE per horizon against the simulated densities. Results are written as
+# JSON so runs can be compared.
+#
+#   python benchmarks/pipeline_benchmark.py --users 5000 --grid 8 10 --duration 60 --output run.json
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'prediction_model'))
+import time_series_data_
+from model_training import create_features_and_train_model
+from forecasting import TREND_WINDOW, predict_density_at_horizon_improved
+from feature_pipeline import FORECAST_STEP_SECONDS
+from inference import EnsemblePredictor
+
+# --- Configuration ---
+DEFAULT_HORIZONS = [30, 60, 150, 300]  # Seconds; must be multiples of the snapshot interval (that is where ground truth is)
+TEST_FRACTION = 0.2  # Forecast origins come from the last part of the recording, like the training test split
+RSS_SAMPLE_SECONDS = 0.01
+
+def _current_rss_bytes():
+    """Resident set size of this process (Linux /proc; None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _max_rss_bytes():
+    """Process-lifetime peak RSS, the fallback when RSS cannot be sampled."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageMeter:
+    """Times a block and samples its peak RSS from a background thread."""
+
+    def __init__(self):
+        self.wall_time = None
+        self.peak_rss = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            rss = _current_rss_bytes()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def __enter__(self):
+        self.peak_rss = _current_rss_bytes()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_time = time.perf_counter() - self._start
+        self._stop.set()
+        self._sampler.join()
+        rss = _current_rss_bytes()
+        self.peak_rss = max(self.peak_rss, rss) if self.peak_rss is not None and rss is not None else _max_rss_bytes()
+        return False
+
+def stage_result(meter, rows, unit='rows'):
+    return {
+        'wall_time_s': round(meter.wall_time, 4),
+        'peak_rss_mb': round(meter.peak_rss / 2**20, 1) if meter.peak_rss is not None else None,
+        unit: rows,
+        f'{unit}_per_sec': round(rows / meter.wall_time, 1) if meter.wall_time > 0 else None,
+    }
+
+@contextlib.contextmanager
+def _quiet(verbose):
+    """Silence the pipeline's progress prints unless --verbose."""
+    if verbose:
+        yield
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+
+def configure_generator(args, csv_path):
+    time_series_data_.NUM_USERS = args.users
+    time_series_data_.GRID_ROWS, time_series_data_.GRID_COLS = args.grid
+    time_series_data_.BASE_ZONE_CAPACITY = args.zone_capacity
+    time_series_data_.SIMULATION_DURATION_MINUTES = args.duration
+    time_series_data_.SNAPSHOT_INTERVAL_SECONDS = args.interval
+    time_series_data_.OUTPUT_CSV_FILE = csv_path
+    time_series_data_.SIMULATION_ENGINE = args.engine
+    time_series_data_.SIMULATION_SEED = args.seed
+
+def forecast_accuracy(predictor, history, zone_features, zone_categories, horizons, max_origins, interval=FORECAST_STEP_SECONDS):
+    """
+    Forecast every zone from held-out origins; returns per-horizon MAE and the forecast count.
+
+    The model steps one training row, i.e. one snapshot `interval`, at a time while the
+    forecaster counts FORECAST_STEP_SECONDS per step, so each horizon is converted to
+    snapshot offsets before forecasting; the ground truth is read `horizon` seconds ahead.
+    """
+    timestamps = np.sort(history['timestamp'].unique())
+    first_origin = max(int(len(timestamps) * (1 - TEST_FRACTION)), TREND_WINDOW - 1)
+    actual = history.set_index(['timestamp', 'zone_name'])['density']
+    zones = list(zone_features['zone_name'])
+
+    accuracy, n_forecasts = {}, 0
+    for horizon in horizons:
+        origins = [ts for ts in timestamps[first_origin:] if ts + np.timedelta64(horizon, 's') <= timestamps[-1]]
+        origins = origins[-max_origins:]
+        errors = []
+        model_horizon = (horizon // interval) * FORECAST_STEP_SECONDS
+        for origin in origins:
+            target_time = origin + np.timedelta64(horizon, 's')
+            for zone in zones:
+                result = predict_density_at_horizon_improved(
+                    predictor, zone, origin, history, model_horizon, zone_features, zone_categories
+                )
+                n_forecasts += 1
+                if (target_time, zone) in actual.index:
+                    errors.append(abs(result['prediction'] - actual[(target_time, zone)]))
+        accuracy[str(horizon)] = {
+            'mae': round(float(np.mean(errors)), 4) if errors else None,
+            'n': len(errors),
+            'origins': len(origins),
+        }
+    return accuracy, n_forecasts
+
+def run(args):
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    results = {
+        'config': {
+            'users': args.users, 'grid': list(args.grid), 'zone_capacity': args.zone_capacity,
+            'duration_minutes': args.duration, 'interval_seconds': args.interval,
+            'horizons': args.horizons, 'max_origins': args.max_origins, 'seed': args.seed, 'engine': args.engine,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'stages': {},
+    }
+    stages = results['stages']
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'full_training_data.csv')
+        configure_generator(args, csv_path)
+        base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+
+        with StageMeter() as meter:
+            # Zone counts only, as the pipeline does when no snapshot file is written
+            ticks = list(time_series_data_.iter_zone_counts(initial_users, zones))
+        stages['simulate'] = stage_result(meter, len(ticks) * len(initial_users))
+
+        with StageMeter() as meter:
+            time_series_data_.convert_timeseries_to_csv({**base_event_data, 'snapshots': ticks})
+        csv_rows = len(ticks) * len(zones)
+        stages['convert'] = stage_result(meter, csv_rows)
+        del ticks
+
+        with StageMeter() as meter, _quiet(args.verbose):
+            models, full_feature_df, zone_features, zone_categories = create_features_and_train_model(csv_path)
+        stages['train'] = stage_result(meter, csv_rows)
+
+    history = full_feature_df[['timestamp', 'zone_name', 'density']].copy()
+    history['zone_name'] = history['zone_name'].astype(str)
+    predictor = EnsemblePredictor.from_models(models, zone_categories)
+
+    with StageMeter() as meter:
+        accuracy, n_forecasts = forecast_accuracy(
+            predictor, history, zone_features, zone_categories, args.horizons, args.max_origins, args.interval
+        )
+    stages['forecast'] = stage_result(meter, n_forecasts, unit='forecasts')
+    results['accuracy'] = accuracy
+    return results
+
+def print_summary(results):
+    print(f"{'stage':<10} {'wall (s)':>10} {'peak RSS (MB)':>14} {'throughput':>22}")
+    for name, stage in results['stages'].items():
+        unit = 'forecasts' if 'forecasts' in stage else 'rows'
+        print(f"{name:<10} {stage['wall_time_s']:>10.3f} {stage['peak_rss_mb'] or float('nan'):>14.1f} "
+              f"{stage[f'{unit}_per_sec'] or 0:>14.0f} {unit}/s")
+    print(f"\n{'horizon (s)':>11} {'MAE':>8} {'n':>8}")
+    for horizon, score in results['accuracy'].items():
+        mae = f"{score['mae']:.4f}" if score['mae'] is not None else 'n/a'
+        print(f"{horizon:>11} {mae:>8} {score['n']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulation, CSV conversion, training and forecasting.")
+    parser.add_argument('--users', type=int, default=time_series_data_.NUM_USERS)
+    parser.add_argument('--grid', type=int, nargs=2, metavar=('ROWS', 'COLS'),
+                        default=[time_series_data_.GRID_ROWS, time_series_data_.GRID_COLS])
+    parser.add_argument('--zone-capacity', type=int, default=time_series_data_.BASE_ZONE_CAPACITY,
+                        help="Base zone capacity; scale it with --users to keep the venue from saturating")
+    parser.add_argument('--duration', type=int, default=time_series_data_.SIMULATION_DURATION_MINUTES, help="Minutes simulated")
+    parser.add_argument('--interval', type=int, default=FORECAST_STEP_SECONDS,
+                        help="Seconds between snapshots (default: the forecaster's step, as the model is trained on)")
+    parser.add_argument('--engine', choices=['python', 'vectorized'], default=time_series_data_.SIMULATION_ENGINE,
+                        help="Simulation engine; 'vectorized' is the array-backed one for large --users")
+    parser.add_argument('--horizons', type=int, nargs='+', default=DEFAULT_HORIZONS, help="Forecast horizons in seconds")
+    parser.add_argument('--max-origins', type=int, default=20, help="Forecast origins per horizon (latest held-out timestamps)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='pipeline_benchmark.json')
+    parser.add_argument('--verbose', action='store_true', help="Show the training script's progress output")
+    args = parser.parse_args()
+
+    if not 1 <= args.grid[1] <= 26:
+        parser.error("--grid COLS must be between 1 and 26 (zones are named A-Z)")
+    if any(horizon % args.interval for horizon in args.horizons):
+        parser.error("--horizons must be multiples of --interval")
+
+    results = run(args)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to '{args.output}'")
+
+if __name__ == "__main__":
+    main()
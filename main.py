@@ -1,22 +1,52 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from agents.agent_executor import AgentExecutorBuilder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from agents.agent_executor import AgentExecutorPool
+from agents.intent_router import IntentRouter
+from agents.streaming import format_sse
+from service.forecast_service import ForecastService
+from service.response_cache import ResponseCache
+from service.stats_service import get_event_stats
 from utils.logger import setup_logger
 
 app = FastAPI(title="CrowdGuard AI", description="AI-powered crowd management system")
 
 logger = setup_logger("crowdguard", "logs/crowdguard.log")
 
+# Loaded once at startup; keeps the recent density readings of every zone in memory
+forecast_service = ForecastService()
+
+# One AgentExecutor per role, built on first use and shared by all requests
+agent_pool = AgentExecutorPool()
+
+# Deterministic admin questions answered straight from the data, without the agent
+intent_router = IntentRouter()
+
+# Answers to repeated questions, dropped when the event data changes
+response_cache = ResponseCache()
+
 @app.get("/")
 async def root():
     """Root endpoint to check if server is running"""
-    return {"message": "CrowdGuard AI Server is running!", "endpoints": ["/generate"]}
+    return {"message": "CrowdGuard AI Server is running!", "endpoints": ["/generate", "/generate/stream", "/forecast", "/forecast/observations", "/stats"]}
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": "2024-01-01T12:00:00Z"}
 
+@app.get("/stats")
+async def event_stats():
+    """Dashboard counters: record totals, users by role and zone, incidents by type, alerts by status and zone"""
+    try:
+        return get_event_stats().snapshot()
+    except Exception as e:
+        logger.error(f"Exception in /stats endpoint: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Internal server error: {str(e)}"}
+        )
+
 @app.post("/generate")
 async def generate_content(request: Request):
     try:
@@ -32,11 +62,25 @@ async def generate_content(request: Request):
         if not query:
             return JSONResponse(status_code=400, content={"error": "Missing query"})
 
-        agent = AgentExecutorBuilder(user_type).create()
-        logger.info("AgentExecutor created, running query...")
-        # Pass empty chat history for ConversationalChatAgent
-        response = agent.run({"input": query, "chat_history": []})
+        routed = intent_router.route(user_type, query)
+        if routed is not None:
+            return routed["output"]
+
+        role = agent_pool.role_key(user_type)
+        version = response_cache.data_version()  # Read before the agent sees the data
+        response = response_cache.get(role, query)
+        if response is not None:
+            logger.info("Answered from the response cache")
+            return response
+
+        try:
+            # Pass empty chat history for ConversationalChatAgent
+            response = await agent_pool.arun(user_type, query, chat_history=[])
+        except TimeoutError:
+            logger.error(f"Agent timed out for user_type: {user_type}")
+            return JSONResponse(status_code=504, content={"error": "The assistant took too long to respond, please try again"})
         logger.info(f"Agent response: {response}")
+        response_cache.put(role, query, response, version)
 
         return response
 
@@ -46,3 +90,106 @@ async def generate_content(request: Request):
             status_code=500,
             content={"error": f"Internal server error: {str(e)}"}
         )
+
+@app.post("/generate/stream")
+async def generate_content_stream(request: Request):
+    """Same as /generate, streamed as Server-Sent Events: tool_start/tool_end, token, then final (or error)"""
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON body"})
+    user_type = data.get("user_type")
+    query = data.get("query")
+
+    logger.info(f"Received streaming request with user_type: {user_type}, query: {query}")
+
+    if not user_type:
+        return JSONResponse(status_code=400, content={"error": "Missing user_type"})
+    if not query:
+        return JSONResponse(status_code=400, content={"error": "Missing query"})
+
+    role = agent_pool.role_key(user_type)
+
+    async def event_stream():
+        routed = intent_router.route(user_type, query)
+        if routed is not None:
+            yield format_sse({"event": "final", "output": routed["output"], "intent": routed["intent"]})
+            return
+        version = response_cache.data_version()  # Read before the agent sees the data
+        cached = response_cache.get(role, query)
+        if cached is not None:
+            yield format_sse({"event": "final", "output": cached, "cached": True})
+            return
+        try:
+            async for event in agent_pool.astream(user_type, query, chat_history=[]):
+                if event["event"] == "final" and event["output"] is not None:
+                    response_cache.put(role, query, event["output"], version)
+                yield format_sse(event)
+        except TimeoutError:
+            logger.error(f"Streaming agent timed out for user_type: {user_type}")
+            yield format_sse({"event": "error", "error": "The assistant took too long to respond, please try again"})
+        except Exception as e:
+            logger.error(f"Exception in /generate/stream endpoint: {e}")
+            yield format_sse({"event": "error", "error": f"Internal server error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/forecast/observations")
+async def add_observations(request: Request):
+    """Stream crowd count readings into the forecaster"""
+    try:
+        data = await request.json()
+        observations = data.get("observations")
+
+        if not observations:
+            return JSONResponse(status_code=400, content={"error": "Missing observations"})
+
+        records = [(obs["timestamp"], obs["zone"], obs["crowd_count"]) for obs in observations]
+        stored = forecast_service.update_many(records)
+        return {"stored": stored}
+
+    except (KeyError, TypeError, ValueError) as e:
+        return JSONResponse(status_code=400, content={"error": f"Invalid observation: {str(e)}"})
+    except Exception as e:
+        logger.error(f"Exception in /forecast/observations endpoint: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Internal server error: {str(e)}"}
+        )
+
+@app.post("/forecast")
+async def forecast_density(request: Request):
+    """Forecast crowd density per zone from the readings received so far"""
+    try:
+        data = await request.json()
+        horizon = data.get("horizon_seconds")
+        zones = data.get("zones")
+        mode = data.get("mode")
+
+        if horizon is None:
+            return JSONResponse(status_code=400, content={"error": "Missing horizon_seconds"})
+
+        try:
+            results = await run_in_threadpool(forecast_service.forecast, int(horizon), zones, mode)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+        return {
+            zone: {
+                "prediction": float(result["prediction"]),
+                "confidence_interval": [float(bound) for bound in result["confidence_interval"]],
+                "trend": result["trend"]
+            } if result["prediction"] is not None else result
+            for zone, result in results.items()
+        }
+
+    except Exception as e:
+        logger.error(f"Exception in /forecast endpoint: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Internal server error: {str(e)}"}
+        )
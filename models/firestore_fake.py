@@ -0,0 +1,446 @@
+"""
+In-memory stand-in for the Firestore clients, for exercising FirestoreService without a
+project or the emulator:
+
+    db = InMemoryFirestore()
+    service = FirestoreService(db=db, async_db=db.async_client())
+
+Covers the parts of the API the service uses: collection and document references,
+add/set/update/delete, where (FieldFilter or positional), select, order_by, limit,
+start_after, stream/get on both the sync and the async client, write batches, and
+collection on_snapshot listeners. Data is deep-copied in and out, like a round trip
+through the server.
+
+Like the server, queries with inequality filters are also ordered by the filtered fields,
+and a snapshot used as a cursor must hold a value for every field the query orders by.
+
+Every write, including ones made directly on this client to play another writer, is
+delivered to the listeners of its collection as a DocumentChange.
+
+Errors can be injected into batch commits with `fail_next_commits` (e.g. Aborted, which
+the real server raises on contention).
+"""
+import copy
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from google.api_core.exceptions import Aborted, NotFound
+except ImportError:  # google-api-core comes with firebase-admin
+    class NotFound(Exception):
+        """Raised by DocumentReference.update on a document that does not exist."""
+
+    class Aborted(Exception):
+        """Raised by the server when a transaction or batch loses to contention."""
+
+DESCENDING = "DESCENDING"
+ASCENDING = "ASCENDING"
+INEQUALITY_OPERATORS = ("<", "<=", ">", ">=", "!=", "not-in")
+MAX_BATCH_WRITES = 500
+
+_MISSING = object()
+
+
+def _get_path(data: Dict[str, Any], field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_path(target: Dict[str, Any], field_path: str, value) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _matches(value, op: str, expected) -> bool:
+    if value is _MISSING:
+        return False
+    try:
+        if op == "==":
+            return value == expected
+        if op == "!=":
+            return value != expected
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        if op == ">=":
+            return value >= expected
+        if op == "in":
+            return value in expected
+        if op == "not-in":
+            return value not in expected
+        if op == "array-contains":
+            return isinstance(value, list) and expected in value
+        if op == "array-contains-any":
+            return isinstance(value, list) and any(item in value for item in expected)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator '{op}'")
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class DocumentChange:
+    def __init__(self, type: ChangeType, document: "DocumentSnapshot") -> None:
+        self.type = type
+        self.document = document
+
+
+class Watch:
+    """Handle returned by on_snapshot."""
+
+    def __init__(self, client: "InMemoryFirestore", collection: str, callback) -> None:
+        self._client = client
+        self._collection = collection
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        listeners = self._client._listeners.get(self._collection, [])
+        if self._callback in listeners:
+            listeners.remove(self._callback)
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]]) -> None:
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str):
+        value = _get_path(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class DocumentReference:
+    def __init__(self, client: "InMemoryFirestore", collection: str, doc_id: str) -> None:
+        self._client = client
+        self.collection_name = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_name}/{self.id}"
+
+    def _documents(self) -> Dict[str, Dict[str, Any]]:
+        return self._client._collections.setdefault(self.collection_name, {})
+
+    def get(self) -> DocumentSnapshot:
+        return DocumentSnapshot(self, copy.deepcopy(self._documents().get(self.id)))
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        documents = self._documents()
+        existed = self.id in documents
+        new = copy.deepcopy(data)
+        if merge and existed:
+            new = {**documents[self.id], **new}
+        documents[self.id] = new
+        self._client._emit(self, ChangeType.MODIFIED if existed else ChangeType.ADDED, new)
+
+    def update(self, data: Dict[str, Any]) -> None:
+        documents = self._documents()
+        if self.id not in documents:
+            raise NotFound(f"No document to update: {self.path}")
+        new = copy.deepcopy(documents[self.id])
+        for field_path, value in data.items():
+            _set_path(new, field_path, copy.deepcopy(value))
+        documents[self.id] = new
+        self._client._emit(self, ChangeType.MODIFIED, new)
+
+    def delete(self) -> None:
+        old = self._documents().pop(self.id, None)
+        if old is not None:
+            self._client._emit(self, ChangeType.REMOVED, old)
+
+
+class Query:
+    def __init__(self, client: "InMemoryFirestore", collection: str, filters=(), projection=None,
+                 orders=(), limit: Optional[int] = None, cursor=None) -> None:
+        self._client = client
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._projection = projection
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> "Query":
+        state = {
+            "filters": self._filters, "projection": self._projection, "orders": self._orders,
+            "limit": self._limit, "cursor": self._cursor,
+        }
+        state.update(changes)
+        return Query(self._client, self._collection, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value=None, *, filter=None) -> "Query":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def select(self, field_paths) -> "Query":
+        return self._copy(projection=list(field_paths))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot) -> "Query":
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def _effective_orders(self):
+        """The order_by fields, then (like the server) every inequality-filtered field not among them."""
+        ordered = [field for field, _ in self._orders]
+        implicit = [field for field, op, _ in self._filters if op in INEQUALITY_OPERATORS and field not in ordered]
+        return self._orders + tuple((field, ASCENDING) for field in dict.fromkeys(implicit))
+
+    def _sort_key(self, doc_id: str, data: Dict[str, Any]):
+        return tuple(_get_path(data, field) for field, _ in self._effective_orders()) + (doc_id,)
+
+    def _after_cursor(self, doc_id: str, data: Dict[str, Any]) -> bool:
+        orders = self._effective_orders()
+        if isinstance(self._cursor, DocumentSnapshot):
+            cursor_id, cursor_data = self._cursor.id, self._cursor._data or {}
+            cursor_key = tuple(_get_path(cursor_data, field) for field, _ in orders) + (cursor_id,)
+            if _MISSING in cursor_key:
+                # As the real client: a cursor snapshot (e.g. a projected one) must hold every order field
+                raise ValueError(f"Cursor document {cursor_id} has no value for an order field of {[field for field, _ in orders]}")
+        else:  # Field values of the order_by fields
+            cursor_key = tuple(self._cursor[field] for field, _ in orders)
+        key = self._sort_key(doc_id, data)[:len(cursor_key)]
+        for (value, cursor_value), (_, direction) in zip(zip(key, cursor_key), orders + (("__name__", ASCENDING),)):
+            if value != cursor_value:
+                return value > cursor_value if direction == ASCENDING else value < cursor_value
+        return False
+
+    def _results(self) -> List[DocumentSnapshot]:
+        documents = self._client._collections.get(self._collection, {})
+        rows = [
+            (doc_id, data) for doc_id, data in documents.items()
+            if all(_matches(_get_path(data, field), op, value) for field, op, value in self._filters)
+            and all(_get_path(data, field) is not _MISSING for field, _ in self._orders)
+        ]
+        rows.sort(key=lambda row: row[0])
+        for field, direction in reversed(self._effective_orders()):
+            rows.sort(key=lambda row: _get_path(row[1], field), reverse=direction == DESCENDING)
+        if self._cursor is not None:
+            rows = [row for row in rows if self._after_cursor(*row)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        snapshots = []
+        for doc_id, data in rows:
+            if self._projection is not None:
+                projected: Dict[str, Any] = {}
+                for field in self._projection:
+                    value = _get_path(data, field)
+                    if value is not _MISSING:
+                        _set_path(projected, field, value)
+                data = projected
+            snapshots.append(DocumentSnapshot(DocumentReference(self._client, self._collection, doc_id), copy.deepcopy(data)))
+        self._client.reads += len(snapshots)
+        return snapshots
+
+    def stream(self) -> Iterator[DocumentSnapshot]:
+        self._client.queries += 1
+        return iter(self._results())
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "InMemoryFirestore", collection: str) -> None:
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict[str, Any]):
+        reference = self.document()
+        reference.set(data)
+        return None, reference
+
+    def on_snapshot(self, callback) -> Watch:
+        """
+        Call `callback(documents, changes, read_time)` now with the whole collection (every
+        document ADDED), then on every write to it with just that change. Unlike the real
+        client, later calls pass an empty document list and run synchronously in the
+        writing thread.
+        """
+        self._client._listeners.setdefault(self._collection, []).append(callback)
+        documents = self.get()
+        callback(documents, [DocumentChange(ChangeType.ADDED, document) for document in documents], datetime.now())
+        return Watch(self._client, self._collection, callback)
+
+
+class WriteBatch:
+    """Writes applied together on commit; if any of them fails, none is applied."""
+
+    def __init__(self, client: "InMemoryFirestore") -> None:
+        self._client = client
+        self._writes: List = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def _add(self, kind: str, reference: DocumentReference, data=None, merge: bool = False) -> "WriteBatch":
+        if len(self._writes) >= MAX_BATCH_WRITES:
+            raise ValueError(f"A batch holds at most {MAX_BATCH_WRITES} writes")
+        self._writes.append((kind, reference, copy.deepcopy(data), merge))
+        return self
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False) -> "WriteBatch":
+        return self._add("set", reference, document_data, merge)
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any]) -> "WriteBatch":
+        return self._add("update", reference, field_updates)
+
+    def delete(self, reference: DocumentReference) -> "WriteBatch":
+        return self._add("delete", reference)
+
+    def commit(self) -> List[None]:
+        self._client.commits += 1
+        if self._client._commit_errors:
+            error = self._client._commit_errors.pop(0)
+            if error is not None:
+                raise error
+        for kind, reference, _, _ in self._writes:
+            if kind == "update" and reference.id not in reference._documents():
+                raise NotFound(f"No document to update: {reference.path}")
+        for kind, reference, data, merge in self._writes:
+            if kind == "set":
+                reference.set(data, merge=merge)
+            elif kind == "update":
+                reference.update(data)
+            else:
+                reference.delete()
+        return [None] * len(self._writes)
+
+
+class InMemoryFirestore:
+    """
+    Sync client. `queries` and `reads` count the queries run and documents returned,
+    `commits` the batch commits attempted.
+    """
+
+    def __init__(self) -> None:
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._commit_errors: List[Optional[Exception]] = []
+        self._listeners: Dict[str, List] = {}
+        self.queries = 0
+        self.reads = 0
+        self.commits = 0
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def _emit(self, reference: DocumentReference, change_type: ChangeType, data: Dict[str, Any]) -> None:
+        listeners = self._listeners.get(reference.collection_name)
+        if not listeners:
+            return
+        change = DocumentChange(change_type, DocumentSnapshot(reference, copy.deepcopy(data)))
+        for callback in list(listeners):
+            callback([], [change], datetime.now())
+
+    def fail_next_commits(self, *errors: Optional[Exception]) -> None:
+        """Raise these errors from the next batch commits, in order (None lets a commit through)."""
+        self._commit_errors.extend(errors)
+
+    def async_client(self) -> "AsyncInMemoryFirestore":
+        """An async client over the same data."""
+        return AsyncInMemoryFirestore(self)
+
+
+# --- Async client ---
+# Thin wrappers that run the sync implementation and expose the AsyncClient call shapes:
+# `await ref.get()`, `async for doc in query.stream()`, `await query.get()`.
+
+class AsyncDocumentReference:
+    def __init__(self, reference: DocumentReference) -> None:
+        self._reference = reference
+        self.id = reference.id
+
+    async def get(self) -> DocumentSnapshot:
+        return self._reference.get()
+
+    async def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        self._reference.set(data, merge=merge)
+
+    async def update(self, data: Dict[str, Any]) -> None:
+        self._reference.update(data)
+
+    async def delete(self) -> None:
+        self._reference.delete()
+
+
+class AsyncQuery:
+    def __init__(self, query: Query) -> None:
+        self._query = query
+
+    def where(self, *args, **kwargs) -> "AsyncQuery":
+        return AsyncQuery(self._query.where(*args, **kwargs))
+
+    def select(self, field_paths) -> "AsyncQuery":
+        return AsyncQuery(self._query.select(field_paths))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "AsyncQuery":
+        return AsyncQuery(self._query.order_by(field_path, direction))
+
+    def limit(self, count: int) -> "AsyncQuery":
+        return AsyncQuery(self._query.limit(count))
+
+    def start_after(self, document_fields_or_snapshot) -> "AsyncQuery":
+        return AsyncQuery(self._query.start_after(document_fields_or_snapshot))
+
+    async def stream(self):
+        for snapshot in self._query.stream():
+            yield snapshot
+
+    async def get(self) -> List[DocumentSnapshot]:
+        return self._query.get()
+
+
+class AsyncCollectionReference(AsyncQuery):
+    def __init__(self, collection: CollectionReference) -> None:
+        super().__init__(collection)
+        self.id = collection.id
+
+    def document(self, doc_id: Optional[str] = None) -> AsyncDocumentReference:
+        return AsyncDocumentReference(self._query.document(doc_id))
+
+    async def add(self, data: Dict[str, Any]):
+        _, reference = self._query.add(data)
+        return None, AsyncDocumentReference(reference)
+
+
+class AsyncInMemoryFirestore:
+    def __init__(self, sync_client: InMemoryFirestore) -> None:
+        self.sync_client = sync_client
+
+    def collection(self, name: str) -> AsyncCollectionReference:
+        return AsyncCollectionReference(self.sync_client.collection(name))
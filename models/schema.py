@@ -1,7 +1,11 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core import exceptions as api_exceptions
 import os
-from typing import Dict, List, Optional, Any
+import time
+import random
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Any, Sequence, Tuple, Union
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
@@ -13,6 +17,24 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 500  # Documents fetched per round trip when reading a collection
+
+# A read filter: (field path, operator, value), e.g. ("status", "==", "open")
+WhereClause = Tuple[str, str, Any]
+# Filters on these operators make Firestore order results by their field as well
+INEQUALITY_OPERATORS = ("<", "<=", ">", ">=", "!=", "not-in")
+
+MAX_BATCH_WRITES = 500  # Firestore limit on writes in one batch
+BULK_WRITE_ATTEMPTS = 5  # Commits per batch before its writes are reported as failed
+BULK_RETRY_BASE_SECONDS = 0.25  # Backoff before retry n is about base * 2**n, with jitter
+# Errors a batch commit is retried on: contention, timeouts and overload
+RETRYABLE_WRITE_ERRORS = (
+    api_exceptions.Aborted,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.ResourceExhausted,
+)
+
 class FirebaseConnection:
     """Firebase Firestore connection manager"""
     
@@ -62,6 +84,11 @@ class FirebaseConnection:
             raise Exception("Firestore client not initialized")
         return self.db.collection(collection_name)
 
+    def get_async_client(self):
+        """Async Firestore client on the same Firebase app"""
+        from firebase_admin import firestore_async
+        return firestore_async.client()
+
 class BaseModel:
     """Base model for Firestore documents"""
     
@@ -157,20 +184,180 @@ class Document(BaseModel):
 
 class FirestoreService:
     """Service class for Firestore operations"""
+
+    # Bumped on every successful write made through this service, and on changes reported
+    # by the listeners of a CachedFirestoreService (see data_version)
+    _write_version = 0
     
-    def __init__(self):
-        self.connection = FirebaseConnection()
-        self.db = self.connection.db
+    def __init__(self, db=None, async_db=None):
+        """
+        Args:
+            db: Firestore client to use instead of connecting with the service account
+                (e.g. models.firestore_fake.InMemoryFirestore)
+            async_db: Async client for the `aiter_documents`/`fetch_collections` reads;
+                created on first use when not given
+        """
+        self.connection = FirebaseConnection() if db is None else None
+        self.db = db if db is not None else self.connection.db
+        self._async_db = async_db
+
+    @property
+    def async_db(self):
+        if self._async_db is None:
+            if self.connection is None:
+                raise Exception("No async Firestore client given for this FirestoreService")
+            self._async_db = self.connection.get_async_client()
+        return self._async_db
     
-    def get_all_documents(self, collection_name: str) -> List[Dict[str, Any]]:
-        """Get all documents from a collection"""
+    @classmethod
+    def data_version(cls) -> int:
+        """
+        Counter that changes whenever a document is added, updated or deleted through
+        FirestoreService in this process. Writes made by other processes or clients are
+        only counted for collections watched by a CachedFirestoreService (see
+        `record_external_change`); changes to any other collection go unnoticed.
+        """
+        return cls._write_version
+
+    @classmethod
+    def _mark_changed(cls):
+        cls._write_version += 1
+
+    @classmethod
+    def record_external_change(cls):
+        """Count a change Firestore reported through a listener, e.g. one made by another writer"""
+        cls._mark_changed()
+
+    def get_all_documents(self, collection_name: str, where: Optional[Iterable[WhereClause]] = None,
+                          select: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get all documents from a collection (optionally filtered, projected and capped)"""
         try:
-            collection_ref = self.db.collection(collection_name)
-            docs = collection_ref.stream()
-            return [doc.to_dict() for doc in docs]
+            return list(self.iter_documents(collection_name, where=where, select=select, limit=limit))
         except Exception as e:
             logger.error(f"Error fetching documents from {collection_name}: {str(e)}")
             return []
+
+    @staticmethod
+    def _build_query(collection_ref, where, select, order_by):
+        """Apply filters, ordering and projection; returns the query and the fields to keep in results"""
+        query = collection_ref
+        where = list(where or [])
+        for field, op, value in where:
+            query = query.where(filter=firestore.FieldFilter(field, op, value))
+
+        orders = [order_by] if isinstance(order_by, str) else list(order_by or [])
+        for order in orders:  # "field" ascending, "-field" descending
+            if order.startswith("-"):
+                query = query.order_by(order[1:], direction=firestore.Query.DESCENDING)
+            else:
+                query = query.order_by(order)
+
+        keep = None
+        if select:
+            keep = {field.split(".")[0] for field in select}
+            # Page cursors need the ordering fields, so they are fetched even if not selected.
+            # Those include inequality-filtered fields, which Firestore orders by implicitly.
+            cursor_fields = [order.lstrip("-") for order in orders]
+            cursor_fields += [field for field, op, _ in where if op in INEQUALITY_OPERATORS]
+            query = query.select(list(select) + [field for field in dict.fromkeys(cursor_fields) if field not in select])
+        return query, keep
+
+    @staticmethod
+    def _to_record(doc, keep, id_field) -> Dict[str, Any]:
+        data = doc.to_dict() or {}
+        if keep is not None:
+            data = {key: value for key, value in data.items() if key in keep}
+        if id_field:
+            data[id_field] = doc.id
+        return data
+
+    def iter_documents(self, collection_name: str, where: Optional[Iterable[WhereClause]] = None,
+                       select: Optional[Sequence[str]] = None, order_by: Union[str, Sequence[str], None] = None,
+                       limit: Optional[int] = None, start_after: Union[str, Dict[str, Any], Any, None] = None,
+                       page_size: int = DEFAULT_PAGE_SIZE, id_field: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the documents of a collection page by page, so the whole collection is never held in memory.
+
+        Args:
+            where: Filters as (field, operator, value) tuples, e.g. [("status", "==", "open")]
+            select: Field paths to fetch; other fields are not transferred
+            order_by: Field or fields to order by, "-field" for descending (default: document ID)
+            limit: Maximum number of documents to yield in total
+            start_after: Resume after this document: its ID, a snapshot, or a dict of order_by values
+            page_size: Documents fetched per round trip
+            id_field: If given, the document ID is added to each record under this key
+        """
+        query, keep = self._build_query(self.db.collection(collection_name), where, select, order_by)
+        cursor = start_after
+        if isinstance(cursor, str):
+            cursor = self.db.collection(collection_name).document(cursor).get()
+            if not cursor.exists:
+                raise ValueError(f"start_after document {start_after} not found in {collection_name}")
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = query.limit(size)
+            if cursor is not None:
+                page = page.start_after(cursor)
+            docs = list(page.stream())
+            for doc in docs:
+                yield self._to_record(doc, keep, id_field)
+            if len(docs) < size:
+                return
+            cursor = docs[-1]
+            if remaining is not None:
+                remaining -= len(docs)
+
+    async def aiter_documents(self, collection_name: str, where: Optional[Iterable[WhereClause]] = None,
+                              select: Optional[Sequence[str]] = None, order_by: Union[str, Sequence[str], None] = None,
+                              limit: Optional[int] = None, start_after: Union[str, Dict[str, Any], Any, None] = None,
+                              page_size: int = DEFAULT_PAGE_SIZE, id_field: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async variant of `iter_documents` on the async Firestore client"""
+        query, keep = self._build_query(self.async_db.collection(collection_name), where, select, order_by)
+        cursor = start_after
+        if isinstance(cursor, str):
+            cursor = await self.async_db.collection(collection_name).document(cursor).get()
+            if not cursor.exists:
+                raise ValueError(f"start_after document {start_after} not found in {collection_name}")
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = query.limit(size)
+            if cursor is not None:
+                page = page.start_after(cursor)
+            docs = [doc async for doc in page.stream()]
+            for doc in docs:
+                yield self._to_record(doc, keep, id_field)
+            if len(docs) < size:
+                return
+            cursor = docs[-1]
+            if remaining is not None:
+                remaining -= len(docs)
+
+    async def fetch_collections(self, collections: Union[Iterable[str], Dict[str, Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Read several collections concurrently.
+
+        Args:
+            collections: Collection names, or a mapping of collection name to
+                `aiter_documents` keyword arguments (where, select, limit, ...)
+
+        Returns:
+            Collection name -> list of documents; a collection that failed to load maps to []
+        """
+        requests = collections if isinstance(collections, dict) else {name: {} for name in collections}
+
+        async def fetch(name: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+            try:
+                return [doc async for doc in self.aiter_documents(name, **options)]
+            except Exception as e:
+                logger.error(f"Error fetching documents from {name}: {str(e)}")
+                return []
+
+        results = await asyncio.gather(*(fetch(name, options) for name, options in requests.items()))
+        return dict(zip(requests, results))
     
     def get_document_by_id(self, collection_name: str, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific document by ID"""
@@ -192,6 +379,7 @@ class FirestoreService:
             data['updated_at'] = datetime.now().isoformat()
             
             doc_ref = self.db.collection(collection_name).add(data)
+            self._mark_changed()
             logger.info(f"Document added to {collection_name} with ID: {doc_ref[1].id}")
             return doc_ref[1].id
         except Exception as e:
@@ -203,6 +391,7 @@ class FirestoreService:
         try:
             data['updated_at'] = datetime.now().isoformat()
             self.db.collection(collection_name).document(doc_id).update(data)
+            self._mark_changed()
             logger.info(f"Document {doc_id} updated in {collection_name}")
             return True
         except Exception as e:
@@ -213,12 +402,87 @@ class FirestoreService:
         """Delete a document"""
         try:
             self.db.collection(collection_name).document(doc_id).delete()
+            self._mark_changed()
             logger.info(f"Document {doc_id} deleted from {collection_name}")
             return True
         except Exception as e:
             logger.error(f"Error deleting document {doc_id} from {collection_name}: {str(e)}")
             return False
 
+    # --- Bulk writes ---
+    # Writes are grouped into batches of up to MAX_BATCH_WRITES, one round trip each. A batch
+    # is atomic: it is retried as a whole on contention, and if it still fails every write in
+    # it is reported as failed while the other batches go through.
+
+    def _commit_batches(self, collection_name: str, writes: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        """Commit (doc_id, write) pairs, where write(batch) adds one operation to a WriteBatch"""
+        succeeded, failed = [], []
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            chunk = writes[start:start + MAX_BATCH_WRITES]
+            for attempt in range(BULK_WRITE_ATTEMPTS):
+                batch = self.db.batch()
+                for _, write in chunk:
+                    write(batch)
+                try:
+                    batch.commit()
+                except RETRYABLE_WRITE_ERRORS as e:
+                    if attempt + 1 < BULK_WRITE_ATTEMPTS:
+                        delay = BULK_RETRY_BASE_SECONDS * 2 ** attempt * (1 + random.random())
+                        logger.warning(f"Batch of {len(chunk)} writes to {collection_name} failed ({str(e)}); retrying in {delay:.2f}s")
+                        time.sleep(delay)
+                        continue
+                    error = e
+                except Exception as e:
+                    error = e
+                else:
+                    succeeded.extend(doc_id for doc_id, _ in chunk)
+                    break
+                logger.error(f"Batch of {len(chunk)} writes to {collection_name} failed: {str(error)}")
+                failed.extend({"id": doc_id, "error": str(error)} for doc_id, _ in chunk)
+                break
+
+        if succeeded:
+            self._mark_changed()
+        logger.info(f"Bulk write to {collection_name}: {len(succeeded)} succeeded, {len(failed)} failed")
+        return {"succeeded": succeeded, "failed": failed}
+
+    def bulk_add(self, collection_name: str, documents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add many documents in batched commits
+
+        Returns:
+            {"succeeded": [new document IDs], "failed": [{"id": ..., "error": ...}]}
+        """
+        collection_ref = self.db.collection(collection_name)
+        now = datetime.now().isoformat()
+        writes = []
+        for data in documents:
+            doc_ref = collection_ref.document()
+            record = {**data, 'created_at': now, 'updated_at': now}
+            writes.append((doc_ref.id, lambda batch, ref=doc_ref, record=record: batch.set(ref, record)))
+        return self._commit_batches(collection_name, writes)
+
+    def bulk_update(self, collection_name: str, updates: Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]]) -> Dict[str, Any]:
+        """
+        Update many documents (doc ID -> fields to change) in batched commits
+
+        A batch containing a missing document fails as a whole and is reported as failed.
+        """
+        collection_ref = self.db.collection(collection_name)
+        now = datetime.now().isoformat()
+        items = updates.items() if isinstance(updates, dict) else updates
+        writes = [
+            (doc_id, lambda batch, ref=collection_ref.document(doc_id), changes={**data, 'updated_at': now}: batch.update(ref, changes))
+            for doc_id, data in items
+        ]
+        return self._commit_batches(collection_name, writes)
+
+    def bulk_delete(self, collection_name: str, doc_ids: Iterable[str]) -> Dict[str, Any]:
+        """Delete many documents in batched commits"""
+        collection_ref = self.db.collection(collection_name)
+        writes = [(doc_id, lambda batch, ref=collection_ref.document(doc_id): batch.delete(ref)) for doc_id in doc_ids]
+        return self._commit_batches(collection_name, writes)
+
 # Example usage and testing
 def test_firestore_connection():
     """Test the Firestore connection and basic operations"""
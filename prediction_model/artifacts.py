@@ -0,0 +1,165 @@
+# artifacts.py
+
+import os
+import sys
+import json
+import pickle
+from datetime import datetime
+from functools import cached_property
+import pandas as pd
+import numpy as np
+import lightgbm as lgb
+from inference import EnsemblePredictor
+
+# --- Configuration ---
+ARTIFACT_FORMAT_VERSION = 1
+DEFAULT_ARTIFACT_DIR = 'crowd_model'
+MANIFEST_FILE = 'manifest.json'
+ZONE_FEATURES_FILE = 'zone_features.npy'
+
+# ==============================================================================
+# Artifact directory layout (format version 1):
+#   manifest.json        format/model version, feature names, zone categories, members
+#   member_<i>.txt       native LightGBM model text, one per ensemble member
+#   h<h>_member_<i>.txt  optional direct models predicting <h> steps ahead
+#   zone_features.npy    zone feature table as a structured array (memory-mappable)
+# Nothing in it is pickled, so loading never executes code from the artifact.
+# ==============================================================================
+
+def _zone_table(zone_features):
+    """Zone feature DataFrame -> structured array with fixed-width zone names."""
+    fields = []
+    for col in zone_features.columns:
+        if zone_features[col].dtype == bool or pd.api.types.is_numeric_dtype(zone_features[col]):
+            fields.append((col, zone_features[col].to_numpy().dtype))
+        else:
+            width = max(1, zone_features[col].astype(str).str.len().max())
+            fields.append((col, f'U{width}'))
+    table = np.empty(len(zone_features), dtype=fields)
+    for col, _ in fields:
+        table[col] = zone_features[col].to_numpy()
+    return table
+
+def _save_members(output_dir, models, prefix=''):
+    """Save fitted LGBMRegressor objects up to their best iteration; returns the manifest entries."""
+    members = []
+    for i, model in enumerate(models):
+        file_name = f'{prefix}member_{i}.txt'
+        num_iteration = getattr(model, 'best_iteration_', None) or None
+        model.booster_.save_model(os.path.join(output_dir, file_name), num_iteration=num_iteration)
+        members.append({'file': file_name, 'num_iteration': num_iteration})
+    return members
+
+def save_artifacts(output_dir, models, zone_features, zone_categories, extra=None, horizon_models=None):
+    """Write the ensemble and zone features as a versioned artifact directory.
+
+    `models` are fitted LGBMRegressor objects; each is saved up to its best iteration.
+    `horizon_models` optionally maps a step count h to an ensemble trained to predict
+    h steps ahead directly (the one-step ensemble is `models` itself).
+    `extra` is any JSON-serializable metadata to keep in the manifest.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    members = _save_members(output_dir, models)
+    horizons = {'1': members}
+    for h, h_models in sorted((horizon_models or {}).items()):
+        if int(h) != 1:
+            horizons[str(int(h))] = _save_members(output_dir, h_models, prefix=f'h{int(h)}_')
+
+    np.save(os.path.join(output_dir, ZONE_FEATURES_FILE), _zone_table(zone_features), allow_pickle=False)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_version': datetime.now().strftime('%Y%m%d%H%M%S'),
+        'feature_names': list(models[0].feature_name_),
+        'zone_categories': list(zone_categories),
+        'members': members,
+        **(extra or {}),
+    }
+    if len(horizons) > 1:
+        manifest['horizons'] = horizons
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+class ModelArtifacts:
+    """
+    Lazily loaded artifact directory.
+
+    Only the manifest is read up front. The Boosters are parsed on first use, and the
+    zone table is memory-mapped, so worker processes share its pages.
+    """
+
+    def __init__(self, artifact_dir=DEFAULT_ARTIFACT_DIR):
+        self.path = artifact_dir
+        with open(os.path.join(artifact_dir, MANIFEST_FILE), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported artifact format version {self.manifest.get('format_version')} "
+                f"(expected {ARTIFACT_FORMAT_VERSION}) in '{artifact_dir}'"
+            )
+        self.feature_names = self.manifest['feature_names']
+        self.zone_categories = self.manifest['zone_categories']
+        self._horizon_predictors = {}
+
+    def _load_ensemble(self, members):
+        return EnsemblePredictor(
+            [lgb.Booster(model_file=os.path.join(self.path, member['file'])) for member in members],
+            [member['num_iteration'] for member in members],
+            self.zone_categories
+        )
+
+    @cached_property
+    def predictor(self):
+        return self._load_ensemble(self.manifest['members'])
+
+    @property
+    def boosters(self):
+        return self.predictor.boosters
+
+    @property
+    def horizons(self):
+        """Step counts with a direct model, in increasing order (just [1] for one-step artifacts)."""
+        return sorted(int(h) for h in self.manifest.get('horizons', {'1': None}))
+
+    def horizon_predictor(self, steps):
+        """EnsemblePredictor trained to predict `steps` steps (of FORECAST_STEP_SECONDS) ahead."""
+        if steps == 1:
+            return self.predictor
+        if steps not in self._horizon_predictors:
+            members = self.manifest.get('horizons', {}).get(str(steps))
+            if members is None:
+                raise ValueError(f"No direct model for {steps} steps ahead in '{self.path}' (available: {self.horizons})")
+            self._horizon_predictors[steps] = self._load_ensemble(members)
+        return self._horizon_predictors[steps]
+
+    def horizon_predictors(self):
+        """Steps ahead -> EnsemblePredictor for every direct model, as `direct_forecast_zones` expects."""
+        return {steps: self.horizon_predictor(steps) for steps in self.horizons}
+
+    @cached_property
+    def zone_table(self):
+        return np.load(os.path.join(self.path, ZONE_FEATURES_FILE), mmap_mode='r', allow_pickle=False)
+
+    @cached_property
+    def zone_features(self):
+        """The zone table as a DataFrame. Numeric columns are views of the mapped file, not
+        copies; only the fixed-width zone names are converted to strings."""
+        return pd.DataFrame({name: self.zone_table[name] for name in self.zone_table.dtype.names}, copy=False)
+
+def load_artifacts(artifact_dir=DEFAULT_ARTIFACT_DIR):
+    return ModelArtifacts(artifact_dir)
+
+def convert_pickle_artifacts(pickle_path, output_dir=DEFAULT_ARTIFACT_DIR):
+    """One-off conversion of a legacy `ensemble_crowd_model.pkl` (only run this on files you trust)."""
+    with open(pickle_path, 'rb') as f:
+        artifacts = pickle.load(f)
+    return save_artifacts(output_dir, artifacts['models'], artifacts['zone_features'], artifacts['zone_categories'])
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python artifacts.py <legacy_model.pkl> [output_dir]")
+        sys.exit(1)
+    manifest = convert_pickle_artifacts(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ARTIFACT_DIR)
+    print(f"Converted {len(manifest['members'])} ensemble members (model version {manifest['model_version']}).")
@@ -0,0 +1,56 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+
+import lightgbm as lgb
+
+import time_series_data_
+from feature_pipeline import MODEL_FEATURES
+from model_training import LOGICAL_ZONE_AREA, load_feature_frame
+
+@pytest.fixture(scope="session")
+def generated_training_data(tmp_path_factory):
+    """Training rows produced by the shipped time-series generator."""
+    random.seed(42)
+    np.random.seed(42)
+    output_csv = tmp_path_factory.mktemp("data") / "full_training_data.csv"
+
+    base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+    with pytest.MonkeyPatch.context() as mp:
+        # 60 snapshots per zone: long enough for every horizon bucket but the 60-step one
+        mp.setattr(time_series_data_, "SIMULATION_DURATION_MINUTES", 10)
+        mp.setattr(time_series_data_, "OUTPUT_CSV_FILE", str(output_csv))
+        snapshots = time_series_data_.simulate_snapshots(initial_users, zones)
+        time_series_data_.convert_timeseries_to_csv({**base_event_data, "snapshots": snapshots})
+
+    df = pd.read_csv(output_csv)
+    df['density'] = df['crowd_count'] / LOGICAL_ZONE_AREA
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.sort_values(by=['timestamp', 'zone_name'], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+@pytest.fixture(scope="session")
+def feature_frame(generated_training_data, tmp_path_factory):
+    """(feature DataFrame, zone feature table) built by the training pipeline from the generated rows."""
+    raw_csv = tmp_path_factory.mktemp("features") / "full_training_data.csv"
+    generated_training_data[time_series_data_.CSV_HEADER].to_csv(raw_csv, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return load_feature_frame(raw_csv)
+
+def fit_small_ensemble(df, target, members=2):
+    """A few quick LightGBM members on the rows of `df` that have `target`."""
+    rows = df.dropna(subset=[target])
+    return [
+        lgb.LGBMRegressor(n_estimators=25, num_leaves=7, min_child_samples=5, subsample=0.8, subsample_freq=1,
+                          colsample_bytree=0.8, random_state=seed, verbosity=-1)
+        .fit(rows[MODEL_FEATURES], rows[target])
+        for seed in range(members)
+    ]
+
+@pytest.fixture(scope="session")
+def small_ensemble(feature_frame):
+    """(one-step models, zone categories) trained on `feature_frame`."""
+    df, _ = feature_frame
+    df = df.assign(density_target_10s=df.groupby('zone_name', observed=True)['density'].shift(-1))
+    return fit_small_ensemble(df, 'density_target_10s'), df['zone_name'].cat.categories.tolist()
@@ -0,0 +1,234 @@
+# crowd_simulation.py
+#
+# Array-backed engine for time_series_data_.simulate_snapshots, for venue-sized
+# attendee counts. User state lives in a NumPy structured array (plus a users x zones
+# visit-count matrix) and each tick is a few vectorized operations over all users:
+# move decisions, scoring of every mover's candidate zones, and weighted sampling
+# among them. The behavioural model is the same as the per-user loop (move
+# probability rules, calculate_zone_attractiveness, revisit penalty, exploration
+# bonus, capacity checked against the occupancy at the start of the tick); only the
+# random stream differs, drawn from a seeded numpy Generator.
+
+import numpy as np
+from datetime import datetime, timedelta
+
+# --- Configuration ---
+ZONE_TYPES = ['entrance', 'main_hall', 'exhibition', 'food_court', 'restroom', 'corridor']
+USER_ROLES = ['admin', 'user', 'invitees']
+
+USER_STATE_DTYPE = np.dtype([
+    ('zone', np.int32),
+    ('time_in_zone', np.int64),
+    ('fatigue', np.float64),
+    ('fatigue_rate', np.float64),
+    ('exhibition_interest', np.float64),
+    ('food_interest', np.float64),
+    ('social_tendency', np.float64),
+    ('exploration_tendency', np.float64),
+    ('role', np.int8),
+    ('latitude', np.float64),
+    ('longitude', np.float64),
+])
+
+_EXHIBITION, _MAIN_HALL, _FOOD_COURT, _RESTROOM = (ZONE_TYPES.index(t) for t in ['exhibition', 'main_hall', 'food_court', 'restroom'])
+
+def venue_arrays(zones):
+    """Zone attributes as arrays, indexed like `zones`, plus each zone's candidate destinations."""
+    names = [z['zone_name'] for z in zones]
+    x = np.array([z['x_coord'] for z in zones])
+    y = np.array([z['y_coord'] for z in zones])
+    # Same neighbourhood as simulate_snapshots: within 2 grid units on both axes
+    adjacent = (np.abs(x[:, None] - x[None, :]) <= 2) & (np.abs(y[:, None] - y[None, :]) <= 2)
+    np.fill_diagonal(adjacent, False)
+
+    # Candidates of zone i: its neighbours then itself, padded with -1
+    candidate_lists = [list(np.flatnonzero(adjacent[i])) + [i] for i in range(len(zones))]
+    width = max(len(c) for c in candidate_lists)
+    candidates = np.full((len(zones), width), -1, dtype=np.int32)
+    for i, c in enumerate(candidate_lists):
+        candidates[i, :len(c)] = c
+
+    return {
+        'names': names,
+        'zone_type': np.array([ZONE_TYPES.index(z['zone_type']) for z in zones]),
+        'capacity': np.array([z['capacity'] for z in zones], dtype=np.float64),
+        'base_attractiveness': np.array([z['base_attractiveness'] for z in zones], dtype=np.float64),
+        'lat_min': np.array([z['_geo_bbox']['lat_min'] for z in zones]),
+        'lat_max': np.array([z['_geo_bbox']['lat_max'] for z in zones]),
+        'lon_min': np.array([z['_geo_bbox']['lon_min'] for z in zones]),
+        'lon_max': np.array([z['_geo_bbox']['lon_max'] for z in zones]),
+        'candidates': candidates,
+    }
+
+def user_state_arrays(users, zone_names):
+    """generate_base_data users -> (structured state array, users x zones visit counts)."""
+    zone_index = {name: i for i, name in enumerate(zone_names)}
+    state = np.zeros(len(users), dtype=USER_STATE_DTYPE)
+    visits = np.zeros((len(users), len(zone_names)), dtype=np.uint16)
+    for i, user in enumerate(users):
+        prefs = user['preferences']
+        state[i] = (
+            zone_index[user['user_zone']], user['time_in_current_zone'], prefs['current_fatigue'], prefs['fatigue_rate'],
+            prefs['exhibition_interest'], prefs['food_interest'], prefs['social_tendency'], prefs['exploration_tendency'],
+            USER_ROLES.index(user['user_role']), user['location']['latitude'], user['location']['longitude'],
+        )
+        for zone_name in user['zones_visited']:
+            visits[i, zone_index[zone_name]] += 1
+    return state, visits
+
+def time_modifier(zone_type, time_minutes):
+    """Per-zone time-of-day factor of calculate_zone_attractiveness."""
+    modifier = np.ones(len(zone_type))
+    if 180 <= time_minutes <= 240:
+        modifier[zone_type == _FOOD_COURT] = 1.5
+    if 60 <= time_minutes <= 180:
+        modifier[zone_type == _MAIN_HALL] = 1.3
+    return modifier
+
+def move_probabilities(state, venue, occupancy):
+    """Chance of each user leaving their zone this tick (state already advanced by one interval)."""
+    zone = state['zone']
+    probability = np.full(len(state), 0.3)
+    probability += np.where(state['time_in_zone'] > 120, 0.3, 0.0)
+    probability += np.where(occupancy[zone] > venue['capacity'][zone] * 0.8, 0.2, 0.0)
+    probability = np.where(state['fatigue'] > 0.7, probability * 0.5, probability)
+    restroom_done = (venue['zone_type'][zone] == _RESTROOM) & (state['time_in_zone'] > 60)
+    return np.where(restroom_done, 0.9, probability)
+
+def candidate_scores(state, visits, venue, occupancy, time_minutes):
+    """
+    Candidate zones (users x K, -1 padded) of the given users and their selection weights,
+    0 where the candidate is padding or full. Matches the per-user zone_scores of
+    simulate_snapshots.
+    """
+    zone = state['zone']
+    candidates = venue['candidates'][zone]
+    valid = candidates >= 0
+    c = np.where(valid, candidates, 0)
+    capacity = venue['capacity'][c]
+    valid &= occupancy[c] < capacity
+
+    occupancy_ratio = occupancy[c] / capacity
+    crowding_penalty = np.where(occupancy_ratio > 0.8, 0.5, np.where(occupancy_ratio > 0.6, 0.8, 1.0))
+    zone_type = venue['zone_type'][c]
+    pref_modifier = np.where(zone_type == _EXHIBITION, state['exhibition_interest'][:, None],
+                             np.where(zone_type == _FOOD_COURT, state['food_interest'][:, None], 1.0))
+    social_modifier = np.where((state['social_tendency'][:, None] > 0.7) & (occupancy_ratio > 0.3), 1.2, 1.0)
+    attractiveness = (venue['base_attractiveness'][c] * time_modifier(venue['zone_type'], time_minutes)[c]
+                      * crowding_penalty * pref_modifier * social_modifier)
+    attractiveness = np.clip(attractiveness, 0.1, 1.0)
+
+    # Revisit penalty and exploration bonus
+    visit_count = np.take_along_axis(visits, c, axis=1).astype(np.float64)
+    visited = visit_count > 0
+    revisit = visited & (c != zone[:, None])
+    attractiveness = np.where(revisit, attractiveness * (0.7 - 0.1 * visit_count), attractiveness)
+    attractiveness = np.where(visited, attractiveness, attractiveness * (1 + state['exploration_tendency'][:, None]))
+
+    scores = np.maximum(0.1, attractiveness)
+    return candidates, np.where(valid, scores, 0.0)
+
+def weighted_choice(weights, rng):
+    """Row-wise weighted sampling: column index per row, -1 for rows with no positive weight."""
+    cumulative = np.cumsum(weights, axis=1)
+    totals = cumulative[:, -1]
+    draws = rng.random(len(weights)) * totals
+    picks = np.minimum((cumulative <= draws[:, None]).sum(axis=1), weights.shape[1] - 1)
+    return np.where(totals > 0, picks, -1)
+
+class CrowdSimulation:
+    """
+    Vectorized user movement over a zone grid.
+
+        sim = CrowdSimulation(initial_users, zones, interval_seconds=30, seed=42)
+        for tick in range(n):
+            sim.step()        # sim.state['zone'], ['latitude'], ['longitude'] now hold the snapshot
+
+    `zones` and `initial_users` are those of time_series_data_.generate_base_data.
+    """
+
+    def __init__(self, initial_users, zones, interval_seconds, seed=None):
+        self.venue = venue_arrays(zones)
+        self.state, self.visits = user_state_arrays(initial_users, self.venue['names'])
+        self.interval_seconds = interval_seconds
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+
+    def occupancy(self):
+        return np.bincount(self.state['zone'], minlength=len(self.venue['names'])).astype(np.float64)
+
+    def step(self):
+        """Advance one snapshot interval."""
+        state, venue = self.state, self.venue
+        occupancy = self.occupancy()
+        time_minutes = self.tick * self.interval_seconds / 60
+
+        state['time_in_zone'] += self.interval_seconds
+        state['fatigue'] += state['fatigue_rate']
+
+        movers = np.flatnonzero(self.rng.random(len(state)) < move_probabilities(state, venue, occupancy))
+        if len(movers):
+            candidates, scores = candidate_scores(state[movers], self.visits[movers], venue, occupancy, time_minutes)
+            picks = weighted_choice(scores, self.rng)
+            chose = picks >= 0
+            new_zone = np.where(chose, candidates[np.arange(len(movers)), np.maximum(picks, 0)], state['zone'][movers])
+            moved = movers[new_zone != state['zone'][movers]]
+            destination = new_zone[new_zone != state['zone'][movers]]
+
+            state['zone'][moved] = destination
+            state['time_in_zone'][moved] = 0
+            np.add.at(self.visits, (moved, destination), 1)
+            u = self.rng.random((2, len(moved)))
+            state['latitude'][moved] = venue['lat_min'][destination] + u[0] * (venue['lat_max'][destination] - venue['lat_min'][destination])
+            state['longitude'][moved] = venue['lon_min'][destination] + u[1] * (venue['lon_max'][destination] - venue['lon_min'][destination])
+
+        self.tick += 1
+
+    def zone_role_counts(self):
+        """Users per (zone, role) in the current state, zones x len(USER_ROLES)."""
+        n_roles = len(USER_ROLES)
+        flat = self.state['zone'].astype(np.int64) * n_roles + self.state['role']
+        return np.bincount(flat, minlength=len(self.venue['names']) * n_roles).reshape(-1, n_roles)
+
+def iter_snapshots_vectorized(base_users, zones, duration_minutes, interval_seconds, seed=None, start_time=None):
+    """Drop-in for iter_snapshots: the same {"timestamp", "users"} snapshots, yielded one tick at a time."""
+    num_snapshots = (duration_minutes * 60) // interval_seconds
+    start_time = start_time or datetime.now()
+    sim = CrowdSimulation(base_users, zones, interval_seconds, seed)
+    names = sim.venue['names']
+    static = [{k: v for k, v in user.items()
+               if k not in ['preferences', 'time_in_current_zone', 'zones_visited', 'user_zone', 'location']}
+              for user in base_users]
+
+    for i in range(num_snapshots):
+        sim.step()
+        zone, lat, lon = sim.state['zone'].tolist(), sim.state['latitude'].tolist(), sim.state['longitude'].tolist()
+        users = [
+            {**fields, "user_zone": names[zone[j]], "location": {"latitude": lat[j], "longitude": lon[j]}}
+            for j, fields in enumerate(static)
+        ]
+        yield {
+            "timestamp": (start_time + timedelta(seconds=i * interval_seconds)).strftime('%Y-%m-%d %H:%M:%S'),
+            "users": users
+        }
+
+def iter_zone_counts_vectorized(base_users, zones, duration_minutes, interval_seconds, seed=None, start_time=None):
+    """
+    The ticks of iter_snapshots_vectorized (same seed, same movement) as {"timestamp",
+    "zone_counts"}, where zone_counts is the zones x roles array of zone_role_counts.
+    No per-user dicts are built, which is most of the cost of a snapshot; this is what
+    the training data needs when no snapshot file is written.
+    """
+    num_snapshots = (duration_minutes * 60) // interval_seconds
+    start_time = start_time or datetime.now()
+    sim = CrowdSimulation(base_users, zones, interval_seconds, seed)
+    for i in range(num_snapshots):
+        sim.step()
+        yield {
+            "timestamp": (start_time + timedelta(seconds=i * interval_seconds)).strftime('%Y-%m-%d %H:%M:%S'),
+            "zone_counts": sim.zone_role_counts()
+        }
+
+def simulate_snapshots_vectorized(base_users, zones, duration_minutes, interval_seconds, seed=None, start_time=None):
+    """Drop-in for simulate_snapshots: the same list of {"timestamp", "users"} snapshots."""
+    return list(iter_snapshots_vectorized(base_users, zones, duration_minutes, interval_seconds, seed, start_time))
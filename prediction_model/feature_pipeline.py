@@ -0,0 +1,238 @@
+# feature_pipeline.py
+
+import pandas as pd
+import numpy as np
+import warnings
+
+# --- Configuration ---
+FORECAST_STEP_SECONDS = 10
+ROLLING_WINDOW = 3  # Readings in the 30s rolling mean/std
+SCENARIO_COLUMN = 'scenario_id'  # Set by scenario_sweep; each scenario is a separate series per zone
+GRID_CENTER_X, GRID_CENTER_Y = 4, 4
+GRID_MAX_X, GRID_MAX_Y = 8, 6
+
+# ==============================================================================
+# Every feature row describes a zone right after its latest reading: lag and
+# rolling features come from that reading and the ones before it, and time
+# features are those of the predicted timestamp (latest reading + 10s).
+# Training computes them in bulk over a historical frame; serving keeps a small
+# rolling state per zone and computes them incrementally. Both go through the
+# functions below, so they cannot drift apart.
+# ==============================================================================
+
+ZONE_STATIC_FEATURES = [
+    'x_coord', 'y_coord', 'distance_from_center', 'is_corner', 'is_edge', 'is_center',
+    'zone_mean_density', 'zone_std_density'
+]
+TIME_FEATURES = ['hour', 'minute', 'second', 'day_of_week', 'hour_sin', 'hour_cos', 'minute_sin', 'minute_cos']
+LAG_FEATURES = ['density_lag_10s', 'density_lag_20s', 'density_roll_mean_30s', 'density_roll_std_30s']
+
+# Column order the models are trained on
+MODEL_FEATURES = [
+    'x_coord', 'y_coord', 'hour', 'minute', 'second', 'day_of_week',
+    'density_lag_10s', 'density_lag_20s', 'density_roll_mean_30s', 'density_roll_std_30s',
+    'distance_from_center', 'is_corner', 'is_edge', 'is_center',
+    'zone_mean_density', 'zone_std_density', 'hour_sin', 'hour_cos',
+    'minute_sin', 'minute_cos', 'zone_name'
+]
+
+def time_features(timestamps):
+    """Calendar and cyclical time features for the given prediction timestamps."""
+    timestamps = pd.DatetimeIndex(timestamps)
+    hour = timestamps.hour.to_numpy()
+    minute = timestamps.minute.to_numpy()
+    return {
+        'hour': hour,
+        'minute': minute,
+        'second': timestamps.second.to_numpy(),
+        'day_of_week': timestamps.dayofweek.to_numpy(),
+        'hour_sin': np.sin(2 * np.pi * hour / 24),
+        'hour_cos': np.cos(2 * np.pi * hour / 24),
+        'minute_sin': np.sin(2 * np.pi * minute / 60),
+        'minute_cos': np.cos(2 * np.pi * minute / 60),
+    }
+
+def window_lag_features(recent_densities):
+    """Lag and rolling features from an (n_zones, k) array of the latest densities, oldest first.
+
+    Missing readings are NaN, so zones with a short history get the same values as the bulk path.
+    """
+    recent_densities = np.asarray(recent_densities, dtype=float)
+    rolling = recent_densities[:, -ROLLING_WINDOW:]
+    with warnings.catch_warnings():
+        # Zones with fewer than two readings have no std, exactly like pandas' rolling std
+        warnings.simplefilter('ignore', RuntimeWarning)
+        roll_mean = np.nanmean(rolling, axis=1)
+        roll_std = np.nanstd(rolling, axis=1, ddof=1)
+    return {
+        'density_lag_10s': recent_densities[:, -1],
+        'density_lag_20s': recent_densities[:, -2] if recent_densities.shape[1] > 1 else np.full(len(recent_densities), np.nan),
+        'density_roll_mean_30s': roll_mean,
+        'density_roll_std_30s': roll_std,
+    }
+
+def zone_static_features(df):
+    """Per-zone static features: grid position and density statistics, one row per zone."""
+    zone_features = df.groupby('zone_name', observed=True).agg(
+        x_coord=('x_coord', 'first'),
+        y_coord=('y_coord', 'first'),
+        zone_mean_density=('density', 'mean'),
+        zone_std_density=('density', 'std'),
+        zone_min_density=('density', 'min'),
+        zone_max_density=('density', 'max'),
+    ).reset_index()
+
+    # Spatial features - distance from center and position on the grid
+    # As float, so compact integer coordinates do not narrow the distance computation
+    x, y = zone_features['x_coord'].astype(float), zone_features['y_coord'].astype(float)
+    zone_features['distance_from_center'] = np.sqrt((x - GRID_CENTER_X)**2 + (y - GRID_CENTER_Y)**2)
+    zone_features['is_corner'] = ((x == 0) | (x == GRID_MAX_X)) & ((y == 0) | (y == GRID_MAX_Y))
+    zone_features['is_edge'] = ((x == 0) | (x == GRID_MAX_X) | (y == 0) | (y == GRID_MAX_Y)) & ~zone_features['is_corner']
+    zone_features['is_center'] = (x == GRID_CENTER_X) & (y == 2)
+
+    return zone_features[[
+        'zone_name', 'x_coord', 'y_coord', 'distance_from_center', 'is_corner', 'is_edge', 'is_center',
+        'zone_mean_density', 'zone_std_density', 'zone_min_density', 'zone_max_density'
+    ]]
+
+def static_feature_columns(zone_features, zones, zone_categories):
+    """Zone-static feature columns (plus the encoded zone category) for the given zones, as float arrays."""
+    zone_feat = zone_features.drop_duplicates('zone_name').set_index('zone_name').loc[list(zones)]
+    columns = {col: zone_feat[col].to_numpy(dtype=float) for col in ZONE_STATIC_FEATURES}
+    zone_codes = pd.Categorical(list(zones), categories=zone_categories).codes.astype(float)
+    zone_codes[zone_codes < 0] = np.nan
+    columns['zone_name'] = zone_codes
+    return columns
+
+def series_keys(df):
+    """Columns identifying one zone's series: the zone, within its scenario when the frame has several."""
+    return [SCENARIO_COLUMN, 'zone_name'] if SCENARIO_COLUMN in df else ['zone_name']
+
+def bulk_features(df):
+    """Time, lag and rolling features for every row of a historical frame (training path).
+
+    `df` must be sorted by timestamp; lags and rolling windows are computed per series
+    (see series_keys), so they never reach into another scenario.
+    """
+    keys = series_keys(df)
+    density = df.groupby(keys, observed=True)['density']
+    rolling = density.rolling(window=ROLLING_WINDOW, min_periods=1)
+    features = time_features(df['timestamp'] + pd.Timedelta(seconds=FORECAST_STEP_SECONDS))
+    features.update({
+        'density_lag_10s': df['density'].to_numpy(dtype=float),
+        'density_lag_20s': density.shift(1).to_numpy(dtype=float),
+        'density_roll_mean_30s': rolling.mean().droplevel(list(range(len(keys)))).reindex(df.index).to_numpy(),
+        'density_roll_std_30s': rolling.std().droplevel(list(range(len(keys)))).reindex(df.index).to_numpy(),
+    })
+    return features
+
+def parse_timestamp(timestamp):
+    """A reading's timestamp as naive datetime64[ns], the clock the models were trained on.
+
+    Strings, datetimes and datetime64 values are accepted. Timezone-aware values keep their
+    wall-clock time (the offset is dropped, not converted to UTC), so the hour features are
+    those of the venue's local time. Numbers are rejected: an epoch value does not say its unit.
+    """
+    if isinstance(timestamp, (bool, int, float, np.number)):
+        raise ValueError(f"Numeric timestamp {timestamp!r}: send an ISO 8601 date-time string instead")
+    parsed = pd.Timestamp(timestamp)
+    if pd.isna(parsed):
+        raise ValueError(f"Missing timestamp {timestamp!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.tz_localize(None)
+    return parsed.to_datetime64().astype('datetime64[ns]')
+
+class OnlineFeatureStore:
+    """
+    Incremental feature state for serving.
+
+    Keeps a fixed-size ring of the latest densities per zone, so recording an
+    observation and reading the next-step features are O(1) per zone no matter
+    how much history has been seen.
+    """
+
+    def __init__(self, zone_features, zone_categories, window=ROLLING_WINDOW):
+        if window < ROLLING_WINDOW:
+            raise ValueError(f"Window must hold at least {ROLLING_WINDOW} readings.")
+        self.zones = zone_features['zone_name'].drop_duplicates().tolist()
+        self._zone_index = {zone: i for i, zone in enumerate(self.zones)}
+        self.window = window
+        self._static = static_feature_columns(zone_features, self.zones, zone_categories)
+
+        # One row per zone; _counts[i] is the total number of readings ever recorded for zone i
+        self._densities = np.zeros((len(self.zones), window))
+        self._timestamps = np.zeros((len(self.zones), window), dtype='datetime64[ns]')
+        self._counts = np.zeros(len(self.zones), dtype=np.int64)
+
+    def zone_index(self, zone):
+        if zone not in self._zone_index:
+            raise ValueError(f"Unknown zone '{zone}'")
+        return self._zone_index[zone]
+
+    def count(self, zone):
+        """Number of readings recorded so far for a zone."""
+        return int(self._counts[self.zone_index(zone)])
+
+    def last_timestamp(self, zone):
+        """Timestamp of the zone's latest reading (None before the first one)."""
+        i = self.zone_index(zone)
+        return self._timestamps[i, (self._counts[i] - 1) % self.window] if self._counts[i] else None
+
+    def validate(self, observations):
+        """Check (zone, timestamp, density) readings without recording any of them.
+
+        Zones must be known, timestamps parseable (see `parse_timestamp`), densities finite,
+        and each zone's readings must not go back in time, neither against what is already
+        stored nor within `observations`. Returns them as (zone index, datetime64[ns], float).
+        """
+        latest = {}
+        checked = []
+        for zone, timestamp, density in observations:
+            i = self.zone_index(zone)
+            timestamp = parse_timestamp(timestamp)
+            density = float(density)
+            if not np.isfinite(density):
+                raise ValueError(f"Density of zone '{zone}' at {timestamp} is not a finite number")
+            last = latest[i] if i in latest else self.last_timestamp(zone)
+            if last is not None and timestamp < last:
+                raise ValueError(f"Reading of zone '{zone}' at {timestamp} is older than its latest reading at {last}")
+            latest[i] = timestamp
+            checked.append((i, timestamp, density))
+        return checked
+
+    def update(self, zone, timestamp, density):
+        """Record the latest density reading of a zone."""
+        self.update_many([(zone, timestamp, density)])
+
+    def update_many(self, observations):
+        """Record several (zone, timestamp, density) readings: all of them, or none if any is invalid."""
+        checked = self.validate(observations)
+        for i, timestamp, density in checked:
+            slot = self._counts[i] % self.window
+            self._densities[i, slot] = density
+            self._timestamps[i, slot] = timestamp
+            self._counts[i] += 1
+        return len(checked)
+
+    def recent(self, zones, n):
+        """Last `n` densities of each zone (oldest first, NaN-padded) and the timestamp of its latest reading."""
+        if n > self.window:
+            raise ValueError(f"Only the last {self.window} readings are kept.")
+        indices = np.array([self.zone_index(zone) for zone in zones], dtype=np.int64)
+        counts = self._counts[indices]
+        offsets = counts[:, None] - n + np.arange(n)
+        positions = offsets % self.window
+        densities = self._densities[indices[:, None], positions]
+        densities[offsets < 0] = np.nan
+        last_timestamps = self._timestamps[indices, (counts - 1) % self.window]
+        return densities, last_timestamps
+
+    def features(self, zones=None, columns=MODEL_FEATURES):
+        """Next-step feature matrix (n_zones, n_columns) for the given zones, from the rolling state."""
+        zones = self.zones if zones is None else list(zones)
+        indices = [self.zone_index(zone) for zone in zones]
+        recent_densities, last_timestamps = self.recent(zones, ROLLING_WINDOW)
+        values = {col: values[indices] for col, values in self._static.items()}
+        values.update(time_features(last_timestamps + np.timedelta64(FORECAST_STEP_SECONDS, 's')))
+        values.update(window_lag_features(recent_densities))
+        return np.column_stack([values[col] for col in columns])
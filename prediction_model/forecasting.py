@@ -0,0 +1,239 @@
+# forecasting.py
+
+import pandas as pd
+import numpy as np
+from feature_pipeline import FORECAST_STEP_SECONDS, ROLLING_WINDOW, static_feature_columns, time_features, window_lag_features
+from inference import EnsemblePredictor
+
+# --- Configuration ---
+MAX_FORECAST_HORIZON = 600
+TREND_WINDOW = 10  # Number of recent readings used for the trend (and the minimum history required)
+HORIZON_BUCKETS = [1, 3, 6, 12, 30, 60]  # Steps ahead with a direct model, 10s up to MAX_FORECAST_HORIZON
+FORECAST_MODES = ['recursive', 'direct']
+
+def predict_with_uncertainty(models, X):
+    """Make predictions with uncertainty estimation."""
+    predictions = np.array([model.predict(X) for model in models])
+    mean_pred = predictions.mean(axis=0)
+    std_pred = predictions.std(axis=0)
+    return mean_pred, std_pred
+
+def _recent_zone_history(full_history_df, zones, start_timestamp):
+    """Return the last TREND_WINDOW densities and timestamps of every zone with enough history.
+
+    Rows keep the order of `full_history_df`, exactly like the per-zone boolean-mask filter did.
+    """
+    past = full_history_df[
+        (full_history_df['timestamp'] <= start_timestamp) &
+        (full_history_df['zone_name'].isin(zones))
+    ]
+    counts = past.groupby('zone_name', sort=False, observed=True).size()
+    valid_zones = [zone for zone in zones if counts.get(zone, 0) >= TREND_WINDOW]
+
+    recent = past[past['zone_name'].isin(valid_zones)].groupby('zone_name', sort=False, observed=True).tail(TREND_WINDOW)
+
+    # Stable sort by the requested zone order -> (n_zones, TREND_WINDOW) blocks
+    zone_codes = pd.Categorical(recent['zone_name'], categories=valid_zones).codes
+    order = np.argsort(zone_codes, kind='stable')
+    densities = recent['density'].to_numpy(dtype=float)[order].reshape(len(valid_zones), TREND_WINDOW)
+    timestamps = recent['timestamp'].to_numpy()[order].reshape(len(valid_zones), TREND_WINDOW)
+
+    return valid_zones, densities, timestamps[:, -1]
+
+def _check_horizon(forecast_horizon_seconds):
+    if forecast_horizon_seconds > MAX_FORECAST_HORIZON:
+        raise ValueError(f"Forecast horizon of {forecast_horizon_seconds}s is too large. Maximum allowed is {MAX_FORECAST_HORIZON}s.")
+    if int(forecast_horizon_seconds / FORECAST_STEP_SECONDS) < 1:
+        raise ValueError(f"Forecast horizon must be at least {FORECAST_STEP_SECONDS}s.")
+
+def _recent_trend(recent_densities):
+    """Slope of the last TREND_WINDOW readings, one least-squares fit per zone."""
+    return np.polyfit(np.arange(TREND_WINDOW), np.asarray(recent_densities, dtype=float)[:, -TREND_WINDOW:].T, 1)[0]
+
+def _density_bounds(zone_features, zones):
+    """Plausible density range per zone, used to clip forecasts."""
+    zone_feat = zone_features.drop_duplicates('zone_name').set_index('zone_name').loc[zones]
+    return zone_feat['zone_min_density'].to_numpy(dtype=float) * 0.5, zone_feat['zone_max_density'].to_numpy(dtype=float) * 1.5
+
+def _as_predictor(models, zone_categories):
+    return models if isinstance(models, EnsemblePredictor) else EnsemblePredictor.from_models(models, zone_categories)
+
+def _format_results(zones, predictions, uncertainties, trend):
+    results = {}
+    for k, zone in enumerate(zones):
+        final_density = predictions[k]
+        results[zone] = {
+            'prediction': final_density,
+            'confidence_interval': (final_density - 2*uncertainties[k], final_density + 2*uncertainties[k]),
+            'trend': 'increasing' if trend[k] > 0.01 else 'decreasing' if trend[k] < -0.01 else 'stable'
+        }
+    return results
+
+def rollout_zones(models, zones, recent_densities, last_timestamps, forecast_horizon_seconds, zone_features, zone_categories):
+    """Advance several zones together from their most recent readings.
+
+    Args:
+        models: the ensemble, as fitted models or an already built EnsemblePredictor.
+        zones: zone names, one per row of `recent_densities`.
+        recent_densities: (n_zones, TREND_WINDOW) array of the latest densities, oldest first.
+        last_timestamps: timestamp of the latest reading of every zone.
+
+    Returns:
+        dict: zone name -> {'prediction', 'confidence_interval', 'trend'}
+    """
+    _check_horizon(forecast_horizon_seconds)
+    num_steps = int(forecast_horizon_seconds / FORECAST_STEP_SECONDS)
+
+    zones = list(zones)
+    n_zones = len(zones)
+    if n_zones == 0:
+        return {}
+
+    trend = _recent_trend(recent_densities)
+
+    # Zone-specific features
+    static_columns = static_feature_columns(zone_features, zones, zone_categories)
+    min_density, max_density = _density_bounds(zone_features, zones)
+    zone_avg = static_columns['zone_mean_density']
+
+    predictor = _as_predictor(models, zone_categories)
+    static_columns['zone_name'] = predictor.encode_zones(zones)
+    feature_cols = predictor.feature_names
+    last_timestamps = pd.DatetimeIndex(last_timestamps)
+    history = np.array(recent_densities, dtype=float)[:, -ROLLING_WINDOW:]  # Only the rolling window feeds the lag features
+    uncertainties = np.empty((n_zones, num_steps))
+    X = predictor.empty_matrix(n_zones)
+
+    for i in range(num_steps):
+        prediction_timestamps = last_timestamps + pd.Timedelta(seconds=FORECAST_STEP_SECONDS * (i + 1))
+        lag_columns = window_lag_features(history)
+
+        # Lag features with decay
+        decay_factor = 0.95 ** i
+        columns = {
+            **static_columns,
+            **time_features(prediction_timestamps),
+            'density_lag_10s': lag_columns['density_lag_10s'] * decay_factor,
+            'density_lag_20s': lag_columns['density_lag_20s'] * decay_factor,
+            'density_roll_mean_30s': lag_columns['density_roll_mean_30s'] * decay_factor,
+            'density_roll_std_30s': lag_columns['density_roll_std_30s'],
+            'recent_trend': trend * (i + 1) * 0.1,
+        }
+        for j, col in enumerate(feature_cols):
+            X[:, j] = columns[col]
+
+        mean_pred, std_pred = predictor.predict(X)
+
+        historical_weight = 0.3 * (0.9 ** i)
+        final_prediction = (1 - historical_weight) * mean_pred + historical_weight * zone_avg
+        final_prediction = np.clip(final_prediction, min_density, max_density)
+
+        uncertainties[:, i] = std_pred
+
+        history[:, :-1] = history[:, 1:]
+        history[:, -1] = final_prediction
+
+    return _format_results(zones, history[:, -1], uncertainties.mean(axis=1), trend)
+
+def direct_forecast_zones(horizon_models, zones, recent_densities, last_timestamps, forecast_horizon_seconds, zone_features, zone_categories):
+    """Forecast several zones with the direct multi-horizon ensembles, without a rollout.
+
+    Every zone's current feature row (exactly the one the one-step model sees) is built
+    once and passed to the ensembles of the two horizon buckets around the requested
+    horizon; their predictions are interpolated linearly in time. The cost is the same
+    for a 10-second and a 10-minute forecast.
+
+    Args:
+        horizon_models: dict of steps ahead -> ensemble (fitted models or EnsemblePredictor).
+        zones, recent_densities, last_timestamps: as for `rollout_zones`.
+
+    Returns:
+        dict: zone name -> {'prediction', 'confidence_interval', 'trend'}
+    """
+    _check_horizon(forecast_horizon_seconds)
+    steps = forecast_horizon_seconds / FORECAST_STEP_SECONDS
+
+    buckets = sorted(horizon_models)
+    if steps > buckets[-1]:
+        raise ValueError(
+            f"Forecast horizon of {forecast_horizon_seconds}s is beyond the longest direct model "
+            f"({buckets[-1] * FORECAST_STEP_SECONDS}s)."
+        )
+    lower = max([b for b in buckets if b <= steps], default=buckets[0])
+    upper = min(b for b in buckets if b >= steps)
+
+    zones = list(zones)
+    if len(zones) == 0:
+        return {}
+
+    recent_densities = np.asarray(recent_densities, dtype=float)
+    trend = _recent_trend(recent_densities)
+    min_density, max_density = _density_bounds(zone_features, zones)
+
+    predictor = _as_predictor(horizon_models[lower], zone_categories)
+    columns = {
+        **static_feature_columns(zone_features, zones, zone_categories),
+        **time_features(pd.DatetimeIndex(last_timestamps) + pd.Timedelta(seconds=FORECAST_STEP_SECONDS)),
+        **window_lag_features(recent_densities[:, -ROLLING_WINDOW:]),
+        'zone_name': predictor.encode_zones(zones),
+    }
+    X = predictor.empty_matrix(len(zones))
+    for j, col in enumerate(predictor.feature_names):
+        X[:, j] = columns[col]
+
+    mean_pred, std_pred = predictor.predict(X)
+    if upper != lower:
+        upper_mean, upper_std = _as_predictor(horizon_models[upper], zone_categories).predict(X)
+        weight = (steps - lower) / (upper - lower)
+        mean_pred = (1 - weight) * mean_pred + weight * upper_mean
+        std_pred = (1 - weight) * std_pred + weight * upper_std
+
+    return _format_results(zones, np.clip(mean_pred, min_density, max_density), std_pred, trend)
+
+def covering_forecast_mode(horizons, forecast_horizon_seconds):
+    """'direct' when the direct models (steps ahead in `horizons`) reach the requested
+    horizon, otherwise 'recursive': the one-step model can roll out to any horizon."""
+    steps = forecast_horizon_seconds / FORECAST_STEP_SECONDS
+    return 'direct' if len(horizons) > 1 and steps <= max(horizons) else 'recursive'
+
+def forecast_zones(models, zones, start_timestamp, full_history_df, forecast_horizon_seconds, zone_features, zone_categories, mode='recursive'):
+    """Forecast the density of many zones at once.
+
+    In 'recursive' mode all zones are advanced together, one 10-second step at a time, with
+    a single (n_zones, n_features) matrix and one Booster `predict` call per ensemble member
+    per step. The rollout (decay, trend, historical smoothing and clipping) is the same as
+    the original per-zone `predict_density_at_horizon_improved`, so the numbers match it.
+    In 'direct' mode `models` maps steps ahead to ensembles (see `direct_forecast_zones`).
+
+    Returns:
+        dict: zone name -> {'prediction', 'confidence_interval', 'trend'}, or
+              {'prediction': None, 'error': ...} for zones without enough history.
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode '{mode}' (expected one of {', '.join(FORECAST_MODES)}).")
+    if forecast_horizon_seconds > MAX_FORECAST_HORIZON:
+        raise ValueError(f"Forecast horizon of {forecast_horizon_seconds}s is too large. Maximum allowed is {MAX_FORECAST_HORIZON}s.")
+
+    zones = list(zones)
+    results = {
+        zone: {'prediction': None, 'error': f"Not enough historical data for zone '{zone}'"}
+        for zone in zones
+    }
+
+    valid_zones, recent_densities, last_timestamps = _recent_zone_history(full_history_df, zones, start_timestamp)
+    forecaster = direct_forecast_zones if mode == 'direct' else rollout_zones
+    results.update(forecaster(
+        models, valid_zones, recent_densities, last_timestamps,
+        forecast_horizon_seconds, zone_features, zone_categories
+    ))
+    return results
+
+def predict_density_at_horizon_improved(models, start_zone, start_timestamp, full_history_df, forecast_horizon_seconds, zone_features, zone_categories):
+    """Improved prediction with uncertainty and drift correction (single zone)."""
+    result = forecast_zones(
+        models, [start_zone], start_timestamp, full_history_df,
+        forecast_horizon_seconds, zone_features, zone_categories
+    )[start_zone]
+    if result['prediction'] is None:
+        raise ValueError(result['error'])
+    return result
@@ -0,0 +1,121 @@
+# parallel_training.py
+#
+# Trains the one-step ensemble and the direct multi-horizon ensembles concurrently.
+# Every (horizon, member) pair is an independent LightGBM fit, so they run as separate
+# jobs in a process pool. Each worker gets cpu_count // workers LightGBM threads, so
+# the pool as a whole never runs more threads than there are cores.
+#
+#   python parallel_training.py [--workers N] [--output crowd_model]
+
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sklearn.metrics import mean_absolute_error
+from model_training import (
+    ENSEMBLE_PARAMS, INPUT_CSV_FILE, OUTPUT_ARTIFACT_DIR,
+    load_feature_frame, create_multi_horizon_targets, time_series_split, train_member
+)
+from artifacts import save_artifacts
+from inference import EnsemblePredictor
+from feature_pipeline import FORECAST_STEP_SECONDS
+from forecasting import HORIZON_BUCKETS
+
+# --- Configuration ---
+HORIZONS = HORIZON_BUCKETS  # Steps of FORECAST_STEP_SECONDS ahead, one direct ensemble each
+MIN_HORIZON_ROWS = 100  # Horizons with fewer training rows are left out of the artifact
+
+# Per-worker state, set once by the pool initializer so splits are not re-sent with every job
+_worker_splits = None
+_worker_threads = None
+
+def _init_worker(splits, threads):
+    global _worker_splits, _worker_threads
+    _worker_splits = splits
+    _worker_threads = threads
+
+def _fit_job(horizon, member):
+    X_train, y_train, X_test, y_test = _worker_splits[horizon]
+    model = train_member(ENSEMBLE_PARAMS[member], X_train, y_train, X_test, y_test, n_jobs=_worker_threads)
+    return horizon, member, model
+
+def build_horizon_splits(df, horizons=HORIZONS):
+    """Train/test splits per horizon, each dropping only the rows its own target is missing for."""
+    df = create_multi_horizon_targets(df, horizons)
+    target_columns = [f'density_target_{h}' for h in horizons]
+
+    splits = {}
+    for h in horizons:
+        horizon_df = df.drop(columns=[col for col in target_columns if col != f'density_target_{h}']).dropna()
+        if len(horizon_df) < MIN_HORIZON_ROWS:
+            # The recording is too short to have targets this far ahead
+            print(f"Skipping horizon {h}: only {len(horizon_df)} rows with a target")
+            continue
+        horizon_df['zone_name'] = horizon_df['zone_name'].astype('category')
+        splits[h] = time_series_split(horizon_df, f'density_target_{h}')
+    if not splits:
+        raise ValueError(f"The recording is too short to train any horizon (each needs {MIN_HORIZON_ROWS} rows with a target).")
+    # Every kept split has the same zone categories; take them from the shortest horizon
+    zone_categories = splits[min(splits)][0]['zone_name'].cat.categories.tolist()
+    return splits, zone_categories
+
+def worker_layout(n_jobs, workers=None, cpu_count=None):
+    """(process count, LightGBM threads per process) that fills but does not exceed the cores."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, n_jobs, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+def train_all_horizons(splits, workers=None):
+    """Fit every ENSEMBLE_PARAMS member for every horizon; returns {horizon: [models]}."""
+    jobs = [(h, m) for h in splits for m in range(len(ENSEMBLE_PARAMS))]
+    workers, threads = worker_layout(len(jobs), workers)
+    print(f"Training {len(jobs)} models on {workers} worker(s) x {threads} thread(s)")
+
+    results = {h: [None] * len(ENSEMBLE_PARAMS) for h in splits}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(splits, threads)) as pool:
+        futures = [pool.submit(_fit_job, h, m) for h, m in jobs]
+        for future in as_completed(futures):
+            horizon, member, model = future.result()
+            results[horizon][member] = model
+            print(f"  horizon {horizon:>2}, member {member + 1} done")
+    return results
+
+def evaluate_horizons(horizon_models, splits, zone_categories):
+    """Ensemble test-set MAE per horizon."""
+    scores = {}
+    for h, models in horizon_models.items():
+        _, _, X_test, y_test = splits[h]
+        y_pred, _ = EnsemblePredictor.from_models(models, zone_categories).predict_frame(X_test)
+        scores[h] = mean_absolute_error(y_test, y_pred)
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Train one-step and direct multi-horizon ensembles in parallel.")
+    parser.add_argument('--input', default=INPUT_CSV_FILE)
+    parser.add_argument('--output', default=OUTPUT_ARTIFACT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core, capped at the job count)")
+    args = parser.parse_args()
+
+    df, zone_features = load_feature_frame(args.input)
+    splits, zone_categories = build_horizon_splits(df)
+    if 1 not in splits:
+        # The one-step ensemble is the artifact's base model, used for recursive forecasts
+        raise SystemExit(f"The recording is too short to train the one-step ensemble ({MIN_HORIZON_ROWS} rows needed).")
+
+    print("\n--- Training Ensembles ---")
+    horizon_models = train_all_horizons(splits, args.workers)
+
+    print("\n--- Evaluating Ensembles ---")
+    scores = evaluate_horizons(horizon_models, splits, zone_categories)
+    for h, mae in scores.items():
+        print(f"  {h * FORECAST_STEP_SECONDS:>4}s ahead: MAE {mae:.4f}")
+
+    print(f"\n--- Saving all prediction artifacts to '{args.output}/' ---")
+    manifest = save_artifacts(
+        args.output, horizon_models[1], zone_features, zone_categories,
+        extra={'horizon_mae': {str(h): float(mae) for h, mae in scores.items()}},
+        horizon_models=horizon_models
+    )
+    print(f"Artifacts successfully saved (model version {manifest['model_version']}, horizons {sorted(horizon_models)}).")
+
+if __name__ == "__main__":
+    main()
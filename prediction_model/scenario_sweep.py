@@ -0,0 +1,134 @@
+# scenario_sweep.py
+#
+# Builds one training CSV from many simulated scenarios. Every combination of the
+# parameter grid (attendees, duration, zone-type layout) is an
+# independent generate_base_data + simulation + CSV conversion run, so the runs go to
+# a process pool. Each scenario gets its own seed from a SeedSequence spawned off the
+# sweep seed, so the output depends only on the grid and the seed, not on the number
+# of workers. Scenarios are placed on consecutive days (SCENARIO_SPACING apart) so
+# their timestamps never overlap, and the merged CSV has a scenario_id column that
+# training uses to keep lags and targets within a scenario. Snapshots are always
+# FORECAST_STEP_SECONDS apart, the step the models take per training row.
+#
+#   python scenario_sweep.py --users 400 2000 --duration 30 60 \
+#       --zone-maps default food_heavy --engine vectorized --output sweep_training_data.csv
+
+import os
+import json
+import random
+import argparse
+import itertools
+import tempfile
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import time_series_data_
+from feature_pipeline import FORECAST_STEP_SECONDS
+
+# --- Configuration ---
+SWEEP_START = datetime(2025, 1, 1, 9, 0, 0)
+SCENARIO_SPACING = timedelta(days=1)
+OUTPUT_CSV_FILE = 'sweep_training_data.csv'
+
+# Zone-type layouts for the default 4x5 grid; (row, col) -> zone type, other cells exhibition/corridor
+ZONE_TYPE_MAPS = {
+    'default': time_series_data_.ZONE_TYPE_MAP,
+    'food_heavy': {
+        (0, 0): 'entrance', (0, 4): 'entrance',
+        (0, 2): 'main_hall', (1, 2): 'main_hall',
+        (1, 0): 'food_court', (1, 4): 'food_court', (2, 1): 'food_court', (2, 3): 'food_court',
+        (3, 0): 'restroom', (3, 4): 'restroom',
+    },
+    'single_entrance': {
+        (0, 2): 'entrance',
+        (1, 2): 'main_hall', (2, 2): 'main_hall',
+        (2, 0): 'food_court', (2, 4): 'food_court',
+        (3, 0): 'restroom', (3, 4): 'restroom',
+    },
+}
+
+def build_scenarios(users, durations, zone_maps, engine='python', seed=42):
+    """Every combination of the grid, with its own seed, start time and zone capacity."""
+    grid = list(itertools.product(users, durations, zone_maps))
+    if max(durations) * 60 >= SCENARIO_SPACING.total_seconds():
+        raise ValueError(f"Scenario durations must be shorter than {SCENARIO_SPACING}.")
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(grid))]
+
+    scenarios = []
+    for i, ((n_users, duration, zone_map), scenario_seed) in enumerate(zip(grid, seeds)):
+        scenarios.append({
+            'scenario_id': i,
+            'users': n_users,
+            'duration_minutes': duration,
+            'interval_seconds': FORECAST_STEP_SECONDS,
+            'zone_map': zone_map,
+            # Zone capacity scales with the attendee count so larger crowds do not saturate the venue
+            'zone_capacity': max(1, round(time_series_data_.BASE_ZONE_CAPACITY * n_users / time_series_data_.NUM_USERS)),
+            'engine': engine,
+            'seed': scenario_seed,
+            'start_time': (SWEEP_START + i * SCENARIO_SPACING).strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    return scenarios
+
+def run_scenario(scenario, output_dir):
+    """Generate one scenario's training CSV in `output_dir` (runs in a worker process)."""
+    random.seed(scenario['seed'])
+    np.random.seed(scenario['seed'] % 2**32)
+    time_series_data_.NUM_USERS = scenario['users']
+    time_series_data_.SIMULATION_DURATION_MINUTES = scenario['duration_minutes']
+    time_series_data_.SNAPSHOT_INTERVAL_SECONDS = scenario['interval_seconds']
+    time_series_data_.ZONE_TYPE_MAP = ZONE_TYPE_MAPS[scenario['zone_map']]
+    time_series_data_.BASE_ZONE_CAPACITY = scenario['zone_capacity']
+    time_series_data_.SIMULATION_ENGINE = scenario['engine']
+    time_series_data_.SIMULATION_SEED = scenario['seed']
+    time_series_data_.OUTPUT_CSV_FILE = os.path.join(output_dir, f"scenario_{scenario['scenario_id']}.csv")
+
+    base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+    start_time = datetime.strptime(scenario['start_time'], '%Y-%m-%d %H:%M:%S')
+    ticks = list(time_series_data_.iter_zone_counts(initial_users, zones, start_time=start_time))
+    time_series_data_.convert_timeseries_to_csv({**base_event_data, 'snapshots': ticks})
+    return scenario['scenario_id'], time_series_data_.OUTPUT_CSV_FILE, len(ticks) * len(zones)
+
+def run_sweep(scenarios, output_csv=OUTPUT_CSV_FILE, workers=None):
+    """Run the scenarios in a process pool and merge their rows, in scenario order, into `output_csv`."""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(scenarios)))
+    rows = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_scenario, scenario, output_dir) for scenario in scenarios]
+            paths = {}
+            for future in as_completed(futures):
+                scenario_id, path, n_rows = future.result()
+                paths[scenario_id], rows[scenario_id] = path, n_rows
+                print(f"  scenario {scenario_id} done ({n_rows} rows)")
+
+        # Appended one scenario at a time, so the merge never holds more than one in memory
+        for i, scenario in enumerate(scenarios):
+            df = pd.read_csv(paths[scenario['scenario_id']])
+            df['scenario_id'] = scenario['scenario_id']
+            df.to_csv(output_csv, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return [{**scenario, 'rows': rows[scenario['scenario_id']]} for scenario in scenarios]
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a grid of scenarios in parallel and merge them into one training CSV.")
+    parser.add_argument('--users', type=int, nargs='+', default=[time_series_data_.NUM_USERS])
+    parser.add_argument('--duration', type=int, nargs='+', default=[time_series_data_.SIMULATION_DURATION_MINUTES], help="Minutes simulated")
+    parser.add_argument('--zone-maps', nargs='+', choices=sorted(ZONE_TYPE_MAPS), default=['default'])
+    parser.add_argument('--engine', choices=['python', 'vectorized'], default=time_series_data_.SIMULATION_ENGINE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core, capped at the scenario count)")
+    parser.add_argument('--output', default=OUTPUT_CSV_FILE)
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.users, args.duration, args.zone_maps, args.engine, args.seed)
+    print(f"Running {len(scenarios)} scenarios...")
+    summary = run_sweep(scenarios, args.output, args.workers)
+
+    manifest = os.path.splitext(args.output)[0] + '_scenarios.json'
+    with open(manifest, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n{sum(s['rows'] for s in summary)} rows written to '{args.output}', scenarios listed in '{manifest}'")
+
+if __name__ == "__main__":
+    main()
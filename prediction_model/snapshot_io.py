@@ -0,0 +1,123 @@
+# snapshot_io.py
+#
+# Streaming storage for simulation snapshots, as JSON Lines (gzip-compressed when the
+# path ends in .gz). The first line is a header with the event, the zone names and the
+# identity of every user (id, name, email, contact, role, event), written once. Each
+# following line is one tick holding only what changes: the timestamp plus, per user in
+# header order, a zone index and coordinates. Ticks are written as they are produced and
+# read back one at a time, so memory stays bounded however long the simulation runs.
+#
+#   {"format":"crowd-snapshots","version":1,"event":{...},"zones":["Z1HA",...],"users":[{...},...]}
+#   {"timestamp":"2025-01-01 09:00:00","zone":[0,4,...],"latitude":[13.06,...],"longitude":[77.48,...]}
+
+import gzip
+import json
+
+# --- Configuration ---
+SNAPSHOT_FORMAT = 'crowd-snapshots'
+SNAPSHOT_FORMAT_VERSION = 1
+COORDINATE_DECIMALS = 7  # ~1 cm; keeps tick lines compact
+DYNAMIC_USER_FIELDS = ['user_zone', 'location', 'preferences', 'time_in_current_zone', 'zones_visited']
+
+def _open(path, mode):
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _dump(record):
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+class SnapshotWriter:
+    """
+    Writes snapshots to a JSON Lines file as they are produced.
+
+        with SnapshotWriter(path, base_event_data['event'], initial_users) as writer:
+            for snapshot in iter_simulation(initial_users, zones):
+                writer.write(snapshot)
+
+    Snapshot users must be in the order of `users`, as both simulation engines keep them;
+    ticks store no ids, so a snapshot whose user_ids differ from the header's is rejected.
+    """
+
+    def __init__(self, path, event, users):
+        self.zone_index = {z['zone_name']: i for i, z in enumerate(event['zones'])}
+        self.user_ids = [user['user_id'] for user in users]
+        self.count = 0
+        self._file = _open(path, 'w')
+        self._file.write(_dump({
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_FORMAT_VERSION,
+            'event': event,
+            'zones': list(self.zone_index),
+            'users': [{k: v for k, v in user.items() if k not in DYNAMIC_USER_FIELDS} for user in users],
+        }))
+
+    def write(self, snapshot):
+        users = snapshot['users']
+        if len(users) != len(self.user_ids):
+            raise ValueError(f"Snapshot at {snapshot['timestamp']} has {len(users)} users, expected {len(self.user_ids)}.")
+        user_ids = [u['user_id'] for u in users]
+        if user_ids != self.user_ids:
+            i = next(i for i, (a, b) in enumerate(zip(user_ids, self.user_ids)) if a != b)
+            raise ValueError(
+                f"Snapshot at {snapshot['timestamp']} has user '{user_ids[i]}' at position {i}, "
+                f"expected '{self.user_ids[i]}'; users must keep the header's order."
+            )
+        self._file.write(_dump({
+            'timestamp': snapshot['timestamp'],
+            'zone': [self.zone_index[u['user_zone']] for u in users],
+            'latitude': [round(u['location']['latitude'], COORDINATE_DECIMALS) for u in users],
+            'longitude': [round(u['location']['longitude'], COORDINATE_DECIMALS) for u in users],
+        }))
+        self.count += 1
+
+    def record(self, snapshots):
+        """Writes each snapshot of `snapshots` and passes it on, for use inside another consumer."""
+        for snapshot in snapshots:
+            self.write(snapshot)
+            yield snapshot
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_snapshot_header(path):
+    """The header record: format, version, event, zones and users."""
+    with _open(path, 'r') as f:
+        header = json.loads(f.readline())
+    if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"'{path}' is not a {SNAPSHOT_FORMAT} v{SNAPSHOT_FORMAT_VERSION} file.")
+    return header
+
+def iter_ticks(path):
+    """The compact tick records of a snapshot file, one at a time."""
+    read_snapshot_header(path)
+    with _open(path, 'r') as f:
+        f.readline()
+        for line in f:
+            yield json.loads(line)
+
+def read_snapshots(path):
+    """
+    Streams the file back as {"timestamp", "users"} snapshots in the shape the simulation
+    produces, so they can go straight to time_series_data_.convert_timeseries_to_csv:
+
+        header = read_snapshot_header(path)
+        convert_timeseries_to_csv({'event': header['event'], 'snapshots': read_snapshots(path)})
+    """
+    header = read_snapshot_header(path)
+    zones, users = header['zones'], header['users']
+    for tick in iter_ticks(path):
+        yield {
+            'timestamp': tick['timestamp'],
+            'users': [
+                {**user, 'user_zone': zones[z], 'location': {'latitude': lat, 'longitude': lon}}
+                for user, z, lat, lon in zip(users, tick['zone'], tick['latitude'], tick['longitude'])
+            ],
+        }
@@ -0,0 +1,89 @@
+import random
+from datetime import datetime
+import numpy as np
+
+import time_series_data_
+from crowd_simulation import (
+    CrowdSimulation, candidate_scores, simulate_snapshots_vectorized, iter_snapshots_vectorized, iter_zone_counts_vectorized
+)
+
+def _base_data():
+    random.seed(0)
+    _, users, zones = time_series_data_.generate_base_data()
+    return users, zones
+
+def test_candidate_scores_match_per_user_model():
+    users, zones = _base_data()
+    sim = CrowdSimulation(users, zones, interval_seconds=30, seed=0)
+    rng = np.random.default_rng(1)
+    names = sim.venue['names']
+    zone_map = {z['zone_name']: z for z in zones}
+
+    # Scatter users, give them visit histories and crowd the zones unevenly
+    sim.state['zone'] = rng.integers(0, len(zones), len(users))
+    sim.visits[:] = rng.integers(0, 4, sim.visits.shape)
+    sim.visits[np.arange(len(users)), sim.state['zone']] += 1
+    occupancy = np.array([rng.integers(0, int(z['capacity']) + 5) for z in zones], dtype=float)
+
+    for time_minutes in [0, 90, 200]:
+        candidates, scores = candidate_scores(sim.state, sim.visits, sim.venue, occupancy, time_minutes)
+        for i in range(0, len(users), 7):
+            user = sim.state[i]
+            prefs = {field: user[field] for field in ['exhibition_interest', 'food_interest', 'social_tendency', 'exploration_tendency']}
+            visited = [names[z] for z in range(len(zones)) for _ in range(sim.visits[i, z])]
+            expected = {}
+            for z in candidates[i][candidates[i] >= 0]:
+                zone = zone_map[names[z]]
+                if occupancy[z] >= zone['capacity']:
+                    continue
+                attractiveness = time_series_data_.calculate_zone_attractiveness(zone, occupancy[z], time_minutes, prefs)
+                if names[z] in visited and z != user['zone']:
+                    attractiveness *= (0.7 - 0.1 * visited.count(names[z]))
+                if names[z] not in visited:
+                    attractiveness *= (1 + prefs['exploration_tendency'])
+                expected[z] = max(0.1, attractiveness)
+
+            actual = {z: s for z, s in zip(candidates[i], scores[i]) if z >= 0 and s > 0}
+            assert actual.keys() == expected.keys()
+            np.testing.assert_allclose([actual[z] for z in expected], list(expected.values()), rtol=1e-12)
+
+def test_simulation_is_reproducible_per_seed():
+    users, zones = _base_data()
+    runs = []
+    for seed in [7, 7, 8]:
+        sim = CrowdSimulation(users, zones, interval_seconds=30, seed=seed)
+        for _ in range(20):
+            sim.step()
+        runs.append(sim.state.copy())
+    np.testing.assert_array_equal(runs[0], runs[1])
+    assert not np.array_equal(runs[0]['zone'], runs[2]['zone'])
+
+def test_vectorized_snapshots_keep_users_and_counts():
+    users, zones = _base_data()
+    snapshots = simulate_snapshots_vectorized(users, zones, duration_minutes=5, interval_seconds=30, seed=3)
+    assert len(snapshots) == 10
+
+    sim = CrowdSimulation(users, zones, interval_seconds=30, seed=3)
+    for _ in range(10):
+        sim.step()
+    last = snapshots[-1]['users']
+    assert [u['user_id'] for u in last] == [u['user_id'] for u in users]
+    assert set(last[0]) == {'user_id', 'name', 'email', 'contact_no', 'user_role', 'registered_event', 'user_zone', 'location'}
+
+    counts = sim.zone_role_counts()
+    names = sim.venue['names']
+    for z, name in enumerate(names):
+        in_zone = [u for u in last if u['user_zone'] == name]
+        assert counts[z].sum() == len(in_zone)
+        assert counts[z, 0] == sum(u['user_role'] == 'admin' for u in in_zone)
+
+def test_zone_count_ticks_match_snapshots():
+    users, zones = _base_data()
+    start = datetime(2025, 1, 1, 9, 0)
+    zone_index = {z['zone_name']: i for i, z in enumerate(zones)}
+    snapshots = iter_snapshots_vectorized(users, zones, duration_minutes=5, interval_seconds=30, seed=3, start_time=start)
+    ticks = list(iter_zone_counts_vectorized(users, zones, duration_minutes=5, interval_seconds=30, seed=3, start_time=start))
+    assert len(ticks) == 10
+    for snapshot, tick in zip(snapshots, ticks):
+        assert tick['timestamp'] == snapshot['timestamp'] and 'users' not in tick
+        np.testing.assert_array_equal(tick['zone_counts'], time_series_data_.snapshot_zone_counts(snapshot['users'], zone_index))
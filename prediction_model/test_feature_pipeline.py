@@ -0,0 +1,78 @@
+from datetime import datetime, timezone, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_pipeline import MODEL_FEATURES, OnlineFeatureStore, bulk_features, parse_timestamp, zone_static_features
+
+def test_online_features_match_bulk_features(generated_training_data):
+    df = generated_training_data
+    zone_features = zone_static_features(df)
+    zone_categories = sorted(df['zone_name'].unique())
+
+    # Training path: everything at once over the historical frame
+    expected = pd.DataFrame(bulk_features(df), index=df.index)
+    expected = expected.join(df[['zone_name']].merge(zone_features, on='zone_name', how='left').set_index(df.index).drop(columns='zone_name'))
+    expected['zone_name'] = pd.Categorical(df['zone_name'], categories=zone_categories).codes
+
+    # Serving path: one observation at a time from the rolling state
+    store = OnlineFeatureStore(zone_features, zone_categories)
+    streamed = np.empty((len(df), len(MODEL_FEATURES)))
+    for i, row in enumerate(df.itertuples()):
+        store.update(row.zone_name, row.timestamp, row.density)
+        streamed[i] = store.features([row.zone_name])[0]
+
+    np.testing.assert_allclose(streamed, expected[MODEL_FEATURES].to_numpy(dtype=float), rtol=1e-9, atol=1e-12)
+
+def _store(zones=('A',), window=4):
+    zone_features = pd.DataFrame({
+        'zone_name': list(zones), 'x_coord': 0, 'y_coord': 0, 'distance_from_center': 1.0,
+        'is_corner': True, 'is_edge': False, 'is_center': False,
+        'zone_mean_density': 1.0, 'zone_std_density': 0.5,
+    })
+    return OnlineFeatureStore(zone_features, list(zones), window=window)
+
+def test_online_store_keeps_bounded_state():
+    store = _store()
+    start = pd.Timestamp('2025-01-01 10:00:00')
+    for i in range(100):
+        store.update('A', start + pd.Timedelta(seconds=10 * i), float(i))
+
+    densities, last_timestamps = store.recent(['A'], 4)
+    np.testing.assert_array_equal(densities, [[96.0, 97.0, 98.0, 99.0]])
+    assert last_timestamps[0] == np.datetime64(start + pd.Timedelta(seconds=990))
+    assert store.count('A') == 100
+
+def test_timestamps_keep_local_wall_clock_time():
+    expected = np.datetime64('2025-01-01T10:00:00', 'ns')
+    assert parse_timestamp('2025-01-01 10:00:00') == expected
+    assert parse_timestamp('2025-01-01T10:00:00+05:30') == expected
+    assert parse_timestamp(datetime(2025, 1, 1, 10, tzinfo=timezone(timedelta(hours=-4)))) == expected
+    assert parse_timestamp(np.datetime64('2025-01-01T10:00:00')) == expected
+    for bad in [1735725600, 1735725600.0, np.int64(1735725600), None, 'not a time']:
+        with pytest.raises(ValueError):
+            parse_timestamp(bad)
+
+def test_store_rejects_readings_that_go_back_in_time():
+    store = _store(['A', 'B'])
+    store.update('A', '2025-01-01 10:00:10', 1.0)
+    store.update('A', '2025-01-01 10:00:10', 2.0)  # Same time is allowed
+    with pytest.raises(ValueError, match="older than its latest reading"):
+        store.update('A', '2025-01-01 10:00:00', 3.0)
+    store.update('B', '2025-01-01 10:00:00', 3.0)  # Other zones keep their own clock
+    assert (store.count('A'), store.count('B')) == (2, 1)
+
+def test_invalid_batches_are_not_applied_at_all():
+    store = _store(['A', 'B'])
+    for batch in [
+        [('A', '2025-01-01 10:00:00', 1.0), ('B', '2025-01-01 10:00:00', 1.0), ('C', '2025-01-01 10:00:00', 1.0)],
+        [('A', '2025-01-01 10:00:00', 1.0), ('B', 1735725600, 1.0)],
+        [('A', '2025-01-01 10:00:10', 1.0), ('A', '2025-01-01 10:00:00', 1.0)],
+        [('A', '2025-01-01 10:00:00', 1.0), ('B', '2025-01-01 10:00:00', float('nan'))],
+    ]:
+        with pytest.raises(ValueError):
+            store.update_many(batch)
+        assert (store.count('A'), store.count('B')) == (0, 0)
+
+    assert store.update_many([('A', '2025-01-01 10:00:00', 1.0), ('A', '2025-01-01 10:00:10', 2.0)]) == 2
+    assert store.last_timestamp('A') == np.datetime64('2025-01-01T10:00:10', 'ns')
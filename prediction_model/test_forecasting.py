@@ -0,0 +1,130 @@
+import os
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import load_artifacts
+from forecasting import TREND_WINDOW, direct_forecast_zones, forecast_zones, predict_with_uncertainty
+from inference import EnsemblePredictor
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crowd_model')
+
+@pytest.fixture(scope="module")
+def shipped_artifacts():
+    return load_artifacts(ARTIFACT_DIR)
+
+@pytest.fixture(scope="module")
+def horizon_models(shipped_artifacts):
+    """Two stand-in horizon ensembles: single members of the shipped one-step ensemble."""
+    predictor = shipped_artifacts.predictor
+    return {
+        steps: EnsemblePredictor([booster], [num_iteration], shipped_artifacts.zone_categories)
+        for steps, booster, num_iteration in zip([1, 3], predictor.boosters, predictor.num_iterations)
+    }
+
+def test_zone_features_are_views_of_the_mapped_table(shipped_artifacts):
+    zone_features, zone_table = shipped_artifacts.zone_features, shipped_artifacts.zone_table
+    assert isinstance(zone_table, np.memmap)
+    assert all(np.shares_memory(zone_features[col].to_numpy(), zone_table) for col in zone_features.columns.drop('zone_name'))
+    assert zone_features['zone_name'].tolist() == zone_table['zone_name'].tolist()
+
+def direct_forecast(artifacts, horizon_models, horizon_seconds):
+    zones = list(artifacts.zone_categories)
+    recent = np.random.default_rng(0).uniform(1, 6, size=(len(zones), TREND_WINDOW))
+    last_timestamps = [pd.Timestamp('2025-01-01 10:00:00')] * len(zones)
+    results = direct_forecast_zones(
+        horizon_models, zones, recent, last_timestamps, horizon_seconds,
+        artifacts.zone_features, artifacts.zone_categories
+    )
+    return np.array([results[zone]['prediction'] for zone in zones])
+
+def test_direct_forecast_interpolates_between_buckets(shipped_artifacts, horizon_models):
+    at_10s = direct_forecast(shipped_artifacts, horizon_models, 10)
+    at_20s = direct_forecast(shipped_artifacts, horizon_models, 20)
+    at_30s = direct_forecast(shipped_artifacts, horizon_models, 30)
+
+    assert not np.allclose(at_10s, at_30s)
+    # Midway between the buckets, for zones where clipping to the density range did not kick in
+    zone_table = shipped_artifacts.zone_features.set_index('zone_name').loc[shipped_artifacts.zone_categories]
+    low, high = zone_table['zone_min_density'].to_numpy() * 0.5, zone_table['zone_max_density'].to_numpy() * 1.5
+    unclipped = (at_10s > low) & (at_10s < high) & (at_30s > low) & (at_30s < high)
+    assert unclipped.any()
+    np.testing.assert_allclose(at_20s[unclipped], ((at_10s + at_30s) / 2)[unclipped], rtol=1e-12)
+
+def test_direct_forecast_rejects_horizons_past_the_last_bucket(shipped_artifacts, horizon_models):
+    with pytest.raises(ValueError, match="beyond the longest direct model"):
+        direct_forecast(shipped_artifacts, horizon_models, 40)
+
+def reference_predict_density_at_horizon(models, start_zone, start_timestamp, full_history_df, forecast_horizon_seconds, zone_features, zone_categories):
+    """The original one-zone, one-row-DataFrame-per-step rollout, kept as the regression baseline."""
+    num_steps = int(forecast_horizon_seconds / 10)
+    history = full_history_df[
+        (full_history_df['zone_name'] == start_zone) &
+        (full_history_df['timestamp'] <= start_timestamp)
+    ].copy()
+    recent_densities = history['density'].tail(10).values
+    trend = np.polyfit(range(len(recent_densities)), recent_densities, 1)[0]
+    zone_feat = zone_features[zone_features['zone_name'] == start_zone].iloc[0]
+
+    predicted_densities = []
+    uncertainties = []
+    for i in range(num_steps):
+        last_point = history.iloc[-1]
+        prediction_timestamp = last_point['timestamp'] + timedelta(seconds=10)
+
+        features = pd.DataFrame(index=[0])
+        for col in ['x_coord', 'y_coord', 'distance_from_center', 'is_corner', 'is_edge', 'is_center',
+                    'zone_mean_density', 'zone_std_density']:
+            features[col] = zone_feat[col]
+        features['hour'] = prediction_timestamp.hour
+        features['minute'] = prediction_timestamp.minute
+        features['second'] = prediction_timestamp.second
+        features['day_of_week'] = prediction_timestamp.dayofweek
+        features['hour_sin'] = np.sin(2 * np.pi * features['hour'] / 24)
+        features['hour_cos'] = np.cos(2 * np.pi * features['hour'] / 24)
+        features['minute_sin'] = np.sin(2 * np.pi * features['minute'] / 60)
+        features['minute_cos'] = np.cos(2 * np.pi * features['minute'] / 60)
+
+        decay_factor = 0.95 ** i
+        features['density_lag_10s'] = history['density'].iloc[-1] * decay_factor
+        features['density_lag_20s'] = history['density'].iloc[-2] * decay_factor
+        features['density_roll_mean_30s'] = history['density'].tail(3).mean() * decay_factor
+        features['density_roll_std_30s'] = history['density'].tail(3).std()
+        features['recent_trend'] = trend * (i + 1) * 0.1
+        features['zone_name'] = pd.Categorical([start_zone], categories=zone_categories)
+
+        feature_cols = [col for col in models[0].feature_name_ if col in features.columns]
+        mean_pred, std_pred = predict_with_uncertainty(models, features[feature_cols])
+
+        historical_weight = 0.3 * (0.9 ** i)
+        final_prediction = (1 - historical_weight) * mean_pred[0] + historical_weight * zone_feat['zone_mean_density']
+        final_prediction = np.clip(final_prediction, zone_feat['zone_min_density'] * 0.5, zone_feat['zone_max_density'] * 1.5)
+        predicted_densities.append(final_prediction)
+        uncertainties.append(std_pred[0])
+
+        new_row = last_point.to_frame().T.copy()
+        new_row['timestamp'] = prediction_timestamp
+        new_row['density'] = final_prediction
+        history = pd.concat([history, new_row], ignore_index=True)
+
+    final_density = predicted_densities[-1]
+    final_uncertainty = np.mean(uncertainties)
+    return {
+        'prediction': final_density,
+        'confidence_interval': (final_density - 2*final_uncertainty, final_density + 2*final_uncertainty),
+        'trend': 'increasing' if trend > 0.01 else 'decreasing' if trend < -0.01 else 'stable'
+    }
+
+@pytest.mark.parametrize("horizon_seconds", [10, 120])
+def test_batched_rollout_matches_per_zone_reference(feature_frame, small_ensemble, horizon_seconds):
+    df, zone_features = feature_frame
+    models, zone_categories = small_ensemble
+    start = df['timestamp'].quantile(0.8, interpolation='lower')
+
+    batched = forecast_zones(models, zone_categories, start, df, horizon_seconds, zone_features, zone_categories)
+    for zone in zone_categories:
+        expected = reference_predict_density_at_horizon(models, zone, start, df, horizon_seconds, zone_features, zone_categories)
+        assert batched[zone]['trend'] == expected['trend']
+        np.testing.assert_allclose(batched[zone]['prediction'], expected['prediction'], rtol=1e-12)
+        np.testing.assert_allclose(batched[zone]['confidence_interval'], expected['confidence_interval'], rtol=1e-12, atol=1e-12)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from model_training import create_advanced_features, load_feature_frame
+from time_series_data_ import CSV_HEADER
+
+def reference_adjacent_avg_density(df):
+    """The original per-zone, per-timestamp loop, kept as the regression baseline."""
+    df = df.copy()
+    for zone in df['zone_name'].unique():
+        zone_data = df[df['zone_name'] == zone].iloc[0]
+        x, y = zone_data['x_coord'], zone_data['y_coord']
+
+        adjacent_mask = (
+            (abs(df['x_coord'] - x) <= 2) &
+            (abs(df['y_coord'] - y) <= 2) &
+            (df['zone_name'] != zone)
+        )
+
+        for ts in df['timestamp'].unique():
+            ts_mask = df['timestamp'] == ts
+            adjacent_density = df[ts_mask & adjacent_mask]['density'].mean()
+            df.loc[ts_mask & (df['zone_name'] == zone), 'adjacent_avg_density'] = adjacent_density
+    return df['adjacent_avg_density']
+
+def test_adjacent_avg_density_matches_reference(generated_training_data):
+    expected = reference_adjacent_avg_density(generated_training_data)
+    features = create_advanced_features(generated_training_data.copy())
+
+    np.testing.assert_allclose(features['adjacent_avg_density'].to_numpy(), expected.to_numpy(dtype=float), rtol=1e-12)
+
+def test_adjacent_avg_density_handles_missing_readings(generated_training_data):
+    # Drop some rows and blank some densities so zones have gaps at some timestamps
+    df = generated_training_data.drop(index=generated_training_data.index[::7]).reset_index(drop=True)
+    df.loc[df.index[::11], 'density'] = np.nan
+
+    expected = reference_adjacent_avg_density(df)
+    features = create_advanced_features(df.copy())
+
+    np.testing.assert_allclose(features['adjacent_avg_density'].to_numpy(), expected.to_numpy(dtype=float), rtol=1e-12)
+
+def _write_raw(df, path):
+    if str(path).endswith('.parquet'):
+        df[CSV_HEADER].to_parquet(path)
+    else:
+        df[CSV_HEADER].to_csv(path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+
+def test_feature_frame_is_typed_and_time_ordered(generated_training_data, tmp_path):
+    _write_raw(generated_training_data, tmp_path / "ordered.csv")
+    _write_raw(generated_training_data.sample(frac=1, random_state=0), tmp_path / "shuffled.csv")
+    df, _ = load_feature_frame(tmp_path / "ordered.csv")
+    shuffled, _ = load_feature_frame(tmp_path / "shuffled.csv")
+
+    assert isinstance(df['zone_name'].dtype, pd.CategoricalDtype)
+    assert df['zone_name'].cat.categories.tolist() == sorted(generated_training_data['zone_name'].unique())
+    assert df['x_coord'].dtype == np.int16 and df['crowd_count'].dtype == np.int16
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+    assert 'admin_count' not in df
+    pd.testing.assert_frame_equal(shuffled, df)
+    np.testing.assert_array_equal(df['density'], generated_training_data['density'])
+
+def test_parquet_input_gives_the_same_features_as_csv(generated_training_data, tmp_path):
+    pytest.importorskip("pyarrow")
+    _write_raw(generated_training_data, tmp_path / "training.csv")
+    _write_raw(generated_training_data, tmp_path / "training.parquet")
+    from_csv, csv_zones = load_feature_frame(tmp_path / "training.csv")
+    from_parquet, parquet_zones = load_feature_frame(tmp_path / "training.parquet")
+
+    pd.testing.assert_frame_equal(from_parquet, from_csv, check_dtype=False)
+    pd.testing.assert_frame_equal(parquet_zones, csv_zones, check_dtype=False)
@@ -0,0 +1,57 @@
+import sys
+import pytest
+
+import parallel_training
+from artifacts import load_artifacts
+from parallel_training import build_horizon_splits, worker_layout
+from time_series_data_ import CSV_HEADER
+
+SMALL_PARAMS = [dict(n_estimators=20, num_leaves=7, min_child_samples=5, random_state=0, verbosity=-1)]
+
+def test_worker_layout_never_oversubscribes_cores():
+    for cpu_count in [1, 4, 32]:
+        for n_jobs in [1, 3, 12, 100]:
+            for requested in [None, 1, 8, 64]:
+                workers, threads = worker_layout(n_jobs, requested, cpu_count)
+                assert 1 <= workers <= min(n_jobs, cpu_count)
+                assert threads >= 1
+                assert workers * threads <= cpu_count
+
+def test_worker_layout_gives_spare_cores_to_threads():
+    assert worker_layout(12, cpu_count=32) == (12, 2)
+    assert worker_layout(12, 4, cpu_count=32) == (4, 8)
+
+def test_horizons_without_enough_rows_are_dropped(feature_frame):
+    df, _ = feature_frame
+    # 60 snapshots per zone: nothing is 60 steps ahead, the other buckets have targets
+    splits, zone_categories = build_horizon_splits(df.copy())
+    assert 60 not in splits and {1, 3, 30} <= set(splits)
+    assert zone_categories == df['zone_name'].cat.categories.tolist()
+
+    # The first requested horizon can be the dropped one
+    splits, categories = build_horizon_splits(df.copy(), horizons=[60, 3])
+    assert list(splits) == [3] and categories == zone_categories
+
+    with pytest.raises(ValueError, match="too short to train any horizon"):
+        build_horizon_splits(df.copy(), horizons=[60])
+
+def test_main_saves_only_the_trained_horizons(generated_training_data, tmp_path, monkeypatch):
+    raw_csv = tmp_path / "training.csv"
+    generated_training_data[CSV_HEADER].to_csv(raw_csv, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    monkeypatch.setattr(parallel_training, 'ENSEMBLE_PARAMS', SMALL_PARAMS)
+    monkeypatch.setattr(sys, 'argv', ['parallel_training.py', '--input', str(raw_csv), '--output', str(tmp_path / 'model'), '--workers', '2'])
+    parallel_training.main()
+
+    artifacts = load_artifacts(tmp_path / 'model')
+    assert artifacts.horizons == [1, 3, 6, 12, 30]
+    assert len(artifacts.predictor.boosters) == len(SMALL_PARAMS)
+
+def test_main_needs_the_one_step_horizon(generated_training_data, tmp_path, monkeypatch):
+    raw_csv = tmp_path / "training.csv"
+    generated_training_data[CSV_HEADER].to_csv(raw_csv, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    # As if horizon 1 had been dropped for lack of rows
+    monkeypatch.setattr(parallel_training, 'build_horizon_splits', lambda df: build_horizon_splits(df, horizons=[3, 6]))
+    monkeypatch.setattr(sys, 'argv', ['parallel_training.py', '--input', str(raw_csv), '--output', str(tmp_path / 'model')])
+    with pytest.raises(SystemExit, match="one-step ensemble"):
+        parallel_training.main()
+    assert not (tmp_path / 'model').exists()
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from feature_pipeline import FORECAST_STEP_SECONDS
+from model_training import ENSEMBLE_PARAMS, load_feature_frame, train_member
+from parallel_training import build_horizon_splits
+from scenario_sweep import build_scenarios, run_sweep
+
+def test_scenarios_get_distinct_reproducible_seeds():
+    scenarios = build_scenarios([50, 100], [2, 3], ['default', 'food_heavy'], seed=1)
+    assert len(scenarios) == 8
+    assert len({s['seed'] for s in scenarios}) == 8
+    assert [s['seed'] for s in scenarios] == [s['seed'] for s in build_scenarios([50, 100], [2, 3], ['default', 'food_heavy'], seed=1)]
+    assert scenarios[1]['zone_capacity'] == scenarios[0]['zone_capacity']
+    assert scenarios[4]['zone_capacity'] > scenarios[0]['zone_capacity']
+
+def test_snapshots_are_one_forecast_step_apart(tmp_path):
+    scenarios = build_scenarios([40], [1], ['default'], engine='vectorized', seed=2)
+    assert all(s['interval_seconds'] == FORECAST_STEP_SECONDS for s in scenarios)
+    run_sweep(scenarios, tmp_path / 'sweep.csv', workers=1)
+    steps = pd.to_datetime(pd.read_csv(tmp_path / 'sweep.csv')['timestamp']).drop_duplicates().diff().dropna()
+    assert (steps == pd.Timedelta(seconds=FORECAST_STEP_SECONDS)).all()
+
+def test_sweep_output_does_not_depend_on_worker_count(tmp_path):
+    scenarios = build_scenarios([40], [2], ['default', 'single_entrance'], engine='vectorized', seed=3)
+    run_sweep(scenarios, tmp_path / 'one.csv', workers=1)
+    summary = run_sweep(scenarios, tmp_path / 'two.csv', workers=2)
+
+    one, two = pd.read_csv(tmp_path / 'one.csv'), pd.read_csv(tmp_path / 'two.csv')
+    pd.testing.assert_frame_equal(one, two)
+    assert len(one) == sum(s['rows'] for s in summary)
+    assert one['scenario_id'].tolist() == sorted(one['scenario_id'])
+
+    # Scenarios occupy disjoint time ranges
+    spans = one.assign(timestamp=pd.to_datetime(one['timestamp'])).groupby('scenario_id')['timestamp'].agg(['min', 'max'])
+    assert spans['max'].iloc[0] < spans['min'].iloc[1]
+
+def test_training_on_the_sweep_keeps_targets_within_scenarios(tmp_path):
+    scenarios = build_scenarios([40], [3], ['default', 'food_heavy', 'single_entrance'], engine='vectorized', seed=5)
+    run_sweep(scenarios, tmp_path / 'sweep.csv', workers=1)
+    df, _ = load_feature_frame(tmp_path / 'sweep.csv')
+    assert sorted(df['scenario_id'].unique()) == [0, 1, 2]
+    assert (df.groupby('scenario_id')['time_since_start'].min() == 0).all()
+
+    horizons = [1, 3]
+    splits, _ = build_horizon_splits(df, horizons)
+    ticks = 3 * 60 // FORECAST_STEP_SECONDS
+    readings = df.set_index(['scenario_id', 'zone_name', 'timestamp'])['density']
+    for h in horizons:
+        X_train, y_train, X_test, y_test = splits[h]
+        rows = df.loc[pd.concat([y_train, y_test]).index]
+        # Every target is the same zone's reading h steps later in the same scenario
+        later = pd.MultiIndex.from_arrays([
+            rows['scenario_id'], rows['zone_name'], rows['timestamp'] + pd.Timedelta(seconds=h * FORECAST_STEP_SECONDS)
+        ])
+        assert later.isin(readings.index).all()
+        assert (readings.loc[later].to_numpy() == pd.concat([y_train, y_test]).to_numpy()).all()
+        # Each scenario's last h readings per zone have no target, and its first has no 20s lag
+        assert (rows.groupby(['scenario_id', 'zone_name'], observed=True).size() == ticks - h - 1).all()
+
+    # The lag features do not reach back into the previous scenario either
+    first = df.groupby(['scenario_id', 'zone_name'], observed=True).head(1)
+    assert first['density_lag_20s'].isna().all()
+
+    X_train, y_train, X_test, y_test = splits[1]
+    model = train_member({**ENSEMBLE_PARAMS[0], 'n_estimators': 20}, X_train, y_train, X_test, y_test, n_jobs=1)
+    assert len(model.predict(X_test)) == len(y_test)
@@ -0,0 +1,65 @@
+import json
+import random
+import pytest
+
+import time_series_data_
+from snapshot_io import SnapshotWriter, read_snapshot_header, read_snapshots
+
+@pytest.fixture(scope="module")
+def simulation():
+    random.seed(11)
+    base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+    snapshots = time_series_data_.simulate_snapshots(initial_users, zones)[:8]
+    return base_event_data, initial_users, snapshots
+
+@pytest.mark.parametrize("file_name", ["snapshots.jsonl", "snapshots.jsonl.gz"])
+def test_snapshots_round_trip(simulation, tmp_path, file_name):
+    base_event_data, initial_users, snapshots = simulation
+    path = tmp_path / file_name
+    with SnapshotWriter(path, base_event_data['event'], initial_users) as writer:
+        assert list(writer.record(iter(snapshots))) == snapshots
+    assert writer.count == len(snapshots)
+
+    header = read_snapshot_header(path)
+    assert header['event'] == base_event_data['event']
+    assert 'email' in header['users'][0] and 'preferences' not in header['users'][0]
+
+    restored = list(read_snapshots(path))
+    assert [s['timestamp'] for s in restored] == [s['timestamp'] for s in snapshots]
+    for original, copy in zip(snapshots, restored):
+        for user, restored_user in zip(original['users'], copy['users']):
+            assert {k: v for k, v in restored_user.items() if k != 'location'} == {k: v for k, v in user.items() if k != 'location'}
+            assert restored_user['location'] == pytest.approx(user['location'], abs=1e-7)
+
+def test_identity_is_stored_once(simulation, tmp_path):
+    base_event_data, initial_users, snapshots = simulation
+    path = tmp_path / "snapshots.jsonl"
+    with SnapshotWriter(path, base_event_data['event'], initial_users) as writer:
+        for snapshot in snapshots:
+            writer.write(snapshot)
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == len(snapshots) + 1
+    assert set(json.loads(lines[1])) == {'timestamp', 'zone', 'latitude', 'longitude'}
+    assert initial_users[0]['email'] not in '\n'.join(lines[1:])
+
+def test_csv_from_snapshot_file_matches_simulation(simulation, tmp_path):
+    base_event_data, initial_users, snapshots = simulation
+    path = tmp_path / "snapshots.jsonl"
+    with SnapshotWriter(path, base_event_data['event'], initial_users) as writer:
+        time_series_data_.convert_timeseries_to_csv({**base_event_data, 'snapshots': writer.record(snapshots)}, tmp_path / "direct.csv")
+    header = read_snapshot_header(path)
+    time_series_data_.convert_timeseries_to_csv({'event': header['event'], 'snapshots': read_snapshots(path)}, tmp_path / "replayed.csv")
+    assert (tmp_path / "replayed.csv").read_text() == (tmp_path / "direct.csv").read_text()
+
+def test_users_out_of_header_order_are_rejected(simulation, tmp_path):
+    base_event_data, initial_users, snapshots = simulation
+    reordered = {**snapshots[0], 'users': snapshots[0]['users'][1:] + snapshots[0]['users'][:1]}
+    replaced = {**snapshots[0], 'users': snapshots[0]['users'][:-1] + [{**snapshots[0]['users'][0], 'user_id': 'someone-else'}]}
+    with SnapshotWriter(tmp_path / "snapshots.jsonl", base_event_data['event'], initial_users) as writer:
+        for snapshot in [reordered, replaced, {**snapshots[0], 'users': snapshots[0]['users'][:-1]}]:
+            with pytest.raises(ValueError, match="expected"):
+                writer.write(snapshot)
+        writer.write(snapshots[0])
+    assert writer.count == 1
+    assert len(list(read_snapshots(tmp_path / "snapshots.jsonl"))) == 1
@@ -0,0 +1,48 @@
+import random
+import pandas as pd
+import pytest
+
+import time_series_data_
+
+@pytest.fixture(scope="module")
+def timeseries_data():
+    random.seed(5)
+    base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+    snapshots = time_series_data_.simulate_snapshots(initial_users, zones)[:12]
+    return {**base_event_data, "snapshots": snapshots}
+
+def test_csv_rows_match_per_zone_counts(timeseries_data, tmp_path):
+    output_csv = tmp_path / "training.csv"
+    time_series_data_.convert_timeseries_to_csv(timeseries_data, output_csv)
+    df = pd.read_csv(output_csv)
+
+    zones = timeseries_data['event']['zones']
+    assert list(df.columns) == time_series_data_.CSV_HEADER
+    assert len(df) == len(timeseries_data['snapshots']) * len(zones)
+    for snapshot, (_, rows) in zip(timeseries_data['snapshots'], df.groupby('timestamp', sort=False)):
+        assert (rows['timestamp'] == snapshot['timestamp']).all()
+        for zone, row in zip(zones, rows.itertuples()):
+            in_zone = [u['user_role'] for u in snapshot['users'] if u['user_zone'] == zone['zone_name']]
+            assert (row.zone_name, row.x_coord, row.y_coord) == (zone['zone_name'], zone['x_coord'], zone['y_coord'])
+            assert (row.admin_count, row.user_count, row.invitee_count, row.crowd_count) == (
+                in_zone.count('admin'), in_zone.count('user'), in_zone.count('invitees'), len(in_zone))
+
+def test_zone_count_ticks_write_the_same_rows(timeseries_data, tmp_path):
+    zone_index = {z['zone_name']: i for i, z in enumerate(timeseries_data['event']['zones'])}
+    ticks = [{'timestamp': s['timestamp'], 'zone_counts': time_series_data_.snapshot_zone_counts(s['users'], zone_index)}
+             for s in timeseries_data['snapshots']]
+    time_series_data_.convert_timeseries_to_csv(timeseries_data, tmp_path / "snapshots.csv")
+    time_series_data_.convert_timeseries_to_csv({**timeseries_data, 'snapshots': ticks}, tmp_path / "ticks.csv")
+    assert (tmp_path / "ticks.csv").read_text() == (tmp_path / "snapshots.csv").read_text()
+
+def test_parquet_output_matches_csv(timeseries_data, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(time_series_data_, "PARQUET_ROW_GROUP_SNAPSHOTS", 5)
+    time_series_data_.convert_timeseries_to_csv(timeseries_data, tmp_path / "training.csv")
+    time_series_data_.convert_timeseries_to_csv(timeseries_data, tmp_path / "training.parquet")
+
+    csv_df = pd.read_csv(tmp_path / "training.csv", parse_dates=['timestamp'])
+    parquet_df = pd.read_parquet(tmp_path / "training.parquet")
+    assert isinstance(parquet_df['zone_name'].dtype, pd.CategoricalDtype)
+    assert parquet_df['x_coord'].dtype == 'int16'
+    pd.testing.assert_frame_equal(parquet_df.astype(csv_df.dtypes.to_dict()), csv_df)
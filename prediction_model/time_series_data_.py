@@ -1,18 +1,46 @@
 # improved_timeseries_mock_data.py
-import json
 import csv
 import random
 import uuid
 import copy
 from datetime import datetime, timedelta
 import numpy as np
+from crowd_simulation import iter_snapshots_vectorized, iter_zone_counts_vectorized
+from snapshot_io import SnapshotWriter
+from feature_pipeline import FORECAST_STEP_SECONDS
 
 # --- Main Configuration ---
 SIMULATION_DURATION_MINUTES = 30
-SNAPSHOT_INTERVAL_SECONDS = 30
+SNAPSHOT_INTERVAL_SECONDS = FORECAST_STEP_SECONDS  # The models take each training row as one forecast step
 NUM_USERS = 400
-OUTPUT_JSON_FILE = 'timeseries_event_data.json'
+GRID_ROWS, GRID_COLS = 4, 5  # Zone grid (at most 26 columns, named A-Z)
+BASE_ZONE_CAPACITY = 30  # Base capacity per zone, scaled by zone type
+OUTPUT_SNAPSHOT_FILE = 'timeseries_event_data.jsonl'  # JSON Lines, see snapshot_io (gzip-compressed if it ends in .gz); None to skip it
 OUTPUT_CSV_FILE = 'full_training_data.csv'
+SIMULATION_ENGINE = 'python'  # 'python' (per-user loop below) or 'vectorized' (crowd_simulation, for large NUM_USERS)
+SIMULATION_SEED = 42  # Seed of the vectorized engine's random Generator
+PARQUET_ROW_GROUP_SNAPSHOTS = 500  # Snapshots per row group when the training data is written as Parquet
+
+CSV_HEADER = ['timestamp', 'zone_name', 'x_coord', 'y_coord', 'admin_count', 'user_count', 'invitee_count', 'crowd_count']
+COUNT_ROLES = {'admin': 0, 'user': 1, 'invitees': 2}  # Role -> column of the admin/user/invitee counts
+
+# Define zone types and their properties
+ZONE_TYPES = {
+    'entrance': {'capacity_multiplier': 1.5, 'base_attractiveness': 0.8},
+    'main_hall': {'capacity_multiplier': 2.0, 'base_attractiveness': 0.9},
+    'exhibition': {'capacity_multiplier': 1.2, 'base_attractiveness': 0.7},
+    'food_court': {'capacity_multiplier': 1.3, 'base_attractiveness': 0.6},
+    'restroom': {'capacity_multiplier': 0.8, 'base_attractiveness': 0.3},
+    'corridor': {'capacity_multiplier': 1.0, 'base_attractiveness': 0.4}
+}
+
+# Assign zone types based on (row, col) position; unlisted cells are exhibition (or corridor)
+ZONE_TYPE_MAP = {
+    (0, 0): 'entrance', (0, 4): 'entrance',  # Corner entrances
+    (0, 2): 'main_hall', (1, 2): 'main_hall',  # Central main halls
+    (2, 1): 'food_court', (2, 3): 'food_court',  # Food courts
+    (3, 0): 'restroom', (3, 4): 'restroom',  # Restrooms at bottom corners
+}
 
 # Using a fixed seed for reproducibility
 random.seed(42)
@@ -34,7 +62,6 @@ def generate_base_data():
     }
 
     # --- Zone Grid Generation with Attributes ---
-    GRID_ROWS, GRID_COLS = 4, 5
     START_X, X_STEP = 0, 2
     START_Y, Y_STEP = 0, 2
     cell_geo_height = (BIEC_LAT_MAX - BIEC_LAT_MIN) / GRID_ROWS
@@ -43,24 +70,6 @@ def generate_base_data():
     zones = []
     col_letters = [chr(ord('A') + i) for i in range(GRID_COLS)]
     
-    # Define zone types and their properties
-    zone_types = {
-        'entrance': {'capacity_multiplier': 1.5, 'base_attractiveness': 0.8},
-        'main_hall': {'capacity_multiplier': 2.0, 'base_attractiveness': 0.9},
-        'exhibition': {'capacity_multiplier': 1.2, 'base_attractiveness': 0.7},
-        'food_court': {'capacity_multiplier': 1.3, 'base_attractiveness': 0.6},
-        'restroom': {'capacity_multiplier': 0.8, 'base_attractiveness': 0.3},
-        'corridor': {'capacity_multiplier': 1.0, 'base_attractiveness': 0.4}
-    }
-    
-    # Assign zone types based on position
-    zone_type_map = {
-        (0, 0): 'entrance', (0, 4): 'entrance',  # Corner entrances
-        (0, 2): 'main_hall', (1, 2): 'main_hall',  # Central main halls
-        (2, 1): 'food_court', (2, 3): 'food_court',  # Food courts
-        (3, 0): 'restroom', (3, 4): 'restroom',  # Restrooms at bottom corners
-    }
-    
     for r in range(GRID_ROWS):
         for c in range(GRID_COLS):
             cell_lat_min = BIEC_LAT_MIN + (r * cell_geo_height)
@@ -71,20 +80,18 @@ def generate_base_data():
             }
             
             # Determine zone type
-            zone_type = zone_type_map.get((r, c), 'exhibition')
+            zone_type = ZONE_TYPE_MAP.get((r, c), 'exhibition')
             if zone_type == 'exhibition' and (r == 1 or r == 2) and (c == 1 or c == 3):
                 zone_type = 'corridor'
             
-            zone_props = zone_types[zone_type]
-            base_capacity = 30  # Base capacity per zone
-            
+            zone_props = ZONE_TYPES[zone_type]
             zones.append({
                 "zone_id": f"z{r+1}h{col_letters[c].lower()}",
                 "zone_name": f"Z{r+1}H{col_letters[c]}",
                 "x_coord": START_X + (c * X_STEP),
                 "y_coord": START_Y + (r * Y_STEP),
                 "zone_type": zone_type,
-                "capacity": int(base_capacity * zone_props['capacity_multiplier']),
+                "capacity": int(BASE_ZONE_CAPACITY * zone_props['capacity_multiplier']),
                 "base_attractiveness": zone_props['base_attractiveness'],
                 "_geo_bbox": geo_bbox
             })
@@ -177,11 +184,10 @@ def calculate_zone_attractiveness(zone, current_occupancy, time_of_day_minutes,
     
     return max(0.1, min(1.0, total_attractiveness))
 
-def simulate_snapshots(base_users, zones):
-    """Simulates user movement over time with realistic behavioral patterns."""
+def iter_snapshots(base_users, zones, start_time=None):
+    """Simulates user movement over time with realistic behavioral patterns, yielding each snapshot as it is produced."""
     num_snapshots = (SIMULATION_DURATION_MINUTES * 60) // SNAPSHOT_INTERVAL_SECONDS
-    start_time = datetime.now()
-    all_snapshots = []
+    start_time = start_time or datetime.now()
   
     zone_map = {z['zone_name']: z for z in zones}
   
@@ -290,65 +296,157 @@ def simulate_snapshots(base_users, zones):
             clean_user = {k: v for k, v in user.items() if k not in ['preferences', 'time_in_current_zone', 'zones_visited']}
             snapshot_users.append(clean_user)
         
-        all_snapshots.append({
+        yield {
             "timestamp": snapshot_time.strftime('%Y-%m-%d %H:%M:%S'),
             "users": snapshot_users
-        })
+        }
         
         current_users = next_users_state
-    
-    return all_snapshots
 
-def convert_timeseries_to_csv(timeseries_data):
-    """Processes the full timeseries JSON and creates the final training CSV."""
+def simulate_snapshots(base_users, zones, start_time=None):
+    """All snapshots of iter_snapshots as a list."""
+    return list(iter_snapshots(base_users, zones, start_time))
+
+def iter_simulation(base_users, zones, start_time=None):
+    """Snapshots of the configured SIMULATION_ENGINE, one at a time (starting at `start_time`, default now)."""
+    if SIMULATION_ENGINE == 'vectorized':
+        return iter_snapshots_vectorized(
+            base_users, zones, SIMULATION_DURATION_MINUTES, SNAPSHOT_INTERVAL_SECONDS,
+            seed=SIMULATION_SEED, start_time=start_time
+        )
+    if SIMULATION_ENGINE != 'python':
+        raise ValueError(f"Unknown SIMULATION_ENGINE '{SIMULATION_ENGINE}' (expected 'python' or 'vectorized').")
+    return iter_snapshots(base_users, zones, start_time)
+
+def run_simulation(base_users, zones, start_time=None):
+    """Simulate with the configured SIMULATION_ENGINE (snapshots start at `start_time`, default now)."""
+    return list(iter_simulation(base_users, zones, start_time))
+
+def iter_zone_counts(base_users, zones, start_time=None):
+    """
+    Ticks of the configured SIMULATION_ENGINE as {"timestamp", "zone_counts"} (zones x
+    admin/user/invitees counts), for convert_timeseries_to_csv when no snapshot file is
+    written. The vectorized engine counts straight from its arrays without building the
+    per-user snapshot dicts; the python engine's snapshots are counted as they come.
+    """
+    if SIMULATION_ENGINE == 'vectorized':
+        return iter_zone_counts_vectorized(
+            base_users, zones, SIMULATION_DURATION_MINUTES, SNAPSHOT_INTERVAL_SECONDS,
+            seed=SIMULATION_SEED, start_time=start_time
+        )
+    zone_index = {z['zone_name']: i for i, z in enumerate(zones)}
+    return (
+        {'timestamp': snapshot['timestamp'], 'zone_counts': snapshot_zone_counts(snapshot['users'], zone_index)}
+        for snapshot in iter_simulation(base_users, zones, start_time)
+    )
+
+def snapshot_zone_counts(users, zone_index):
+    """Users per (zone, role) of one snapshot in a single pass: len(zone_index) x 3 (admin, user, invitees)."""
+    n_roles = len(COUNT_ROLES)
+    flat = np.fromiter(
+        (zone_index[user['user_zone']] * n_roles + COUNT_ROLES[user['user_role']] for user in users),
+        dtype=np.int64, count=len(users)
+    )
+    return np.bincount(flat, minlength=len(zone_index) * n_roles).reshape(-1, n_roles)
+
+def _zone_counts(snapshot, zone_index):
+    """Counts of a snapshot or of an iter_zone_counts tick."""
+    counts = snapshot.get('zone_counts')
+    return counts if counts is not None else snapshot_zone_counts(snapshot['users'], zone_index)
+
+def write_training_parquet(all_zones, all_snapshots, output_file):
+    """Streams the training rows to a Parquet file, one row group per PARQUET_ROW_GROUP_SNAPSHOTS snapshots."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from e
+
+    # Typed columns: datetime timestamps, dictionary-encoded zone names, small integers
+    schema = pa.schema([
+        ('timestamp', pa.timestamp('s')), ('zone_name', pa.dictionary(pa.int16(), pa.string())),
+        ('x_coord', pa.int16()), ('y_coord', pa.int16()),
+        *[(name, pa.int32()) for name in CSV_HEADER[4:]]
+    ])
+    zone_index = {z['zone_name']: i for i, z in enumerate(all_zones)}
+    zone_names = pa.array(list(zone_index))
+    x = np.array([z['x_coord'] for z in all_zones], dtype=np.int16)
+    y = np.array([z['y_coord'] for z in all_zones], dtype=np.int16)
+
+    def write_batch(writer, timestamps, counts):
+        n = len(timestamps)
+        counts = np.stack(counts).reshape(-1, len(COUNT_ROLES)).astype(np.int32)
+        writer.write_table(pa.table([
+            pa.array(np.repeat(np.array(timestamps, dtype='datetime64[s]'), len(all_zones))),
+            pa.DictionaryArray.from_arrays(pa.array(np.tile(np.arange(len(all_zones), dtype=np.int16), n)), zone_names),
+            pa.array(np.tile(x, n)), pa.array(np.tile(y, n)),
+            *[pa.array(counts[:, r]) for r in range(counts.shape[1])],
+            pa.array(counts.sum(axis=1, dtype=np.int32)),
+        ], schema=schema))
+
+    with pq.ParquetWriter(output_file, schema) as writer:
+        timestamps, counts = [], []
+        for snapshot in all_snapshots:
+            timestamps.append(snapshot['timestamp'])
+            counts.append(_zone_counts(snapshot, zone_index))
+            if len(timestamps) == PARQUET_ROW_GROUP_SNAPSHOTS:
+                write_batch(writer, timestamps, counts)
+                timestamps, counts = [], []
+        if timestamps:
+            write_batch(writer, timestamps, counts)
+
+def convert_timeseries_to_csv(timeseries_data, output_file=None):
+    """
+    Processes the full timeseries JSON and creates the final training CSV (OUTPUT_CSV_FILE
+    unless `output_file` is given; a .parquet file is written as typed Parquet instead).
+    Each snapshot is counted in one pass and its rows are written straight away; the
+    snapshots can also be iter_zone_counts ticks, which are already counted.
+    """
+    output_file = str(output_file or OUTPUT_CSV_FILE)
     all_zones = timeseries_data['event']['zones']
     all_snapshots = timeseries_data['snapshots']
-  
-    header = ['timestamp', 'zone_name', 'x_coord', 'y_coord', 'admin_count', 'user_count', 'invitee_count', 'crowd_count']
-    csv_rows = [header]
+    if output_file.endswith('.parquet'):
+        write_training_parquet(all_zones, all_snapshots, output_file)
+        return
 
-    for snapshot in all_snapshots:
-        timestamp = snapshot['timestamp']
-        users_in_snapshot = snapshot['users']
-      
-        for zone in all_zones:
-            zone_name = zone['zone_name']
-            counts = {'admin': 0, 'user': 0, 'invitees': 0}
-          
-            for user in users_in_snapshot:
-                if user['user_zone'] == zone_name:
-                    counts[user['user_role']] += 1
-          
-            total_count = sum(counts.values())
-            csv_rows.append([
-                timestamp, zone_name, zone['x_coord'], zone['y_coord'],
-                counts['admin'], counts['user'], counts['invitees'], total_count
-            ])
-          
-    with open(OUTPUT_CSV_FILE, 'w', newline='') as f:
+    zone_index = {z['zone_name']: i for i, z in enumerate(all_zones)}
+    zone_columns = [(z['zone_name'], z['x_coord'], z['y_coord']) for z in all_zones]
+
+    with open(output_file, 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerows(csv_rows)
+        writer.writerow(CSV_HEADER)
+        for snapshot in all_snapshots:
+            timestamp = snapshot['timestamp']
+            counts = _zone_counts(snapshot, zone_index).tolist()
+            writer.writerows(
+                [timestamp, zone_name, x, y, admin, user, invitees, admin + user + invitees]
+                for (zone_name, x, y), (admin, user, invitees) in zip(zone_columns, counts)
+            )
 
 def main():
     """Main function to run the entire automation pipeline."""
     print("Step 1: Generating base event data with zone types and user preferences...")
     base_event_data, initial_users, zones_with_helpers = generate_base_data()
   
+    # Each snapshot is written to the snapshot file and counted into the CSV as it is simulated,
+    # so no more than one tick is held in memory
     print(f"Step 2: Simulating realistic user movement for {SIMULATION_DURATION_MINUTES} minutes...")
-    snapshots = simulate_snapshots(initial_users, zones_with_helpers)
-  
-    full_timeseries_data = {**base_event_data, "snapshots": snapshots}
-  
-    print(f"Step 3: Writing full time-series data to '{OUTPUT_JSON_FILE}'...")
-    with open(OUTPUT_JSON_FILE, 'w') as f:
-        json.dump(full_timeseries_data, f, indent=2)
-      
-    print(f"Step 4: Converting time-series data to final training CSV '{OUTPUT_CSV_FILE}'...")
-    convert_timeseries_to_csv(full_timeseries_data)
+    if not OUTPUT_SNAPSHOT_FILE:
+        # Without a snapshot file only the per-zone counts are needed, not per-user snapshots
+        print(f"        streaming training rows to '{OUTPUT_CSV_FILE}'...")
+        convert_timeseries_to_csv({**base_event_data, "snapshots": iter_zone_counts(initial_users, zones_with_helpers)})
+        print("\n--- Automation Complete! ---")
+        print(f"Training data written to {OUTPUT_CSV_FILE}")
+        return
+
+    print(f"        streaming snapshots to '{OUTPUT_SNAPSHOT_FILE}' and training rows to '{OUTPUT_CSV_FILE}'...")
+    with SnapshotWriter(OUTPUT_SNAPSHOT_FILE, base_event_data['event'], initial_users) as writer:
+        snapshots = writer.record(iter_simulation(initial_users, zones_with_helpers))
+        convert_timeseries_to_csv({**base_event_data, "snapshots": snapshots})
   
     print("\n--- Automation Complete! ---")
-    print(f"Two files have been generated with improved behavioral simulation:")
-    print(f"1. {OUTPUT_JSON_FILE}")
+    print(f"Two files have been generated with improved behavioral simulation ({writer.count} snapshots):")
+    print(f"1. {OUTPUT_SNAPSHOT_FILE} (read back with snapshot_io.read_snapshots)")
     print(f"2. {OUTPUT_CSV_FILE}")
 
 if __name__ == "__main__":
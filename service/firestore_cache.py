@@ -0,0 +1,183 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger("firestore_cache", "logs/crowdguard.log")
+
+DEFAULT_TTL_SECONDS = 30
+# Slow-changing collections are kept longer
+COLLECTION_TTLS = {
+    "events": 600,
+    "documents": 600,
+    "zones": 3600,
+}
+MAX_CACHED_DOCUMENTS = 4096
+MAX_CACHED_QUERIES = 256
+
+class CachedFirestoreService:
+    """
+    Read-through cache in front of a FirestoreService.
+
+    `get_document_by_id` and `get_all_documents` results are kept in memory for the
+    collection's TTL (COLLECTION_TTLS, else `default_ttl`), with least-recently-used
+    eviction beyond `max_documents` documents and `max_queries` collection reads.
+    Writes made through this wrapper drop the cached entries of their collection.
+
+    `watch(collection)` also registers a Firestore on_snapshot listener so that changes
+    made by other writers drop the affected entries as soon as Firestore reports them;
+    for watched collections the TTL is only a safety net. Those changes also advance
+    FirestoreService.data_version, which otherwise only counts this process's writes.
+
+    Cached results are shared between callers and must not be modified. Any other
+    FirestoreService method is passed through uncached.
+    """
+
+    def __init__(self, service, ttls: Dict[str, float] = COLLECTION_TTLS, default_ttl: float = DEFAULT_TTL_SECONDS,
+                 max_documents: int = MAX_CACHED_DOCUMENTS, max_queries: int = MAX_CACHED_QUERIES,
+                 watch: Iterable[str] = ()) -> None:
+        self.service = service
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.max_documents = max_documents
+        self.max_queries = max_queries
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._queries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        # Bumped on every invalidation, so a read that raced with one is not stored
+        self._generations: Dict[str, int] = {}
+        self._watches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        for collection_name in watch:
+            self.watch(collection_name)
+
+    def __getattr__(self, name):
+        if name == "service":
+            raise AttributeError(name)
+        return getattr(self.service, name)
+
+    def _ttl(self, collection_name: str) -> float:
+        return self.ttls.get(collection_name, self.default_ttl)
+
+    def _lookup(self, entries: OrderedDict, key) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del entries[key]
+            self.misses += 1
+            return False, None
+
+    def _store(self, entries: OrderedDict, key, value, collection_name: str, generation: int, max_entries: int) -> None:
+        with self._lock:
+            if self._generations.get(collection_name, 0) != generation:
+                return
+            entries[key] = (time.monotonic() + self._ttl(collection_name), value)
+            entries.move_to_end(key)
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+
+    def get_document_by_id(self, collection_name: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Cached FirestoreService.get_document_by_id (documents that do not exist are not cached)"""
+        key = (collection_name, doc_id)
+        found, document = self._lookup(self._documents, key)
+        if found:
+            return document
+        generation = self._generations.get(collection_name, 0)
+        document = self.service.get_document_by_id(collection_name, doc_id)
+        if document is not None:
+            self._store(self._documents, key, document, collection_name, generation, self.max_documents)
+        return document
+
+    def get_all_documents(self, collection_name: str, where=None, select=None, limit=None):
+        """Cached FirestoreService.get_all_documents"""
+        key = (collection_name, repr((where, select, limit)))
+        found, documents = self._lookup(self._queries, key)
+        if found:
+            return documents
+        generation = self._generations.get(collection_name, 0)
+        documents = self.service.get_all_documents(collection_name, where=where, select=select, limit=limit)
+        self._store(self._queries, key, documents, collection_name, generation, self.max_queries)
+        return documents
+
+    def invalidate(self, collection_name: Optional[str] = None, doc_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached entries: everything, one collection, or some documents of it. Collection
+        reads are always dropped whole, since any change can alter their results.
+        """
+        with self._lock:
+            if collection_name is None:
+                names = set(self._generations) | {key[0] for key in self._documents} | {key[0] for key in self._queries}
+                for name in names:
+                    self._generations[name] = self._generations.get(name, 0) + 1
+                self._documents.clear()
+                self._queries.clear()
+                return
+
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            if doc_ids is None:
+                for key in [key for key in self._documents if key[0] == collection_name]:
+                    del self._documents[key]
+            else:
+                for doc_id in doc_ids:
+                    self._documents.pop((collection_name, doc_id), None)
+            for key in [key for key in self._queries if key[0] == collection_name]:
+                del self._queries[key]
+
+    # --- Writes: passed through, then the collection's cached entries are dropped ---
+
+    def add_document(self, collection_name: str, data: Dict[str, Any]) -> Optional[str]:
+        doc_id = self.service.add_document(collection_name, data)
+        self.invalidate(collection_name)
+        return doc_id
+
+    def update_document(self, collection_name: str, doc_id: str, data: Dict[str, Any]) -> bool:
+        updated = self.service.update_document(collection_name, doc_id, data)
+        self.invalidate(collection_name, [doc_id])
+        return updated
+
+    def delete_document(self, collection_name: str, doc_id: str) -> bool:
+        deleted = self.service.delete_document(collection_name, doc_id)
+        self.invalidate(collection_name, [doc_id])
+        return deleted
+
+    def bulk_add(self, collection_name: str, documents) -> Dict[str, Any]:
+        result = self.service.bulk_add(collection_name, documents)
+        self.invalidate(collection_name)
+        return result
+
+    def bulk_update(self, collection_name: str, updates) -> Dict[str, Any]:
+        result = self.service.bulk_update(collection_name, updates)
+        self.invalidate(collection_name)
+        return result
+
+    def bulk_delete(self, collection_name: str, doc_ids) -> Dict[str, Any]:
+        result = self.service.bulk_delete(collection_name, doc_ids)
+        self.invalidate(collection_name)
+        return result
+
+    # --- Change listeners ---
+
+    def watch(self, collection_name: str) -> None:
+        """Invalidate this collection's entries whenever Firestore reports a change to it"""
+        if collection_name in self._watches:
+            return
+
+        def on_change(documents, changes, read_time):  # Called from the listener's thread
+            self.invalidate(collection_name, [change.document.id for change in changes])
+            type(self.service).record_external_change()
+
+        self._watches[collection_name] = self.service.db.collection(collection_name).on_snapshot(on_change)
+        logger.info(f"Watching {collection_name} for changes")
+
+    def close(self) -> None:
+        """Stop every change listener"""
+        for collection_name, watch in list(self._watches.items()):
+            watch.unsubscribe()
+            del self._watches[collection_name]
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+
+# The prediction_model scripts import each other by module name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'prediction_model'))
+from artifacts import load_artifacts
+from feature_pipeline import OnlineFeatureStore
+from forecasting import rollout_zones, direct_forecast_zones, covering_forecast_mode, FORECAST_MODES, TREND_WINDOW
+
+MODEL_ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), '..', 'prediction_model', 'crowd_model')
+LOGICAL_ZONE_AREA = 4.0
+RING_BUFFER_SIZE = 64  # Readings kept per zone; must be >= TREND_WINDOW
+
+class ForecastService:
+    """
+    Resident crowd-density forecaster.
+
+    The model artifacts are loaded once, and the latest RING_BUFFER_SIZE density readings
+    of every zone are kept in an OnlineFeatureStore (fixed-size NumPy ring buffers).
+    Forecasts only read that rolling state, so their cost does not grow with how long
+    the event has been running.
+
+    Without an explicit `mode`, each forecast uses the direct multi-horizon models when
+    the artifacts have some reaching the requested horizon (one batched prediction
+    whatever the horizon), and the 'recursive' 10-second rollout otherwise.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, artifact_dir: str = MODEL_ARTIFACT_DIR, window: int = RING_BUFFER_SIZE, mode: str = None):
+        if self._initialized:
+            return
+        if window < TREND_WINDOW:
+            raise ValueError(f"Ring buffer size must be at least {TREND_WINDOW} readings.")
+
+        self.artifacts = load_artifacts(artifact_dir)
+        self.models = self.artifacts.predictor
+        self.horizon_models = self.artifacts.horizon_predictors() if len(self.artifacts.horizons) > 1 else None
+        self.mode = mode
+        if mode is not None:
+            self._check_mode(mode)
+        self.zone_features = self.artifacts.zone_features
+        self.zone_categories = self.artifacts.zone_categories
+
+        self.store = OnlineFeatureStore(self.zone_features, self.zone_categories, window=window)
+        self.zones = self.store.zones
+        self._lock = threading.Lock()
+        self._initialized = True
+
+    def _check_mode(self, mode):
+        if mode not in FORECAST_MODES:
+            raise ValueError(f"Unknown forecast mode '{mode}' (expected one of {', '.join(FORECAST_MODES)}).")
+        if mode == 'direct' and not self.horizon_models:
+            raise ValueError("The loaded model artifacts have no direct multi-horizon models.")
+
+    def update(self, timestamp, zone: str, crowd_count: float) -> None:
+        """Record a new crowd count reading for a zone."""
+        self.update_many([(timestamp, zone, crowd_count)])
+
+    def update_many(self, observations) -> int:
+        """
+        Record several (timestamp, zone, crowd_count) readings; returns how many were stored.
+        The batch is validated first (see OnlineFeatureStore.validate): on a ValueError
+        nothing is stored.
+        """
+        readings = [(zone, timestamp, float(crowd_count) / LOGICAL_ZONE_AREA) for timestamp, zone, crowd_count in observations]
+        with self._lock:
+            return self.store.update_many(readings)
+
+    def forecast(self, forecast_horizon_seconds: int, zones=None, mode: str = None) -> dict:
+        """
+        Forecast density for the given zones (all zones by default).
+        `mode` ('recursive' or 'direct') overrides the service default for this call.
+        'direct' fails for a horizon beyond the longest direct model.
+
+        Returns:
+            dict: zone name -> {'prediction', 'confidence_interval', 'trend'}, or
+                  {'prediction': None, 'error': ...} for zones without enough readings yet.
+        """
+        mode = mode or self.mode or covering_forecast_mode(self.artifacts.horizons, forecast_horizon_seconds)
+        self._check_mode(mode)
+        zones = list(zones) if zones is not None else self.zones
+        unknown = [zone for zone in zones if zone not in self.zones]
+        if unknown:
+            raise ValueError(f"Unknown zone(s): {', '.join(unknown)}")
+
+        results = {}
+        with self._lock:
+            ready = [zone for zone in zones if self.store.count(zone) >= TREND_WINDOW]
+            densities, last_timestamps = self.store.recent(ready, TREND_WINDOW)
+
+        for zone in zones:
+            if zone not in ready:
+                results[zone] = {'prediction': None, 'error': f"Not enough historical data for zone '{zone}'"}
+        if ready:
+            forecaster, models = (direct_forecast_zones, self.horizon_models) if mode == 'direct' else (rollout_zones, self.models)
+            results.update(forecaster(
+                models, ready, densities, last_timestamps,
+                forecast_horizon_seconds, self.zone_features, self.zone_categories
+            ))
+        return {zone: results[zone] for zone in zones}
@@ -1,30 +1,234 @@
 import json
 import os
+import threading
+
+from utils.logger import setup_logger
+
+logger = setup_logger("mock_data_service", "logs/crowdguard.log")
+
+# Resolve absolute path to mock_data.json
+MOCK_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'mock_data.json')
+
+# Primary key field of each collection's records
+ID_FIELDS = {
+    "events": "event_id",
+    "users": "user_id",
+    "alerts": "alert_id",
+    "incidents": "incident_id",
+    "lost_and_found": "item_id",
+    "documents": "doc_id",
+}
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; write through MockDataService")
+
+class CollectionView(list):
+    """
+    Read-only list of records (no copy; the store appends to it, so it reflects later
+    writes). A real list, so it can go straight to json.dumps or an API response.
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+class RecordView(dict):
+    """Read-only record (nested dicts and lists are read-only too); a real dict for json.dumps."""
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+def _freeze(value):
+    """Read-only version of a JSON-like value; values that are already read-only are kept as-is."""
+    if isinstance(value, (RecordView, CollectionView)):
+        return value
+    if isinstance(value, dict):
+        return RecordView((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return CollectionView(_freeze(item) for item in value)
+    return value
+
+class MockDataStore:
+    """
+    mock_data.json parsed once per process and shared by every MockDataService.
+
+    Each access stats the file and re-parses it only when its modification time or size
+    changed, so a replaced snapshot is picked up without a restart (`generation` counts
+    the loads). If the new file cannot be parsed, the previous data keeps being served.
+
+    Readers get the parsed data itself, built read-only as it is parsed: collections are
+    CollectionViews and records RecordViews, plain lists and dicts to json.dumps but
+    raising TypeError on any change. Writes go through `add`, `update` and `delete`,
+    which replace records instead of mutating them and notify listeners. Writes are not
+    saved to the file and are discarded when it is reloaded.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, path=MOCK_DATA_PATH):
+        if self._initialized:
+            return
+        self.path = path
+        self.generation = 0
+        self.write_version = 0
+        self._file_version = None
+        self._data = RecordView()
+        self._listeners = []
+        self.lock = threading.RLock()  # Held by loads and writes; hold it to build on the data and subscribe atomically
+        self._initialized = True
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        file_version = self._stat()
+        if file_version == self._file_version and self.generation:
+            return
+        with self.lock:
+            if file_version == self._file_version and self.generation:
+                return
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f, object_hook=_freeze)
+            except (OSError, ValueError) as e:
+                if not self.generation:
+                    raise
+                logger.warning(f"Could not reload {self.path}, keeping the previous data: {e}")
+                self._file_version = file_version
+                return
+            self._data = _freeze(data)
+            self._file_version = file_version
+            self.generation += 1
+            logger.info(f"Loaded {self.path} (generation {self.generation})")
+
+    def version(self):
+        """Changes whenever the file is reloaded or a record is written."""
+        self._refresh()
+        return (self.generation, self.write_version)
+
+    def data(self):
+        """All collections, as a read-only RecordView of CollectionViews."""
+        self._refresh()
+        return self._data
+
+    def collection(self, name):
+        return self.data().get(name, CollectionView([]))
+
+    # --- Writes ---
+    # Every write calls the subscribed listeners with (collection, old_record, new_record);
+    # old_record is None for an add and new_record is None for a delete.
+
+    def subscribe(self, listener):
+        with self.lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self.lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, collection, old, new):
+        self.write_version += 1
+        for listener in list(self._listeners):
+            listener(collection, old, new)
+
+    def _find(self, collection, record_id):
+        id_field = ID_FIELDS.get(collection)
+        for i, record in enumerate(self._data.get(collection, [])):
+            if id_field and record.get(id_field) == record_id:
+                return i, record
+        return None, None
+
+    def add(self, collection, record):
+        self._refresh()
+        with self.lock:
+            record = _freeze(record)
+            if collection not in self._data:
+                self._data = RecordView({**self._data, collection: CollectionView()})
+            list.append(self._data[collection], record)
+            self._notify(collection, None, record)
+        return record
+
+    def update(self, collection, record_id, changes):
+        self._refresh()
+        with self.lock:
+            i, old = self._find(collection, record_id)
+            if old is None:
+                return None
+            new = RecordView({**old, **_freeze(changes)})
+            list.__setitem__(self._data[collection], i, new)
+            self._notify(collection, old, new)
+        return new
+
+    def delete(self, collection, record_id):
+        self._refresh()
+        with self.lock:
+            i, old = self._find(collection, record_id)
+            if old is None:
+                return False
+            list.__delitem__(self._data[collection], i)
+            self._notify(collection, old, None)
+        return True
 
 class MockDataService:
+    """Access to the mock event database; cheap to construct, all instances share one MockDataStore."""
+
     def __init__(self):
-        # Resolve absolute path to mock_data.json
-        mock_data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'mock_data.json')
-        with open(mock_data_path, 'r') as f:
-            self.mock_data = json.load(f)
+        self.store = MockDataStore()
+
+    @staticmethod
+    def data_version():
+        """Changes whenever mock_data.json is reloaded or a record is written."""
+        return MockDataStore().version()
+
+    @property
+    def mock_data(self):
+        return self.store.data()
 
     def get_users(self):
-        return self.mock_data.get("users", [])
+        return self.store.collection("users")
 
     def get_events(self):
-        return self.mock_data.get("events", [])
+        return self.store.collection("events")
 
     def get_incidents(self):
-        return self.mock_data.get("incidents", [])
+        return self.store.collection("incidents")
 
     def get_alerts(self):
-        return self.mock_data.get("alerts", [])
+        return self.store.collection("alerts")
 
     def get_documents(self):
-        return self.mock_data.get("documents", [])
+        return self.store.collection("documents")
 
     def get_lost_and_found(self):
-        return self.mock_data.get("lost_and_found", [])
-    
+        return self.store.collection("lost_and_found")
+
     def get_all_data(self):
-        return self.mock_data
+        return self.store.data()
+
+    def subscribe(self, listener):
+        self.store.subscribe(listener)
+
+    def add_record(self, collection, record):
+        """Append a record to a collection"""
+        return self.store.add(collection, record)
+
+    def update_record(self, collection, record_id, changes):
+        """Apply `changes` to the record with this id; returns the updated record or None if not found"""
+        return self.store.update(collection, record_id, changes)
+
+    def delete_record(self, collection, record_id):
+        """Remove the record with this id; returns whether it existed"""
+        return self.store.delete(collection, record_id)
@@ -0,0 +1,242 @@
+import json
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from service.mock_data_service import MockDataService
+
+# Canonical field name -> field in each collection's records
+FIELD_ALIASES = {
+    "users": {"role": "user_role", "zone": "user_zone", "event": "registered_event"},
+    "alerts": {},
+    "incidents": {"type": "incident_type", "responder": "assigned_responder"},
+    "lost_and_found": {},
+    "documents": {},
+    "events": {},
+}
+INDEXED_FIELDS = ("zone", "role", "status", "type", "timestamp")
+RANGE_FIELDS = ("timestamp",)  # Kept sorted for range filters (ISO timestamps order as strings)
+OPERATORS = ("eq", "ne", "in", "contains", "gt", "gte", "lt", "lte")
+AGGREGATES = ("count", "list")
+DEFAULT_LIST_LIMIT = 10
+MAX_LIST_LIMIT = 50
+MAX_GROUPS = 20
+MAX_SAMPLE_VALUES = 15  # Distinct values shown per indexed field in the schema description
+
+
+class QueryError(ValueError):
+    """A structured query that does not fit the data (unknown collection, field, operator...)."""
+
+
+class Table:
+    """
+    One collection of records with per-field indexes.
+
+    Equality indexes map each value of an indexed field to the sorted row ids holding it;
+    range fields also keep (value, row id) pairs sorted by value for bisecting.
+    """
+
+    def __init__(self, name: str, records: List[Dict[str, Any]]) -> None:
+        self.name = name
+        self.records = list(records)  # Row ids stay valid if the source collection is written to
+        records = self.records
+        self.aliases = FIELD_ALIASES.get(name, {})
+        self.fields = sorted({field for record in records for field in record})
+        self.indexes: Dict[str, Dict[Any, List[int]]] = {}
+        self.sorted_values: Dict[str, List] = {}
+        self.sorted_ids: Dict[str, List[int]] = {}
+
+        for canonical in INDEXED_FIELDS:
+            field = self.resolve(canonical, strict=False)
+            if field is None:
+                continue
+            index: Dict[Any, List[int]] = {}
+            for row_id, record in enumerate(records):
+                value = record.get(field)
+                if isinstance(value, (str, int, float, bool)) or value is None:
+                    index.setdefault(value, []).append(row_id)
+            self.indexes[field] = index
+            if canonical in RANGE_FIELDS:
+                pairs = sorted((record[field], row_id) for row_id, record in enumerate(records)
+                               if isinstance(record.get(field), str))
+                self.sorted_values[field] = [value for value, _ in pairs]
+                self.sorted_ids[field] = [row_id for _, row_id in pairs]
+
+    def resolve(self, field: str, strict: bool = True) -> Optional[str]:
+        """Canonical or raw field name -> the key used in this table's records."""
+        resolved = self.aliases.get(field, field)
+        if resolved in self.fields:
+            return resolved
+        if strict:
+            raise QueryError(f"Unknown field '{field}' for {self.name} (fields: {', '.join(self.describe_fields())})")
+        return None
+
+    def describe_fields(self) -> List[str]:
+        reverse = {raw: canonical for canonical, raw in self.aliases.items()}
+        return [reverse.get(field, field) for field in self.fields]
+
+    def _candidates(self, field: str, op: str, value) -> Optional[Set[int]]:
+        """Row ids matching one filter through an index, or None if no index applies."""
+        if op in ("eq", "in") and field in self.indexes:
+            values = value if op == "in" else [value]
+            index = self.indexes[field]
+            try:
+                return {row_id for v in values for row_id in index.get(v, ())}
+            except TypeError:  # Unhashable filter value; fall back to a scan
+                return None
+        if op in ("gt", "gte", "lt", "lte") and field in self.sorted_values and isinstance(value, str):
+            keys = self.sorted_values[field]
+            if op in ("gt", "gte"):
+                start = bisect_right(keys, value) if op == "gt" else bisect_left(keys, value)
+                return set(self.sorted_ids[field][start:])
+            end = bisect_left(keys, value) if op == "lt" else bisect_right(keys, value)
+            return set(self.sorted_ids[field][:end])
+        return None
+
+    def select(self, filters: Iterable[Dict[str, Any]]) -> List[int]:
+        """Row ids matching every filter, in record order."""
+        row_ids: Optional[Set[int]] = None
+        scans = []
+        for condition in filters:
+            field = self.resolve(condition.get("field", ""))
+            op = condition.get("op", "eq")
+            if op not in OPERATORS:
+                raise QueryError(f"Unknown operator '{op}' (operators: {', '.join(OPERATORS)})")
+            value = condition.get("value")
+            if op == "in" and not isinstance(value, list):
+                value = [value]
+            matched = self._candidates(field, op, value)
+            if matched is None:
+                scans.append((field, op, value))
+            else:
+                row_ids = matched if row_ids is None else row_ids & matched
+
+        candidates = sorted(row_ids) if row_ids is not None else range(len(self.records))
+        return [row_id for row_id in candidates
+                if all(_matches(self.records[row_id].get(field), op, value) for field, op, value in scans)]
+
+
+def _matches(actual, op: str, expected) -> bool:
+    if op == "eq":
+        return actual == expected
+    if op == "ne":
+        return actual != expected
+    if op == "in":
+        return actual in expected
+    if op == "contains":
+        return isinstance(actual, str) and str(expected).lower() in actual.lower()
+    if actual is None:
+        return False
+    try:
+        if op == "gt":
+            return actual > expected
+        if op == "gte":
+            return actual >= expected
+        if op == "lt":
+            return actual < expected
+        return actual <= expected
+    except TypeError:
+        return False
+
+
+class QueryEngine:
+    """
+    In-memory, indexed tables over the event data, queried with small JSON specs:
+
+        {"collection": "users", "filters": [{"field": "zone", "op": "eq", "value": "Food Court"}],
+         "group_by": "role", "aggregate": "count", "fields": [...], "limit": 10}
+
+    Results are compact (a count, the top groups or a few projected records), so what
+    is sent on to the LLM does not grow with the size of the data.
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.tables = {name: Table(name, records) for name, records in data.items()
+                       if isinstance(records, Sequence) and not isinstance(records, str)}
+
+    def schema_description(self) -> str:
+        """Collections, their fields and sample values of the indexed ones, for the query prompt."""
+        lines = []
+        for name, table in self.tables.items():
+            lines.append(f"- {name} ({len(table.records)} records): fields {', '.join(table.describe_fields())}")
+            for field, index in table.indexes.items():
+                if field in table.sorted_values:
+                    continue
+                values = [str(v) for v in index if v is not None]
+                sample = ", ".join(values[:MAX_SAMPLE_VALUES]) + (", ..." if len(values) > MAX_SAMPLE_VALUES else "")
+                canonical = table.describe_fields()[table.fields.index(field)]
+                lines.append(f"    {canonical} values: {sample}")
+        return "\n".join(lines)
+
+    def execute(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(query, dict):
+            raise QueryError("A query must be a JSON object")
+        name = query.get("collection")
+        if name not in self.tables:
+            raise QueryError(f"Unknown collection '{name}' (collections: {', '.join(self.tables)})")
+        table = self.tables[name]
+        aggregate = query.get("aggregate", "count")
+        if aggregate not in AGGREGATES:
+            raise QueryError(f"Unknown aggregate '{aggregate}' (aggregates: {', '.join(AGGREGATES)})")
+
+        filters = query.get("filters") or []
+        row_ids = table.select(filters)
+        result: Dict[str, Any] = {"collection": name, "filters": filters, "count": len(row_ids)}
+
+        group_by = query.get("group_by")
+        if group_by:
+            field = table.resolve(group_by)
+            counts = Counter(_group_key(table.records[row_id].get(field)) for row_id in row_ids)
+            result["group_by"] = group_by
+            result["groups"] = [{"value": value, "count": count} for value, count in counts.most_common(MAX_GROUPS)]
+            result["distinct_groups"] = len(counts)
+        elif aggregate == "list":
+            limit = max(1, min(int(query.get("limit") or DEFAULT_LIST_LIMIT), MAX_LIST_LIMIT))
+            fields = [table.resolve(field) for field in query.get("fields") or []]
+            result["records"] = [
+                {field: table.records[row_id].get(field) for field in fields} if fields else table.records[row_id]
+                for row_id in row_ids[:limit]
+            ]
+            result["truncated"] = len(row_ids) > limit
+        return result
+
+
+_query_engine = {"version": None, "engine": None}
+_query_engine_lock = threading.Lock()
+
+
+def get_query_engine() -> QueryEngine:
+    """Indexed tables over the mock DB, rebuilt only when mock_data.json is reloaded or a record is written."""
+    version = MockDataService.data_version()
+    engine = _query_engine["engine"]
+    if engine is None or _query_engine["version"] != version:
+        with _query_engine_lock:
+            if _query_engine["engine"] is None or _query_engine["version"] != version:
+                _query_engine["engine"] = QueryEngine(MockDataService().get_all_data())
+                _query_engine["version"] = version
+            engine = _query_engine["engine"]
+    return engine
+
+
+def _group_key(value):
+    return value if isinstance(value, (str, int, float, bool)) or value is None else json.dumps(value, sort_keys=True)
+
+
+_JSON_BLOCK = re.compile(r"\{.*\}|\[.*\]", re.DOTALL)
+
+
+def parse_queries(text: str) -> List[Dict[str, Any]]:
+    """The JSON query (or list of queries, or {"queries": [...]}) in an LLM reply."""
+    match = _JSON_BLOCK.search(text)
+    if match is None:
+        raise QueryError("No JSON query found in the reply")
+    try:
+        parsed = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise QueryError(f"Invalid JSON query: {e}") from None
+    if isinstance(parsed, dict) and "queries" in parsed:
+        parsed = parsed["queries"]
+    return parsed if isinstance(parsed, list) else [parsed]
@@ -0,0 +1,198 @@
+import re
+import sys
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from service.mock_data_service import MockDataService
+from utils.logger import setup_logger
+
+logger = setup_logger("response_cache", "logs/crowdguard.log")
+
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 256
+SIMILARITY_THRESHOLD = 0.88  # Cosine similarity for a semantic hit (tuned for HashingEmbedder)
+HASHING_DIMENSIONS = 1024
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace: 'Which zones...?' == 'which zones ...'"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+def _anchor_tokens(normalized_query: str) -> frozenset:
+    """Tokens with digits (zone names, ids, counts); a semantic hit must have exactly the same ones."""
+    return frozenset(token for token in normalized_query.split() if any(c.isdigit() for c in token))
+
+
+class HashingEmbedder:
+    """
+    Dependency-free query embedding: word and character-trigram features hashed into a
+    fixed-size vector, L2-normalized. Good at catching rephrasings that share most of
+    their words; it does not know synonyms.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions)
+        words = text.split()
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        padded = f" {text} "
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            vector[zlib.crc32(feature.encode()) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, text: str) -> np.ndarray:
+        return np.asarray(self.model.encode(text, normalize_embeddings=True), dtype=float)
+
+
+def make_embedder(model_name: Optional[str] = None) -> Callable[[str], np.ndarray]:
+    """A local embedding model if one is named and installed, else the hashing fallback."""
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            logger.warning(f"sentence-transformers is not installed; using hashed query embeddings instead of '{model_name}'")
+    return HashingEmbedder()
+
+
+def _firestore_data_version():
+    # Only consulted once FirestoreService is in use, so firebase is not imported just for the cache
+    schema = sys.modules.get("models.schema")
+    return schema.FirestoreService.data_version() if schema is not None else None
+
+
+DEFAULT_VERSION_SOURCES = (MockDataService.data_version, _firestore_data_version)
+
+
+class ResponseCache:
+    """
+    Agent answers keyed on role + normalized query.
+
+    Entries expire after `ttl` seconds, and the least recently used one is evicted beyond
+    `max_entries`. Every lookup compares the data versions of MockDataService and
+    FirestoreService against the ones the entries were stored under, and drops the
+    whole cache when the data has changed. FirestoreService only sees its own writes and
+    those of collections watched by a CachedFirestoreService; answers based on other
+    collections can be stale for up to `ttl` seconds after another writer changes them.
+
+    Answers are computed outside the cache, so callers read `data_version()` before the
+    lookup and pass it to `put()`; an answer whose data changed in the meantime is not
+    stored (the same generation guard CachedFirestoreService uses).
+
+    With `semantic=True` a miss on the exact key falls back to the most similar cached
+    query of the same role (cosine similarity of query embeddings >= `threshold`), as
+    long as both mention the same zone names and numbers.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES,
+                 semantic: bool = False, embedder: Optional[Callable[[str], np.ndarray]] = None,
+                 threshold: float = SIMILARITY_THRESHOLD,
+                 version_sources: Tuple[Callable[[], Hashable], ...] = DEFAULT_VERSION_SOURCES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.embedder = embedder or (make_embedder() if semantic else None)
+        self.threshold = threshold
+        self.version_sources = version_sources
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._data_version = self._current_data_version()
+        self._lock = threading.Lock()
+
+    def _current_data_version(self):
+        return tuple(source() for source in self.version_sources)
+
+    def data_version(self) -> Tuple:
+        """The current data version, to pass to `put()` for an answer about to be computed."""
+        return self._current_data_version()
+
+    def _check_data_version(self) -> None:
+        version = self._current_data_version()
+        if version != self._data_version:
+            if self._entries:
+                logger.info(f"Underlying data changed; dropping {len(self._entries)} cached responses")
+            self._entries.clear()
+            self._data_version = version
+
+    def get(self, role: str, query: str) -> Optional[str]:
+        normalized = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            self._check_data_version()
+            entry = self._entries.get((role, normalized))
+            if entry is not None and entry["expires"] <= now:
+                del self._entries[(role, normalized)]
+                entry = None
+            if entry is None and self.semantic:
+                entry = self._most_similar(role, normalized, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry["key"])
+            self.hits += 1
+            return entry["response"]
+
+    def _most_similar(self, role: str, normalized: str, now: float) -> Optional[Dict]:
+        anchors = _anchor_tokens(normalized)
+        candidates: List[Dict] = [
+            entry for (entry_role, _), entry in self._entries.items()
+            if entry_role == role and entry["expires"] > now and entry["anchors"] == anchors
+        ]
+        if not candidates:
+            return None
+        similarities = np.stack([entry["embedding"] for entry in candidates]) @ self.embedder(normalized)
+        best = int(np.argmax(similarities))
+        return candidates[best] if similarities[best] >= self.threshold else None
+
+    def put(self, role: str, query: str, response: str, version: Optional[Tuple] = None) -> None:
+        """Store `response`, unless the data has changed since `version` (from `data_version()`) was read."""
+        normalized = normalize_query(query)
+        key = (role, normalized)
+        with self._lock:
+            self._check_data_version()
+            if version is not None and version != self._data_version:
+                logger.info("Underlying data changed while the response was computed; not caching it")
+                return
+            self._entries[key] = {
+                "key": key,
+                "response": response,
+                "expires": time.monotonic() + self.ttl,
+                "anchors": _anchor_tokens(normalized),
+                "embedding": self.embedder(normalized) if self.semantic else None,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, role: Optional[str] = None) -> None:
+        """Drop every cached response, or only those of one role."""
+        with self._lock:
+            if role is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == role]:
+                    del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,99 @@
+import threading
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any, Dict, Optional
+
+from service.mock_data_service import MockDataStore
+from service.query_engine import FIELD_ALIASES
+
+# Counters kept per collection: canonical field names (see FIELD_ALIASES) to count records by.
+# Incidents carry no status or zone and alerts no type in the event data.
+TRACKED_BREAKDOWNS = {
+    "users": ("role", "zone"),
+    "incidents": ("type",),
+    "alerts": ("status", "zone"),
+}
+UNKNOWN = "unknown"
+
+
+def _bucket(value) -> str:
+    return str(value) if value is not None else UNKNOWN
+
+
+class EventStats:
+    """
+    Record totals and per-field breakdowns of the event data, maintained incrementally.
+
+    Built once from the full data, then kept current by `apply`, which the data service
+    calls on every add, update and delete; each write costs O(1). `snapshot()` returns
+    a plain dict that is only rebuilt after a write, so repeated reads are free.
+    """
+
+    def __init__(self, data: Dict[str, Any], generation: int = 0) -> None:
+        self.generation = generation
+        self._lock = threading.Lock()
+        self.totals: Counter = Counter()
+        self.breakdowns: Dict[str, Dict[str, Counter]] = {
+            collection: {field: Counter() for field in fields}
+            for collection, fields in TRACKED_BREAKDOWNS.items()
+        }
+        for collection, records in data.items():
+            if isinstance(records, Sequence) and not isinstance(records, str):
+                self.totals[collection] += 0  # Empty collections are listed too, as after deleting every record
+                for record in records:
+                    self._count(collection, record, 1)
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def _count(self, collection: str, record: Dict[str, Any], delta: int) -> None:
+        self.totals[collection] += delta
+        aliases = FIELD_ALIASES.get(collection, {})
+        for field, counter in self.breakdowns.get(collection, {}).items():
+            key = _bucket(record.get(aliases.get(field, field)))
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]
+
+    def apply(self, collection: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Data service listener: account for one record being added, updated or deleted."""
+        with self._lock:
+            if old is not None:
+                self._count(collection, old, -1)
+            if new is not None:
+                self._count(collection, new, 1)
+            self._snapshot = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals and breakdowns as plain dicts (the same object until the next write)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = {
+                    "totals": {collection: self.totals[collection] for collection in sorted(self.totals)},
+                    **{
+                        collection: {field: dict(counter.most_common()) for field, counter in fields.items()}
+                        for collection, fields in self.breakdowns.items()
+                    },
+                }
+                self._snapshot = snapshot
+        return snapshot
+
+
+_event_stats = {"stats": None}
+_event_stats_lock = threading.Lock()
+
+
+def get_event_stats() -> EventStats:
+    """Stats for the shared data store, rebuilt only when it reloads mock_data.json."""
+    store = MockDataStore()
+    store.data()  # Reloads mock_data.json if it changed
+    stats = _event_stats["stats"]
+    if stats is None or stats.generation != store.generation:
+        with _event_stats_lock, store.lock:
+            stats = _event_stats["stats"]
+            if stats is None or stats.generation != store.generation:
+                if stats is not None:
+                    store.unsubscribe(stats.apply)
+                stats = EventStats(store.data(), store.generation)
+                store.subscribe(stats.apply)
+                _event_stats["stats"] = stats
+    return stats
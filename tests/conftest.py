@@ -0,0 +1,63 @@
+import os
+import sys
+import shutil
+import pytest
+
+# The app modules (main, service, agents, models) import each other from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from service.forecast_service import ForecastService
+
+@pytest.fixture
+def fresh_forecast_service(monkeypatch):
+    """Build a new ForecastService singleton for each call, restoring the previous one afterwards."""
+    monkeypatch.setattr(ForecastService, "_instance", None)
+
+    def build(**kwargs):
+        ForecastService._instance = None
+        return ForecastService(**kwargs)
+    return build
+
+@pytest.fixture
+def mock_store(monkeypatch, tmp_path):
+    """A fresh MockDataStore singleton over a copy of data/mock_data.json, with no cached stats or query engine."""
+    from service import query_engine, stats_service
+    from service.mock_data_service import MockDataStore, MOCK_DATA_PATH
+    path = tmp_path / "mock_data.json"
+    shutil.copy(MOCK_DATA_PATH, path)
+    monkeypatch.setattr(MockDataStore, "_instance", None)
+    monkeypatch.setitem(stats_service._event_stats, "stats", None)
+    monkeypatch.setitem(query_engine._query_engine, "engine", None)
+    return MockDataStore(str(path))
+
+@pytest.fixture
+def forecast_client(monkeypatch, fresh_forecast_service):
+    """TestClient of the app with an empty forecaster on the shipped artifacts."""
+    from fastapi.testclient import TestClient
+    import main
+    monkeypatch.setattr(main, "forecast_service", fresh_forecast_service())
+    return TestClient(main.app)
+
+@pytest.fixture(scope="session")
+def horizon_artifact_dir(tmp_path_factory):
+    """Artifacts with direct models for [1, 3, 6, 12, 30] steps ahead, trained on a short generated recording."""
+    import random
+    import numpy as np
+    import parallel_training
+    import time_series_data_
+
+    random.seed(42)
+    np.random.seed(42)
+    base_dir = tmp_path_factory.mktemp("horizon_model")
+    base_event_data, initial_users, zones = time_series_data_.generate_base_data()
+
+    small_params = [dict(n_estimators=20, num_leaves=7, min_child_samples=5, random_state=0, verbosity=-1)]
+    with pytest.MonkeyPatch.context() as mp:
+        # 60 snapshots per zone, too few for the 60-step bucket
+        mp.setattr(time_series_data_, "SIMULATION_DURATION_MINUTES", 10)
+        snapshots = time_series_data_.simulate_snapshots(initial_users, zones)
+        time_series_data_.convert_timeseries_to_csv({**base_event_data, "snapshots": snapshots}, base_dir / "training.csv")
+        mp.setattr(parallel_training, "ENSEMBLE_PARAMS", small_params)
+        mp.setattr(sys, "argv", ["parallel_training.py", "--input", str(base_dir / "training.csv"), "--output", str(base_dir / "model"), "--workers", "2"])
+        parallel_training.main()
+    return str(base_dir / "model")
@@ -0,0 +1,100 @@
+import sys
+import asyncio
+import pytest
+
+from agents import agent_executor
+from agents.agent_executor import AgentExecutorPool
+
+class FakeExecutor:
+    """Stands in for an AgentExecutor; records how many runs are in flight."""
+
+    def __init__(self, role, delay):
+        self.role = role
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def ainvoke(self, inputs):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return {"output": f"{self.role}: {inputs['input']}"}
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """Build a fresh AgentExecutorPool whose executors are FakeExecutors."""
+    built = []
+
+    class FakeBuilder:
+        def __init__(self, user_type):
+            self.user_type = user_type
+
+        def create(self):
+            executor = FakeExecutor(self.user_type, delay=make.delay)
+            built.append(executor)
+            return executor
+
+    monkeypatch.setattr(agent_executor, "AgentExecutorBuilder", FakeBuilder)
+    monkeypatch.setattr(AgentExecutorPool, "_instance", None)
+
+    def make(delay=0.0, **kwargs):
+        make.delay = delay
+        AgentExecutorPool._instance = None
+        return AgentExecutorPool(**kwargs)
+    make.built = built
+    return make
+
+def test_executors_are_built_once_and_shared(make_pool):
+    pool = make_pool(check_interval=3600)
+    admin = pool.get("admin")
+    assert pool.get("admin") is admin and admin.role == "admin"
+    assert pool.get("visitor") is pool.get(None) is pool.get("default")
+    assert [executor.role for executor in make_pool.built] == ["admin", "default"]
+
+def test_reload_keeps_the_pool_and_rebuilds_executors(make_pool):
+    pool = make_pool(check_interval=3600)
+    prompts_module, tools_module = sys.modules["agents.prompts.prompts"], sys.modules["agents.tools"]
+    admin = pool.get("admin")
+
+    pool.reload()
+    assert AgentExecutorPool() is pool
+    # Modules are reloaded in place: the builder keeps seeing the current ones
+    assert sys.modules["agents.prompts.prompts"] is prompts_module is agent_executor.agent_prompts
+    assert sys.modules["agents.tools"] is tools_module is agent_executor.agent_tools
+    assert pool.get("admin") is not admin
+
+def test_edited_source_triggers_a_reload(make_pool, monkeypatch):
+    pool = make_pool(check_interval=0)
+    admin = pool.get("admin")
+    assert pool.get("admin") is admin
+
+    monkeypatch.setattr(pool, "_read_source_signature", lambda: ("edited",))
+    assert pool.get("admin") is not admin
+
+def test_arun_returns_the_final_answer(make_pool):
+    pool = make_pool(check_interval=3600)
+    assert asyncio.run(pool.arun("responder", "status?")) == "responder: status?"
+
+def test_arun_limits_concurrent_runs(make_pool):
+    pool = make_pool(delay=0.02, check_interval=3600, max_concurrent=2)
+
+    async def run_many():
+        return await asyncio.gather(*(pool.arun("user", f"q{i}") for i in range(6)))
+
+    assert asyncio.run(run_many()) == [f"user: q{i}" for i in range(6)]
+    assert make_pool.built[0].max_running == 2
+
+def test_arun_times_out_waiting_for_a_slot(make_pool):
+    pool = make_pool(delay=0.2, check_interval=3600, max_concurrent=1)
+
+    async def run_two():
+        slow = asyncio.create_task(pool.arun("user", "slow"))
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError, match="exceeded 0.05s"):
+            await pool.arun("user", "waiting", timeout=0.05)
+        return await slow
+
+    assert asyncio.run(run_two()) == "user: slow"
@@ -0,0 +1,126 @@
+import pytest
+
+from models.firestore_fake import InMemoryFirestore
+from models.schema import FirestoreService
+from service import firestore_cache
+from service.firestore_cache import CachedFirestoreService
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(firestore_cache.time, "monotonic", clock)
+    return clock
+
+@pytest.fixture
+def db():
+    db = InMemoryFirestore()
+    for i in range(3):
+        db.collection("alerts").document(f"a{i}").set({"zone": f"Z{i}", "status": "open"})
+    db.collection("events").document("e1").set({"name": "Expo"})
+    return db
+
+@pytest.fixture
+def cached(db, clock):
+    cached = CachedFirestoreService(FirestoreService(db=db), default_ttl=30, ttls={"events": 600}, watch=["alerts"])
+    yield cached
+    cached.close()
+
+def test_reads_are_served_from_the_cache(db, cached):
+    assert cached.get_document_by_id("alerts", "a0")["zone"] == "Z0"
+    assert len(cached.get_all_documents("alerts")) == 3
+    reads = db.reads
+    assert cached.get_document_by_id("alerts", "a0")["zone"] == "Z0"
+    assert len(cached.get_all_documents("alerts")) == 3
+    assert db.reads == reads and cached.hits == 2 and cached.misses == 2
+
+def test_entries_expire_per_collection(cached, clock):
+    cached.get_document_by_id("alerts", "a0")
+    cached.get_document_by_id("events", "e1")
+    clock.now += 31
+    misses = cached.misses
+    cached.get_document_by_id("events", "e1")
+    assert cached.misses == misses
+    cached.get_document_by_id("alerts", "a0")
+    assert cached.misses == misses + 1
+
+def test_least_recently_used_documents_are_evicted(db, clock):
+    cached = CachedFirestoreService(FirestoreService(db=db), max_documents=2)
+    for doc_id in ["a0", "a1", "a0", "a2"]:
+        cached.get_document_by_id("alerts", doc_id)
+    misses = cached.misses
+    cached.get_document_by_id("alerts", "a0")
+    cached.get_document_by_id("alerts", "a2")
+    assert cached.misses == misses
+    cached.get_document_by_id("alerts", "a1")
+    assert cached.misses == misses + 1
+
+def test_missing_documents_are_not_cached(db, cached):
+    assert cached.get_document_by_id("alerts", "new") is None
+    db.collection("alerts").document("new").set({"zone": "Z9"})
+    assert cached.get_document_by_id("alerts", "new") == {"zone": "Z9"}
+
+def test_writes_through_the_wrapper_invalidate(cached):
+    cached.get_all_documents("alerts")
+    cached.get_document_by_id("events", "e1")
+    cached.add_document("alerts", {"zone": "Z3"})
+    assert len(cached.get_all_documents("alerts")) == 4
+    cached.update_document("events", "e1", {"name": "Expo 2025"})
+    assert cached.get_document_by_id("events", "e1")["name"] == "Expo 2025"
+
+def test_added_event_drops_collection_reads_only(db, cached):
+    cached.get_all_documents("alerts")
+    cached.get_document_by_id("alerts", "a0")
+    db.collection("alerts").document("a3").set({"zone": "Z3", "status": "open"})  # Another writer
+
+    assert len(cached._queries) == 0 and ("alerts", "a0") in cached._documents
+    assert len(cached.get_all_documents("alerts")) == 4
+
+def test_modified_event_drops_that_document(db, cached):
+    for doc_id in ["a0", "a1"]:
+        cached.get_document_by_id("alerts", doc_id)
+    db.collection("alerts").document("a0").update({"status": "resolved"})
+
+    assert ("alerts", "a0") not in cached._documents and ("alerts", "a1") in cached._documents
+    assert cached.get_document_by_id("alerts", "a0")["status"] == "resolved"
+
+def test_removed_event_drops_that_document(db, cached):
+    cached.get_document_by_id("alerts", "a2")
+    cached.get_all_documents("alerts", where=[("status", "==", "open")])
+    db.collection("alerts").document("a2").delete()
+
+    assert cached.get_document_by_id("alerts", "a2") is None
+    assert len(cached.get_all_documents("alerts", where=[("status", "==", "open")])) == 2
+
+def test_unwatched_collections_rely_on_the_ttl(db, cached, clock):
+    assert cached.get_document_by_id("events", "e1")["name"] == "Expo"
+    db.collection("events").document("e1").set({"name": "Renamed"})
+    assert cached.get_document_by_id("events", "e1")["name"] == "Expo"
+    clock.now += 601
+    assert cached.get_document_by_id("events", "e1")["name"] == "Renamed"
+
+def test_close_stops_the_listeners(db, cached):
+    cached.close()
+    cached.get_document_by_id("alerts", "a0")
+    db.collection("alerts").document("a0").update({"status": "resolved"})
+    assert cached.get_document_by_id("alerts", "a0")["status"] == "open"
+
+def test_read_racing_with_a_change_is_not_stored(db, cached):
+    service = cached.service
+    original = service.get_document_by_id
+
+    def read_then_change(collection_name, doc_id):
+        document = original(collection_name, doc_id)
+        db.collection("alerts").document(doc_id).update({"status": "resolved"})  # Lands before the store
+        return document
+
+    service.get_document_by_id = read_then_change
+    assert cached.get_document_by_id("alerts", "a1")["status"] == "open"
+    service.get_document_by_id = original
+    assert cached.get_document_by_id("alerts", "a1")["status"] == "resolved"
@@ -0,0 +1,160 @@
+import asyncio
+import pytest
+from google.api_core.exceptions import Aborted, PermissionDenied
+
+from models import schema
+from models.firestore_fake import InMemoryFirestore
+from models.schema import FirestoreService, MAX_BATCH_WRITES, BULK_WRITE_ATTEMPTS, BULK_RETRY_BASE_SECONDS
+
+@pytest.fixture
+def db():
+    db = InMemoryFirestore()
+    for i in range(25):
+        db.collection("alerts").document(f"a{i:02d}").set({
+            "zone": f"Z{i % 3}", "severity": i % 7, "status": "open" if i % 2 else "closed",
+            "details": {"reporter": f"u{i}", "notes": "x" * 50},
+        })
+    return db
+
+@pytest.fixture
+def service(db):
+    return FirestoreService(db=db, async_db=db.async_client())
+
+def _ids(records):
+    return [record["id"] for record in records]
+
+@pytest.mark.parametrize("page_size, queries", [(10, 3), (5, 6), (25, 2), (100, 1)])
+def test_pages_cover_the_collection_once(db, service, page_size, queries):
+    records = list(service.iter_documents("alerts", page_size=page_size, id_field="id"))
+    assert _ids(records) == [f"a{i:02d}" for i in range(25)]
+    # A full last page needs one more (empty) round trip to see the end
+    assert db.queries == queries
+
+def test_limit_and_start_after_across_pages(db, service):
+    assert _ids(service.iter_documents("alerts", limit=12, page_size=5, id_field="id")) == [f"a{i:02d}" for i in range(12)]
+    assert db.queries == 3
+    assert _ids(service.iter_documents("alerts", start_after="a19", page_size=2, id_field="id")) == ["a20", "a21", "a22", "a23", "a24"]
+    with pytest.raises(ValueError, match="not found"):
+        list(service.iter_documents("alerts", start_after="missing"))
+
+def test_ordered_pages(service):
+    records = list(service.iter_documents("alerts", order_by=["-severity", "zone"], page_size=4, id_field="id"))
+    keys = [(-r["severity"], r["zone"], r["id"]) for r in records]
+    assert len(records) == 25 and keys == sorted(keys)
+
+    resumed = list(service.iter_documents("alerts", order_by="-severity", start_after={"severity": 3}, page_size=4))
+    assert sorted(r["severity"] for r in resumed) == sorted(r["severity"] for r in records if r["severity"] < 3)
+
+def test_projection_returns_only_selected_fields(service):
+    records = list(service.iter_documents("alerts", select=["zone", "details.reporter"], order_by="-severity", page_size=4, id_field="id"))
+    assert len(records) == 25
+    # The order field is fetched for the page cursors but not returned
+    assert all(set(r) == {"zone", "details", "id"} and r["details"] == {"reporter": f"u{int(r['id'][1:])}"} for r in records)
+
+@pytest.mark.parametrize("where", [
+    [("severity", ">=", 2)],
+    [("severity", "<", 5), ("status", "==", "open")],
+    [("zone", "!=", "Z1")],
+    [("zone", "not-in", ["Z0"]), ("severity", ">", 1)],
+])
+def test_projection_with_inequality_filter_pages(service, where):
+    # Firestore orders by the inequality fields, so the projection must keep them for the cursors
+    expected = list(service.iter_documents("alerts", where=where, id_field="id"))
+    projected = list(service.iter_documents("alerts", where=where, select=["status"], page_size=3, id_field="id"))
+    assert _ids(projected) == _ids(expected) and len(projected) > 3
+    assert all(set(r) == {"status", "id"} for r in projected)
+
+def test_async_reads_match_sync_reads(service):
+    options = dict(where=[("severity", ">", 2)], select=["zone"], order_by="zone", page_size=4, id_field="id")
+
+    async def read():
+        return [record async for record in service.aiter_documents("alerts", **options)]
+
+    assert asyncio.run(read()) == list(service.iter_documents("alerts", **options))
+
+def test_fetch_collections(db, service):
+    db.collection("incidents").document("i1").set({"type": "fire"})
+    result = asyncio.run(service.fetch_collections({
+        "alerts": {"where": [("status", "==", "open")], "select": ["zone"], "page_size": 5},
+        "incidents": {},
+        "lost_and_found": {},
+    }))
+    assert len(result["alerts"]) == 12 and all(set(r) == {"zone"} for r in result["alerts"])
+    assert result["incidents"] == [{"type": "fire"}] and result["lost_and_found"] == []
+
+    # A collection that fails to load maps to [] without affecting the others
+    result = asyncio.run(service.fetch_collections({"alerts": {"start_after": "missing"}, "incidents": {}}))
+    assert result == {"alerts": [], "incidents": [{"type": "fire"}]}
+    assert list(asyncio.run(service.fetch_collections(["incidents"]))) == ["incidents"]
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays requested by the bulk writes, without waiting for them."""
+    delays = []
+    monkeypatch.setattr(schema.time, "sleep", delays.append)
+    return delays
+
+def _documents(n):
+    return [{"name": f"user {i}", "zone": f"Z{i % 4}"} for i in range(n)]
+
+def _stored(db, collection):
+    return {doc.id: doc.to_dict() for doc in db.collection(collection).stream()}
+
+def test_bulk_add_splits_into_batches_of_500(db, service, sleeps):
+    result = service.bulk_add("users", _documents(2 * MAX_BATCH_WRITES + 201))
+    assert db.commits == 3 and not sleeps
+    assert len(result["succeeded"]) == 1201 and len(set(result["succeeded"])) == 1201 and result["failed"] == []
+    stored = _stored(db, "users")
+    assert set(stored) == set(result["succeeded"])
+    assert all(record["created_at"] == record["updated_at"] for record in stored.values())
+
+def test_exact_multiple_of_the_batch_size(db, service, sleeps):
+    result = service.bulk_add("users", _documents(MAX_BATCH_WRITES * 2))
+    assert db.commits == 2 and len(result["succeeded"]) == 1000
+
+def test_contention_is_retried(db, service, sleeps):
+    db.fail_next_commits(None, Aborted("contention"), Aborted("contention"))
+    result = service.bulk_add("users", _documents(1200))
+    assert len(result["succeeded"]) == 1200 and result["failed"] == []
+    assert db.commits == 5 and len(sleeps) == 2
+    # Exponential backoff with jitter
+    base = BULK_RETRY_BASE_SECONDS
+    assert base <= sleeps[0] < 2 * base <= sleeps[1] < 4 * base
+
+def test_a_batch_that_keeps_failing_is_reported_whole(db, service, sleeps):
+    db.fail_next_commits(None, *[Aborted("contention")] * BULK_WRITE_ATTEMPTS)
+    version = service.data_version()
+    result = service.bulk_add("users", _documents(1200))
+
+    assert db.commits == 1 + BULK_WRITE_ATTEMPTS + 1 and len(sleeps) == BULK_WRITE_ATTEMPTS - 1
+    assert len(result["succeeded"]) == 700 and len(result["failed"]) == 500
+    assert all("contention" in failure["error"] for failure in result["failed"])
+    # The failed batch wrote nothing; the others are all there
+    assert set(_stored(db, "users")) == set(result["succeeded"])
+    assert not set(result["succeeded"]) & {failure["id"] for failure in result["failed"]}
+    assert service.data_version() == version + 1
+
+def test_other_errors_are_not_retried(db, service, sleeps):
+    db.fail_next_commits(PermissionDenied("no access"))
+    version = service.data_version()
+    result = service.bulk_add("users", _documents(10))
+    assert db.commits == 1 and not sleeps
+    assert result["succeeded"] == [] and len(result["failed"]) == 10
+    assert service.data_version() == version  # Nothing was written
+
+def test_bulk_update_with_a_missing_document_fails_its_batch(db, service, sleeps):
+    ids = service.bulk_add("users", _documents(700))["succeeded"]
+    updates = {doc_id: {"zone": "Z9"} for doc_id in ids}
+    updates["missing"] = {"zone": "Z9"}  # Lands in the second batch
+    result = service.bulk_update("users", updates)
+
+    assert len(result["succeeded"]) == 500 and len(result["failed"]) == 201
+    assert "missing" in {failure["id"] for failure in result["failed"]}
+    stored = _stored(db, "users")
+    assert sum(record["zone"] == "Z9" for record in stored.values()) == 500
+
+def test_bulk_delete_counts(db, service, sleeps):
+    ids = service.bulk_add("users", _documents(600))["succeeded"]
+    result = service.bulk_delete("users", ids[:550])
+    assert len(result["succeeded"]) == 550 and result["failed"] == []
+    assert set(_stored(db, "users")) == set(ids[550:])
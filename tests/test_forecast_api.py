@@ -0,0 +1,62 @@
+import pytest
+
+def _observation(zone, seconds, crowd_count=8):
+    return {"timestamp": f"2025-01-01T10:{seconds // 60:02d}:{seconds % 60:02d}", "zone": zone, "crowd_count": crowd_count}
+
+def test_observations_are_stored_and_forecast(forecast_client):
+    observations = [_observation("Z1HA", 10 * i, 8 + i % 3) for i in range(12)]
+    assert forecast_client.post("/forecast/observations", json={"observations": observations}).json() == {"stored": 12}
+
+    result = forecast_client.post("/forecast", json={"horizon_seconds": 60, "zones": ["Z1HA", "Z1HB"], "mode": "recursive"}).json()
+    assert isinstance(result["Z1HA"]["prediction"], float)
+    assert result["Z1HB"]["prediction"] is None
+
+def test_invalid_batch_is_rejected_whole(forecast_client):
+    import main
+    service = main.forecast_service
+    bad_batches = [
+        [_observation("Z1HA", 0), {"timestamp": 1735725600, "zone": "Z1HB", "crowd_count": 3}],
+        [_observation("Z1HA", 10), _observation("Z1HA", 0)],
+        [_observation("Z1HA", 0), _observation("NOPE", 0)],
+        [_observation("Z1HA", 0), {"zone": "Z1HB", "crowd_count": 3}],
+    ]
+    for batch in bad_batches:
+        response = forecast_client.post("/forecast/observations", json={"observations": batch})
+        assert response.status_code == 400
+        assert service.store.count("Z1HA") == 0 and service.store.count("Z1HB") == 0
+
+def test_out_of_order_reading_is_rejected(forecast_client):
+    assert forecast_client.post("/forecast/observations", json={"observations": [_observation("Z1HA", 30)]}).status_code == 200
+    response = forecast_client.post("/forecast/observations", json={"observations": [_observation("Z1HA", 20)]})
+    assert response.status_code == 400
+    assert "older than its latest reading" in response.json()["error"]
+
+def test_timezone_offsets_keep_the_local_hour(forecast_client):
+    import main
+    observation = {"timestamp": "2025-01-01T10:00:00+05:30", "zone": "Z1HA", "crowd_count": 4}
+    assert forecast_client.post("/forecast/observations", json={"observations": [observation]}).status_code == 200
+    assert str(main.forecast_service.store.last_timestamp("Z1HA")).startswith("2025-01-01T10:00:00")
+
+def test_horizons_beyond_the_direct_models_roll_out(fresh_forecast_service, horizon_artifact_dir):
+    service = fresh_forecast_service(artifact_dir=horizon_artifact_dir)
+    assert service.artifacts.horizons == [1, 3, 6, 12, 30]
+    service.update_many([(o["timestamp"], o["zone"], o["crowd_count"]) for o in (_observation("Z1HA", 10 * i, 8 + i % 3) for i in range(12))])
+
+    # 300s is covered by the 30-step model, 310s and 600s need the one-step rollout
+    for horizon in [60, 300, 310, 600]:
+        assert isinstance(service.forecast(horizon, ["Z1HA"])["Z1HA"]["prediction"], float)
+    assert service.forecast(600, ["Z1HA"]) == service.forecast(600, ["Z1HA"], mode="recursive")
+    with pytest.raises(ValueError, match="beyond the longest direct model"):
+        service.forecast(600, ["Z1HA"], mode="direct")
+
+def test_long_horizon_route_with_direct_models(monkeypatch, fresh_forecast_service, horizon_artifact_dir):
+    from fastapi.testclient import TestClient
+    import main
+    monkeypatch.setattr(main, "forecast_service", fresh_forecast_service(artifact_dir=horizon_artifact_dir))
+    client = TestClient(main.app)
+    observations = [_observation("Z1HA", 10 * i, 8 + i % 3) for i in range(12)]
+    assert client.post("/forecast/observations", json={"observations": observations}).status_code == 200
+
+    response = client.post("/forecast", json={"horizon_seconds": 600, "zones": ["Z1HA"]})
+    assert response.status_code == 200
+    assert isinstance(response.json()["Z1HA"]["prediction"], float)
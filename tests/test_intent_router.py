@@ -0,0 +1,77 @@
+import pytest
+
+from agents.intent_router import IntentRouter, COUNT_PATTERN, BREAKDOWN_PATTERN, ACTIVE_ALERTS_PATTERN, ZONE_COUNT_PATTERN
+from service.mock_data_service import MockDataService
+from service.response_cache import normalize_query
+
+@pytest.mark.parametrize("pattern, question", [
+    (COUNT_PATTERN, "How many incidents?"),
+    (COUNT_PATTERN, "how many users are there"),
+    (COUNT_PATTERN, "Total number of alerts so far"),
+    (COUNT_PATTERN, "count of lost and found items"),
+    (BREAKDOWN_PATTERN, "Users by zone"),
+    (BREAKDOWN_PATTERN, "show me the number of alerts per status"),
+    (BREAKDOWN_PATTERN, "how many incidents for each category"),
+    (ACTIVE_ALERTS_PATTERN, "Which active alerts are there?"),
+    (ACTIVE_ALERTS_PATTERN, "list all the open alerts right now"),
+    (ACTIVE_ALERTS_PATTERN, "How many unresolved alerts are there?"),
+    (ZONE_COUNT_PATTERN, "How many people are in the Food Court?"),
+    (ZONE_COUNT_PATTERN, "how many alerts at Outdoor Plaza zone"),
+])
+def test_patterns_match_whole_questions(pattern, question):
+    assert pattern.fullmatch(normalize_query(question))
+
+@pytest.mark.parametrize("question", [
+    "How many incidents yesterday?",
+    "users by zone and role",
+    "Why are there so many alerts?",
+    "Summarize the active alerts in Food Court",
+])
+def test_more_specific_questions_match_no_pattern(question):
+    normalized = normalize_query(question)
+    assert not any(p.fullmatch(normalized) for p in (COUNT_PATTERN, BREAKDOWN_PATTERN, ACTIVE_ALERTS_PATTERN, ZONE_COUNT_PATTERN))
+
+def test_count(mock_store):
+    incidents = len(mock_store.data()["incidents"])
+    assert IntentRouter().route("admin", "How many incidents?") == {"intent": "count", "output": f"There are {incidents} incidents in total."}
+
+def test_breakdown(mock_store):
+    routed = IntentRouter().route("admin", "users by zone")
+    users = mock_store.data()["users"]
+    assert routed["intent"] == "breakdown"
+    assert routed["output"].startswith(f"Users by zone ({len(users)} in total):")
+    assert f"- Food Court: {sum(u['user_zone'] == 'Food Court' for u in users)}" in routed["output"]
+
+def test_active_alerts(mock_store):
+    alerts = mock_store.data()["alerts"]
+    active = [a for a in alerts if a["status"] not in ("resolved", "closed", "dismissed")]
+    routed = IntentRouter().route("admin", "show the active alerts")
+    assert routed["intent"] == "active_alerts"
+    assert routed["output"].startswith(f"There are {len(active)} active alerts")
+    assert f"- Exhibition Hall A: {sum(a['zone'] == 'Exhibition Hall A' for a in active)}" in routed["output"]
+
+def test_active_alerts_follow_writes(mock_store):
+    service = MockDataService()
+    for alert in list(mock_store.data()["alerts"]):
+        service.update_record("alerts", alert["alert_id"], {"status": "resolved"})
+    assert IntentRouter().route("admin", "active alerts")["output"] == "There are no active alerts."
+
+    service.update_record("alerts", mock_store.data()["alerts"][0]["alert_id"], {"status": "pending"})
+    assert IntentRouter().route("admin", "active alerts")["output"].startswith("There is 1 active alert (1 pending).")
+
+def test_zone_count(mock_store):
+    users = mock_store.data()["users"]
+    n = sum(u["user_zone"] == "Food Court" for u in users)
+    assert IntentRouter().route("admin", "How many people are in the Food Court?") == {
+        "intent": "zone_count", "output": f"There are {n} users in Food Court."
+    }
+
+@pytest.mark.parametrize("user_type, question", [
+    ("user", "How many incidents?"),  # Only admin questions are routed
+    ("admin", "How many people are in the Moon Base?"),  # Unknown zone
+    ("admin", "incidents by zone"),  # Breakdown that is not tracked
+    ("admin", "How many incidents yesterday?"),  # More specific than any intent
+    ("admin", "What should responders do about the crowd surge?"),
+])
+def test_other_questions_fall_through_to_the_agent(mock_store, user_type, question):
+    assert IntentRouter().route(user_type, question) is None
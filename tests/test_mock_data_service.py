@@ -0,0 +1,89 @@
+import os
+import copy
+import json
+import pytest
+
+from service.mock_data_service import MockDataService, CollectionView, RecordView
+
+def _rewrite(store, data):
+    """Replace mock_data.json, with a modification time the store cannot mistake for the old one."""
+    with open(store.path, "w") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    stat = os.stat(store.path)
+    os.utime(store.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_data_is_json_serialisable(mock_store):
+    service = MockDataService()
+    with open(mock_store.path) as f:
+        original = json.load(f)
+    assert json.loads(json.dumps(service.get_all_data())) == original
+    assert json.loads(json.dumps(service.get_users())) == original["users"]
+    assert isinstance(service.get_users(), list) and isinstance(service.get_users()[0], dict)
+
+@pytest.mark.parametrize("change", [
+    lambda data: data["users"].append({}),
+    lambda data: data["users"].pop(),
+    lambda data: data["users"].sort(key=str),
+    lambda data: data["users"].__setitem__(0, {}),
+    lambda data: data["users"].__delitem__(0),
+    lambda data: data["users"][0].__setitem__("user_role", "admin"),
+    lambda data: data["users"][0].update(user_role="admin"),
+    lambda data: data["users"][0].pop("user_role"),
+    lambda data: data["users"][0]["location"].__setitem__("latitude", 0.0),
+    lambda data: data["events"][0]["zones"].append({}),
+    lambda data: data.__setitem__("users", []),
+])
+def test_data_cannot_be_modified(mock_store, change):
+    data = MockDataService().get_all_data()
+    before = json.dumps(data)
+    with pytest.raises(TypeError, match="read-only"):
+        change(data)
+    assert json.dumps(data) == before
+
+def test_views_reflect_writes_without_copies(mock_store):
+    service = MockDataService()
+    alerts = service.get_alerts()
+    assert service.get_alerts() is alerts
+    count = len(alerts)
+
+    added = service.add_record("alerts", {"alert_id": "a1", "zone": "Stage", "details": {"tags": ["smoke"]}})
+    assert len(alerts) == count + 1 and alerts[-1] is added
+    assert isinstance(added, RecordView) and isinstance(added["details"]["tags"], CollectionView)
+
+    updated = service.update_record("alerts", "a1", {"status": "resolved"})
+    assert alerts[-1] is updated and updated["status"] == "resolved" and "status" not in added
+    assert service.delete_record("alerts", "a1")
+    assert len(alerts) == count
+
+def test_new_collection_is_read_only(mock_store):
+    service = MockDataService()
+    service.add_record("shifts", {"shift_id": "s1"})
+    assert service.get_all_data()["shifts"] == [{"shift_id": "s1"}]
+    with pytest.raises(TypeError):
+        service.get_all_data()["shifts"].append({})
+
+def test_copies_are_equal(mock_store):
+    users = MockDataService().get_users()
+    assert copy.deepcopy(users) == users and copy.copy(users[0]) == users[0]
+
+def test_file_is_parsed_once_and_reloaded_when_replaced(mock_store):
+    service = MockDataService()
+    data = service.get_all_data()
+    assert MockDataService().get_all_data() is data and mock_store.generation == 1
+
+    with open(mock_store.path) as f:
+        replaced = json.load(f)
+    replaced["alerts"] = replaced["alerts"][:1]
+    _rewrite(mock_store, replaced)
+
+    assert len(service.get_alerts()) == 1
+    assert mock_store.generation == 2
+    assert len(data["alerts"]) > 1  # Views handed out earlier keep the previous load
+
+def test_unparseable_file_keeps_the_previous_data(mock_store):
+    service = MockDataService()
+    data = service.get_all_data()
+    version = service.data_version()
+    _rewrite(mock_store, '{"users": [')
+    assert service.get_all_data() is data
+    assert service.data_version() == version
@@ -0,0 +1,111 @@
+import json
+import os
+import random
+import pytest
+
+from service.query_engine import QueryEngine, QueryError, OPERATORS, INDEXED_FIELDS, _matches, parse_queries
+
+MOCK_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'mock_data.json')
+
+@pytest.fixture(scope="module")
+def data():
+    with open(MOCK_DATA_PATH) as f:
+        data = json.load(f)
+    # Awkward values the indexes must handle like the scan: missing fields, None,
+    # non-string timestamps and unhashable values
+    data["alerts"] = data["alerts"] + [
+        {"alert_id": "a-none", "zone": None, "status": "pending", "timestamp": None},
+        {"alert_id": "a-int", "zone": "Food Court", "status": "resolved", "timestamp": 1700000000},
+        {"alert_id": "a-missing", "status": "pending"},
+        {"alert_id": "a-list", "zone": ["Food Court", "Stage"], "status": ["pending"], "timestamp": "2011-03-31T05:03:29"},
+    ]
+    return data
+
+@pytest.fixture(scope="module")
+def engine(data):
+    return QueryEngine(data)
+
+def _scan(table, filters):
+    """The linear scan the indexes must agree with."""
+    conditions = []
+    for condition in filters:
+        value = condition["value"]
+        if condition["op"] == "in" and not isinstance(value, list):
+            value = [value]
+        conditions.append((table.resolve(condition["field"]), condition["op"], value))
+    return [row_id for row_id, record in enumerate(table.records)
+            if all(_matches(record.get(field), op, value) for field, op, value in conditions)]
+
+def _filter_cases(table, rng):
+    """Filters on every indexed field with every operator, using values present in the data."""
+    cases = []
+    for canonical in INDEXED_FIELDS:
+        field = table.resolve(canonical, strict=False)
+        if field is None:
+            continue
+        present = [record.get(field) for record in table.records]
+        values = [v for v in present if isinstance(v, (str, int, float, bool)) or v is None]
+        values += ["no such value", None]
+        for op in OPERATORS:
+            for value in rng.sample(values, min(len(values), 4)):
+                if op == "in":
+                    value = rng.sample(values, min(len(values), 2))
+                elif op in ("gt", "gte", "lt", "lte") and isinstance(value, str) and len(value) > 4:
+                    value = value[:rng.randint(1, len(value))]  # Prefixes hit the bisect edges
+                cases.append([{"field": canonical, "op": op, "value": value}])
+    return cases
+
+def test_indexed_selects_match_linear_scans(engine):
+    rng = random.Random(7)
+    checked = 0
+    for table in engine.tables.values():
+        cases = _filter_cases(table, rng)
+        # Conjunctions mixing indexed, range and scanned conditions
+        cases += [a + b for a, b in zip(cases, reversed(cases))]
+        for filters in cases:
+            assert table.select(filters) == _scan(table, filters), (table.name, filters)
+            checked += 1
+    assert checked > 200
+
+def test_timestamp_ranges_match_linear_scans(engine):
+    table = engine.tables["alerts"]
+    for value in sorted(v for v in table.sorted_values["timestamp"]) + ["", "1975", "2011-03-31T05:03:29", "9999"]:
+        for op in ("gt", "gte", "lt", "lte"):
+            filters = [{"field": "timestamp", "op": op, "value": value}]
+            assert table.select(filters) == _scan(table, filters)
+
+def test_unhashable_filter_values_fall_back_to_a_scan(engine):
+    table = engine.tables["alerts"]
+    filters = [{"field": "zone", "op": "eq", "value": ["Food Court", "Stage"]}]
+    assert table.select(filters) == _scan(table, filters) != []
+
+def test_counts_and_groups_match_linear_scans(engine, data):
+    result = engine.execute({"collection": "users", "filters": [{"field": "role", "op": "eq", "value": "admin"}], "group_by": "zone"})
+    admins = [u for u in data["users"] if u["user_role"] == "admin"]
+    assert result["count"] == len(admins)
+    assert sum(group["count"] for group in result["groups"]) == len(admins)
+    assert {g["value"]: g["count"] for g in result["groups"]} == {
+        zone: sum(u["user_zone"] == zone for u in admins) for zone in {u["user_zone"] for u in admins}
+    }
+
+def test_list_projects_fields_and_truncates(engine, data):
+    result = engine.execute({"collection": "users", "aggregate": "list", "fields": ["name", "role"], "limit": 3})
+    assert result["records"] == [{"name": u["name"], "user_role": u["user_role"]} for u in data["users"][:3]]
+    assert result["truncated"] == (len(data["users"]) > 3)
+
+@pytest.mark.parametrize("query, message", [
+    ({"collection": "tickets"}, "Unknown collection"),
+    ({"collection": "users", "filters": [{"field": "age", "op": "eq", "value": 3}]}, "Unknown field"),
+    ({"collection": "users", "filters": [{"field": "role", "op": "like", "value": "a"}]}, "Unknown operator"),
+    ({"collection": "users", "aggregate": "sum"}, "Unknown aggregate"),
+])
+def test_invalid_queries_are_rejected(engine, query, message):
+    with pytest.raises(QueryError, match=message):
+        engine.execute(query)
+
+def test_parse_queries_accepts_the_reply_shapes():
+    query = {"collection": "users"}
+    assert parse_queries(f"```json\n{json.dumps(query)}\n```") == [query]
+    assert parse_queries(json.dumps({"queries": [query, query]})) == [query, query]
+    with pytest.raises(QueryError):
+        parse_queries("no json here")
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+
+from service import response_cache
+from service.response_cache import ResponseCache, HashingEmbedder, normalize_query
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return clock
+
+def _cache(**kwargs):
+    """A cache that ignores the real data sources unless `version_sources` is given."""
+    kwargs.setdefault("version_sources", ())
+    return ResponseCache(**kwargs)
+
+def test_exact_lookup_uses_the_normalized_query(clock):
+    cache = _cache()
+    cache.put("admin", "Which zones are  crowded?", "Z1HA")
+    assert cache.get("admin", "which zones are crowded") == "Z1HA"
+    assert cache.get("user", "which zones are crowded") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = _cache(ttl=10)
+    cache.put("admin", "q", "answer")
+    clock.now += 9.9
+    assert cache.get("admin", "q") == "answer"
+    clock.now += 0.1
+    assert cache.get("admin", "q") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = _cache(max_entries=2)
+    cache.put("admin", "a", "A")
+    cache.put("admin", "b", "B")
+    assert cache.get("admin", "a") == "A"  # 'b' is now the least recently used
+    cache.put("admin", "c", "C")
+    assert len(cache) == 2
+    assert cache.get("admin", "b") is None
+    assert cache.get("admin", "a") == "A" and cache.get("admin", "c") == "C"
+
+def test_data_change_drops_the_cache(clock):
+    version = [0]
+    cache = _cache(version_sources=(lambda: version[0],))
+    cache.put("admin", "q", "old")
+    assert cache.get("admin", "q") == "old"
+    version[0] += 1
+    assert cache.get("admin", "q") is None
+
+def test_answer_computed_across_a_data_change_is_not_cached(clock):
+    version = [0]
+    cache = _cache(version_sources=(lambda: version[0],))
+    seen = cache.data_version()
+    assert cache.get("admin", "q") is None
+    version[0] += 1  # The data changes while the agent is answering
+    cache.put("admin", "q", "old", seen)
+    assert len(cache) == 0 and cache.get("admin", "q") is None
+
+    seen = cache.data_version()
+    cache.put("admin", "q", "new", seen)
+    assert cache.get("admin", "q") == "new"
+
+def test_invalidate_one_role(clock):
+    cache = _cache()
+    cache.put("admin", "q", "A")
+    cache.put("user", "q", "U")
+    cache.invalidate("admin")
+    assert cache.get("admin", "q") is None and cache.get("user", "q") == "U"
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    embed = HashingEmbedder(dimensions=64)
+    vector = embed("which zones are crowded")
+    assert vector.shape == (64,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    np.testing.assert_array_equal(vector, HashingEmbedder(dimensions=64)("which zones are crowded"))
+    assert not embed("").any()
+
+def test_semantic_lookup_finds_rephrasings(clock):
+    cache = _cache(semantic=True)
+    cache.put("admin", "How many people are in zone Z1HA right now?", "42")
+
+    assert cache.get("admin", "how many people are in zone z1ha now") == "42"
+    # Same words but another zone: the anchors differ, so no hit
+    assert cache.get("admin", "How many people are in zone Z2HA right now?") is None
+    # Unrelated question of the same role, and the same question for another role
+    assert cache.get("admin", "list the registered responders") is None
+    assert cache.get("user", "how many people are in zone z1ha now") is None
+
+def test_semantic_lookup_respects_the_threshold(clock):
+    query, rephrased = "which zones are crowded right now", "which zones are crowded now"
+    similarity = float(HashingEmbedder()(normalize_query(query)) @ HashingEmbedder()(normalize_query(rephrased)))
+
+    below = _cache(semantic=True, threshold=similarity + 1e-6)
+    below.put("admin", query, "Z1HA")
+    assert below.get("admin", rephrased) is None
+
+    at = _cache(semantic=True, threshold=similarity - 1e-6)
+    at.put("admin", query, "Z1HA")
+    assert at.get("admin", rephrased) == "Z1HA"
+
+def test_semantic_lookup_skips_expired_entries(clock):
+    cache = _cache(semantic=True, ttl=10)
+    cache.put("admin", "which zones are crowded right now", "Z1HA")
+    clock.now += 10
+    assert cache.get("admin", "which zones are crowded now") is None
+
+@pytest.fixture
+def firestore():
+    from models.firestore_fake import InMemoryFirestore
+    from models.schema import FirestoreService
+    db = InMemoryFirestore()
+    return db, FirestoreService(db=db, async_db=db.async_client())
+
+def test_firestore_writes_advance_the_data_version(firestore):
+    db, service = firestore
+    version = service.data_version()
+    doc_id = service.add_document("alerts", {"zone": "Z1HA"})
+    assert service.data_version() == version + 1
+    assert service.update_document("alerts", doc_id, {"zone": "Z1HB"})
+    assert service.delete_document("alerts", doc_id)
+    assert service.data_version() == version + 3
+
+    # A failed write changes nothing
+    assert not service.update_document("alerts", "missing", {"zone": "Z1HC"})
+    assert service.data_version() == version + 3
+
+def test_firestore_write_drops_cached_answers(clock, firestore):
+    db, service = firestore
+    cache = ResponseCache()
+    cache.put("admin", "how many alerts", "0")
+    service.add_document("alerts", {"zone": "Z1HA"})
+    assert cache.get("admin", "how many alerts") is None
+
+def test_other_writers_are_seen_only_through_watched_collections(clock, firestore):
+    from service.firestore_cache import CachedFirestoreService
+    db, service = firestore
+    cache = ResponseCache()
+    cache.put("admin", "how many alerts", "0")
+
+    # Another process writing to Firestore: the version cannot see it
+    db.collection("alerts").add({"zone": "Z1HA"})
+    assert cache.get("admin", "how many alerts") == "0"
+
+    watcher = CachedFirestoreService(service, watch=["alerts"])
+    try:
+        cache.put("admin", "how many alerts", "1")
+        db.collection("alerts").add({"zone": "Z1HB"})
+        assert cache.get("admin", "how many alerts") is None
+    finally:
+        watcher.close()
@@ -0,0 +1,68 @@
+import os
+import json
+import random
+from service.mock_data_service import MockDataService
+from service.stats_service import EventStats, get_event_stats
+
+def _recomputed(store):
+    return EventStats(store.data()).snapshot()
+
+def test_stats_match_the_data(mock_store):
+    snapshot = get_event_stats().snapshot()
+    users = mock_store.data()["users"]
+    assert snapshot["totals"]["users"] == len(users)
+    assert snapshot["users"]["role"] == {role: sum(u["user_role"] == role for u in users) for role in {u["user_role"] for u in users}}
+    assert get_event_stats().snapshot() is snapshot  # Not rebuilt without a write
+
+def test_incremental_updates_equal_a_full_recompute(mock_store):
+    rng = random.Random(3)
+    service = MockDataService()
+    stats = get_event_stats()
+    roles, zones, statuses = ["admin", "responder", "user", None], ["Food Court", "Stage", None], ["pending", "resolved", None]
+
+    for step in range(300):
+        collection = rng.choice(["users", "alerts", "incidents", "documents"])
+        id_field = {"users": "user_id", "alerts": "alert_id", "incidents": "incident_id", "documents": "doc_id"}[collection]
+        records = mock_store.data()[collection]
+        action = rng.choice(["add", "update", "delete"]) if len(records) else "add"
+        if action == "add":
+            record = {id_field: f"new-{step}", "user_role": rng.choice(roles), "user_zone": rng.choice(zones),
+                      "zone": rng.choice(zones), "status": rng.choice(statuses), "incident_type": rng.choice(["fire", None])}
+            service.add_record(collection, {k: v for k, v in record.items() if rng.random() < 0.8 or k == id_field})
+        elif action == "update":
+            record_id = rng.choice(records)[id_field]
+            service.update_record(collection, record_id, {"user_role": rng.choice(roles), "zone": rng.choice(zones), "status": rng.choice(statuses)})
+        else:
+            service.delete_record(collection, rng.choice(records)[id_field])
+        assert stats.snapshot() == _recomputed(mock_store), (step, action, collection)
+
+    assert get_event_stats() is stats
+
+def test_writes_to_missing_records_change_nothing(mock_store):
+    service = MockDataService()
+    before = get_event_stats().snapshot()
+    assert service.update_record("users", "missing", {"user_role": "admin"}) is None
+    assert not service.delete_record("alerts", "missing")
+    assert get_event_stats().snapshot() == before
+
+def test_new_collection_is_counted(mock_store):
+    MockDataService().add_record("shifts", {"shift_id": "s1"})
+    assert get_event_stats().snapshot()["totals"]["shifts"] == 1
+    assert get_event_stats().snapshot() == _recomputed(mock_store)
+
+def test_reload_rebuilds_the_stats(mock_store):
+    stats = get_event_stats()
+    with open(mock_store.path) as f:
+        data = json.load(f)
+    data["alerts"] = data["alerts"][:2]
+    with open(mock_store.path, "w") as f:
+        json.dump(data, f)
+    os.utime(mock_store.path, ns=(0, 10**18))
+
+    reloaded = get_event_stats()
+    assert reloaded is not stats
+    assert reloaded.snapshot()["totals"]["alerts"] == 2
+    # The old stats no longer follow the store's writes
+    MockDataService().add_record("alerts", {"alert_id": "a1", "zone": "Stage", "status": "pending"})
+    assert reloaded.snapshot() == _recomputed(mock_store)
+    assert stats.snapshot()["totals"]["alerts"] != reloaded.snapshot()["totals"]["alerts"]
@@ -0,0 +1,77 @@
+import json
+import asyncio
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from agents.streaming import FinalAnswerExtractor, stream_agent_events, format_sse
+
+ANSWER = 'Zone "Z1HA" is at 80%\ncapacity – send a responder \\ now.'
+REPLY = '```json\n{\n    "action": "Final Answer",\n    "action_input": ' + json.dumps(ANSWER) + '\n}\n```'
+
+def _feed_all(chunks):
+    extractor = FinalAnswerExtractor()
+    pieces = [extractor.feed(chunk) for chunk in chunks]
+    return "".join(pieces), extractor
+
+def test_whole_reply_is_decoded():
+    text, extractor = _feed_all([REPLY])
+    assert text == ANSWER and extractor.done
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_answer_is_the_same_whatever_the_chunking(size):
+    text, extractor = _feed_all([REPLY[i:i + size] for i in range(0, len(REPLY), size)])
+    assert text == ANSWER and extractor.done
+
+def test_marker_and_escapes_split_across_chunks():
+    marker_end = REPLY.index('"action_input"') + 5
+    escape = REPLY.index('\\"')
+    unicode_escape = REPLY.index('\\u')
+    cuts = [0, REPLY.index('Final') + 3, marker_end, escape + 1, unicode_escape + 3, len(REPLY)]
+    text, _ = _feed_all([REPLY[a:b] for a, b in zip(cuts, cuts[1:])])
+    assert text == ANSWER
+
+def test_tool_calls_yield_no_answer_text():
+    reply = '{"action": "DBSearchTool", "action_input": "crowd in Z1HA"}'
+    text, extractor = _feed_all([reply[:20], reply[20:]])
+    assert text == "" and not extractor.done
+
+class FakeAgent:
+    """Replays a fixed list of astream_events v2 events."""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, inputs, version):
+        assert version == "v2"
+        for event in self.events:
+            yield event
+
+def _chunk(run_id, text, parent_ids):
+    return {"event": "on_chat_model_stream", "run_id": run_id, "parent_ids": parent_ids,
+            "data": {"chunk": AIMessageChunk(content=text)}}
+
+def test_stream_events_separate_tools_tokens_and_final():
+    tool_call = '{"action": "DBSearchTool", "action_input": "Z1HA"}'
+    events = [
+        _chunk("llm-1", tool_call, ["agent"]),
+        {"event": "on_chat_model_end", "run_id": "llm-1", "parent_ids": ["agent"], "data": {}},
+        {"event": "on_tool_start", "run_id": "tool", "name": "DBSearchTool", "parent_ids": ["agent"], "data": {"input": "Z1HA"}},
+        # The tool's own LLM call writes a final-answer-shaped reply: it must not be streamed
+        _chunk("llm-tool", '{"action": "Final Answer", "action_input": "inner"}', ["agent", "tool"]),
+        {"event": "on_tool_end", "run_id": "tool", "name": "DBSearchTool", "parent_ids": ["agent"], "data": {"output": "x" * 600}},
+        *[_chunk("llm-2", REPLY[i:i + 5], ["agent"]) for i in range(0, len(REPLY), 5)],
+        {"event": "on_chat_model_end", "run_id": "llm-2", "parent_ids": ["agent"], "data": {}},
+        {"event": "on_chain_end", "run_id": "agent", "parent_ids": [], "data": {"output": {"output": ANSWER}}},
+    ]
+
+    async def collect():
+        return [event async for event in stream_agent_events(FakeAgent(events), {"input": "q"})]
+
+    streamed = asyncio.run(collect())
+    assert [e["event"] for e in streamed if e["event"] != "token"] == ["tool_start", "tool_end", "final"]
+    assert streamed[1]["output"] == "x" * 500
+    assert "".join(e["text"] for e in streamed if e["event"] == "token") == ANSWER
+    assert streamed[-1] == {"event": "final", "output": ANSWER}
+
+def test_format_sse():
+    assert format_sse({"event": "token", "text": "hi"}) == 'event: token\ndata: {"text": "hi"}\n\n'